@@ -0,0 +1,120 @@
+"""
+Library info view: time until the object list can be shown, from the
+getFileInfo payload to the encoded Flet update, for the old eager panels
+(every object with its full attribute table) against the paged panels
+(FILE_INFO_PAGE_SIZE collapsed headers, the table built on expand).
+Client side layout is not included. Objects are synthetic
+OBJECT_STATISTICS rows.
+
+Usage: python benchmarks/info_benchmark.py [objects ...] [--eager-limit N]
+The eager variant is skipped above --eager-limit objects (default 5000),
+it builds about 80 controls per object.
+"""
+import json
+import sys
+import time
+from pathlib import Path
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+sys.path.insert(0, str(SRC_DIR))
+
+import flet as ft  # noqa: E402
+import msgpack  # noqa: E402
+from flet.controls.base_control import BaseControl  # noqa: E402
+from flet.controls.object_patch import ObjectPatch  # noqa: E402
+from flet.messaging.protocol import configure_encode_object_for_msgpack  # noqa: E402
+
+from content.config import FILE_INFO_PAGE_SIZE  # noqa: E402
+from content.ingest import iter_envelope_rows  # noqa: E402
+from content.LibraryStuff.single_library_info import TIMESTAMP_KEYS, object_panel, object_table  # noqa: E402
+from content.timestamps import format_timestamp  # noqa: E402
+
+_encode = configure_encode_object_for_msgpack(BaseControl)
+
+
+def payload(count: int) -> str:
+    row = {
+        "OBJNAME": None, "OBJTYPE": "*FILE", "OBJOWNER": "QSYS", "OBJDEFINER": "QSYS",
+        "OBJCREATED": "2024-01-02 03:04:05", "OBJSIZE": 65536, "OBJTEXT": "Synthetic object",
+        "OBJLONGNAME": None, "LAST_USED_TIMESTAMP": "2024-06-01 10:00:00", "LAST_USED_OBJECT": "YES",
+        "DAYS_USED_COUNT": 42, "LAST_RESET_TIMESTAMP": None, "IASP_NUMBER": 0, "IASP_NAME": None,
+        "OBJATTRIBUTE": "PF", "OBJLONGSCHEMA": "BENCH", "TEXT": "Synthetic object", "SQL_OBJECT_TYPE": "TABLE",
+        "OBJLIB": "BENCH", "CHANGE_TIMESTAMP": "2024-05-01 08:00:00", "USER_CHANGED": "YES",
+        "SOURCE_FILE": None, "SOURCE_LIBRARY": None, "SOURCE_MEMBER": None, "SOURCE_TIMESTAMP": None,
+        "CREATED_SYSTEM": "BENCHSYS", "CREATED_SYSTEM_VERSION": "V7R5M0", "LICENSED_PROGRAM": None,
+        "SAVE_TIMESTAMP": "2024-04-01 22:00:00", "RESTORE_TIMESTAMP": None, "SAVE_COMMAND": "SAVLIB",
+        "JOURNALED": "NO", "JOURNAL_NAME": None, "JOURNAL_START_TIMESTAMP": None,
+    }
+    data = [{**row, "OBJNAME": f"OBJ{i:06d}"} for i in range(count)]
+    return json.dumps({"success": True, "code": 200, "message": "successful",
+                       "metadata": {"count": count}, "data": data, "error": None}, indent=4)
+
+
+def eager_panels(data) -> ft.ExpansionPanelList:
+    # _get_info_about_library before the paged panels
+    panel_list = ft.ExpansionPanelList(controls=[])
+    for item in data:
+        content_column = ft.DataTable(columns=[ft.DataColumn(label=ft.Text()), ft.DataColumn(label=ft.Text())],
+                                      rows=[], width=1000)
+        for key, value in item.items():
+            if not value or value == "None" or key == "OBJNAME":
+                continue
+            if key in TIMESTAMP_KEYS:
+                value = format_timestamp(value)
+            content_column.rows.append(ft.DataRow(cells=[
+                ft.DataCell(ft.Text(f"{key.replace('_', ' ').title()}: ", weight=ft.FontWeight.BOLD, size=15)),
+                ft.DataCell(ft.Text(value=str(value))),
+            ]))
+        panel_list.controls.append(ft.ExpansionPanel(
+            header=ft.ListTile(title=ft.Text(item.get("OBJNAME", "Unknown"), weight=ft.FontWeight.BOLD)),
+            can_tap_header=True, bgcolor=ft.Colors.TRANSPARENT,
+            content=ft.Container(content=content_column, padding=10),
+        ))
+    return panel_list
+
+
+def encode(control) -> tuple:
+    """Control count and message size of the first update that shows control."""
+    patch, added, _ = ObjectPatch.from_diff(None, control, control_cls=BaseControl)
+    return len(added), len(msgpack.packb(patch.to_message(), default=_encode))
+
+
+def measure(build) -> tuple:
+    start = time.perf_counter()
+    controls, size = encode(build())
+    return time.perf_counter() - start, controls, size
+
+
+def main():
+    args = sys.argv[1:]
+    eager_limit = 5000
+    if "--eager-limit" in args:
+        index = args.index("--eager-limit")
+        eager_limit = int(args[index + 1])
+        del args[index:index + 2]
+    counts = [int(arg) for arg in args] or [100, 5_000, 50_000]
+
+    print(f"{'objects':>8} {'variant':>8} {'time':>10} {'controls':>9} {'message':>10}")
+    for count in counts:
+        raw = payload(count)
+        if count <= eager_limit:
+            seconds, controls, size = measure(lambda: eager_panels(json.loads(raw)["data"]))
+            print(f"{count:>8} {'eager':>8} {seconds * 1000:>8.1f}ms {controls:>9} {size / 1024:>8.0f}KB")
+        else:
+            print(f"{count:>8} {'eager':>8} {'skipped':>10}")
+
+        # The executor parses the payload once, the view gets the first page
+        def paged():
+            rows = [row for row in iter_envelope_rows(raw, "getFileInfo") if isinstance(row, dict)]
+            return ft.ExpansionPanelList(controls=[object_panel(item) for item in rows[:FILE_INFO_PAGE_SIZE]])
+        seconds, controls, size = measure(paged)
+        print(f"{count:>8} {'paged':>8} {seconds * 1000:>8.1f}ms {controls:>9} {size / 1024:>8.0f}KB")
+
+    first = json.loads(payload(1))["data"][0]
+    start = time.perf_counter()
+    controls, _ = encode(ft.Container(content=object_table(first)))
+    print(f"expanding one panel: {(time.perf_counter() - start) * 1000:.1f}ms, {controls} controls")
+
+
+if __name__ == "__main__":
+    main()
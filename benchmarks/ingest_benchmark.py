@@ -0,0 +1,132 @@
+"""
+Compares the old sync ingestion (json.loads -> list of tuples -> executemany)
+with the streaming path in content.ingest on a synthetic getAllLibraries payload.
+
+Each variant runs in its own subprocess so peak RSS (ru_maxrss) is measured in
+isolation. Usage: python benchmarks/ingest_benchmark.py [rows]
+
+The streaming variant is slower on this first, empty-table load: besides the
+parse (iter_envelope_rows, about 1.7x json.loads) it does the delta work the old
+path skipped, i.e. looking up stored hashes and recording the seen keys for
+tombstoning. That work is what lets later syncs write only the changed rows.
+"""
+import json
+import resource
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+sys.path.insert(0, str(SRC_DIR))
+
+COLUMNS = ("OBJNAME", "OBJCREATED", "DESCRIPTION")
+SCHEMA = (
+    "(OBJNAME TEXT PRIMARY KEY, OBJCREATED TEXT, DESCRIPTION TEXT, "
+    "ROW_HASH TEXT, SYNC_GEN INTEGER NOT NULL DEFAULT 0, DELETED INTEGER NOT NULL DEFAULT 0)"
+)
+
+
+def write_payload(path: Path, rows: int):
+    # Same shape as iLibrary's create_success_envelope (indent=4)
+    data = [
+        {
+            "OBJNAME": f"LIB{i:07d}",
+            "OBJTYPE": "*LIB",
+            "OBJOWNER": "QSECOFR",
+            "OBJCREATED": "2024-01-01 12:00:00",
+            "CHANGE_TIMESTAMP": "2024-06-01 08:30:00",
+            "TEXT": f"Synthetic library number {i}",
+            "OBJSIZE": 1234567,
+        }
+        for i in range(rows)
+    ]
+    path.write_text(json.dumps(
+        {"success": True, "code": 200, "message": "OK", "metadata": {}, "data": data, "error": None},
+        indent=4,
+    ))
+
+
+def prepare_db(path: Path):
+    with sqlite3.connect(path) as conn:
+        conn.execute("CREATE TABLE SYNC_GENERATION (TABLE_NAME TEXT PRIMARY KEY, GEN INTEGER NOT NULL)")
+        conn.execute(f"CREATE TABLE LIBRARY_METADATA {SCHEMA}")
+
+
+def run_old(payload: str, db_path: Path):
+    from content.ingest import row_hash
+
+    items = json.loads(payload).get("data", [])
+    values = [(i.get("OBJNAME"), i.get("OBJCREATED"), i.get("TEXT")) for i in items]
+    rows = [(*row, row_hash(row), 1) for row in values]
+    with sqlite3.connect(db_path) as conn:
+        conn.executemany(
+            "INSERT INTO LIBRARY_METADATA (OBJNAME, OBJCREATED, DESCRIPTION, ROW_HASH, SYNC_GEN) "
+            "VALUES (?, ?, ?, ?, ?)",
+            rows,
+        )
+        conn.commit()
+    return len(rows)
+
+
+def run_streaming(payload: str, db_path: Path):
+    from content.ingest import apply_delta, iter_envelope_rows
+
+    values = (
+        (i.get("OBJNAME"), i.get("OBJCREATED"), i.get("TEXT"))
+        for i in iter_envelope_rows(payload, "getAllLibraries")
+    )
+    with sqlite3.connect(db_path) as conn:
+        counts = apply_delta(conn, "LIBRARY_METADATA", "OBJNAME", COLUMNS, values)
+        conn.commit()
+    return counts["inserted"]
+
+
+def child(variant: str, payload_path: str):
+    # The payload is read as one string, just like the iLibrary return value
+    payload = Path(payload_path).read_text()
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "bench.db"
+        prepare_db(db_path)
+        baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        start = time.perf_counter()
+        written = (run_old if variant == "old" else run_streaming)(payload, db_path)
+        duration = time.perf_counter() - start
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KiB on Linux
+    print(json.dumps({"rows": written, "seconds": duration, "peak_kib": peak, "baseline_kib": baseline}))
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    with tempfile.TemporaryDirectory() as tmp:
+        payload_path = Path(tmp) / "payload.json"
+        # Generated in its own process too: ru_maxrss survives fork/exec
+        subprocess.run([sys.executable, __file__, "--write", str(payload_path), str(rows)], check=True)
+        print(f"{rows} synthetic rows, payload {payload_path.stat().st_size / 2 ** 20:.1f} MiB")
+        report(payload_path)
+
+
+def report(payload_path: Path):
+    print(f"{'variant':<10} {'rows':>8} {'time (s)':>9} {'peak RSS (MiB)':>15} {'growth (MiB)':>13}")
+    for variant in ("old", "streaming"):
+        result = subprocess.run(
+            [sys.executable, __file__, "--child", variant, str(payload_path)],
+            capture_output=True, text=True, check=True,
+        )
+        stats = json.loads(result.stdout)
+        print(
+            f"{variant:<10} {stats['rows']:>8} {stats['seconds']:>9.2f} "
+            f"{stats['peak_kib'] / 1024:>15.1f} {(stats['peak_kib'] - stats['baseline_kib']) / 1024:>13.1f}"
+        )
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--child":
+        child(sys.argv[2], sys.argv[3])
+    elif len(sys.argv) > 1 and sys.argv[1] == "--write":
+        write_payload(Path(sys.argv[2]), int(sys.argv[3]))
+    else:
+        main()
@@ -0,0 +1,109 @@
+"""
+Time-to-first-row and memory of the All Libraries list, eager (every row
+becomes controls) vs. the windowed LiveList (first page only).
+
+"First row" is measured up to the serialized Flet payload the client would
+receive: SQLite query + control construction + msgpack encoding.
+The tile mirrors AllLibraries._build_library_tile (that view needs a page and
+the IBM i stack, so it is not imported here).
+
+Usage: python benchmarks/list_benchmark.py [rows ...]
+"""
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import flet as ft
+import msgpack
+from flet.controls.base_control import BaseControl
+from flet.messaging.protocol import configure_encode_object_for_msgpack
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+sys.path.insert(0, str(SRC_DIR))
+
+from content.HelperStuff.live_list import LiveList  # noqa: E402
+from content.config import LIST_PAGE_SIZE, LIST_TILE_HEIGHT  # noqa: E402
+from content.db_manager import DatabaseManager  # noqa: E402
+
+SCHEMA = (
+    "(OBJNAME TEXT PRIMARY KEY, OBJCREATED TEXT, DESCRIPTION TEXT, "
+    "ROW_HASH TEXT, SYNC_GEN INTEGER NOT NULL DEFAULT 0, DELETED INTEGER NOT NULL DEFAULT 0)"
+)
+
+
+def build_tile(lib_name, created, description):
+    subtitle = ft.Column(spacing=0, controls=[
+        ft.Row(controls=[ft.Text("Description:", weight=ft.FontWeight.BOLD), ft.Text(f"{description}")]),
+        ft.Row(controls=[ft.Text("Created:", weight=ft.FontWeight.BOLD), ft.Text(f"{created}")]),
+    ])
+    return ft.Container(
+        content=ft.ListTile(
+            leading=ft.CircleAvatar(content=ft.Text(lib_name[0:2].upper())),
+            title=ft.Text(lib_name),
+            subtitle=subtitle,
+            is_three_line=True,
+            on_click=lambda e: None,
+            trailing=ft.PopupMenuButton(icon=ft.Icons.MORE_VERT, items=[
+                ft.PopupMenuItem("Show Details", on_click=lambda e: None),
+                ft.PopupMenuItem("Get SaveFile", on_click=lambda e: None),
+            ]),
+        ),
+        border_radius=8,
+        height=LIST_TILE_HEIGHT,
+    )
+
+
+def create_db(path: Path, rows: int):
+    with sqlite3.connect(path) as conn:
+        conn.execute("CREATE TABLE SYNC_GENERATION (TABLE_NAME TEXT PRIMARY KEY, GEN INTEGER NOT NULL)")
+        conn.execute(f"CREATE TABLE LIBRARY_METADATA {SCHEMA}")
+        conn.executemany(
+            "INSERT INTO LIBRARY_METADATA (OBJNAME, OBJCREATED, DESCRIPTION) VALUES (?, ?, ?)",
+            ((f"LIB{i:06d}", "Monday, Jan 01, 2024", f"Synthetic library {i}") for i in range(rows)),
+        )
+        conn.commit()
+
+
+def load_and_encode(db_path: Path, page_size: int):
+    container = ft.Column()
+    live_list = LiveList(
+        page=None, container=container, db=DatabaseManager(db_path), table_name="LIBRARY_METADATA",
+        key_column="OBJNAME", columns=("OBJNAME", "OBJCREATED", "DESCRIPTION"),
+        build_tile=build_tile, page_size=page_size,
+    )
+    with sqlite3.connect(db_path) as conn:
+        live_list.load(conn.cursor())
+    payload = msgpack.packb(container, default=configure_encode_object_for_msgpack(BaseControl))
+    return len(container.controls) - 1, len(payload)
+
+
+def measure(db_path: Path, page_size: int):
+    # Timed and traced in separate runs, tracemalloc slows allocation heavy code a lot
+    start = time.perf_counter()
+    tiles, payload = load_and_encode(db_path, page_size)
+    duration = time.perf_counter() - start
+
+    tracemalloc.start()
+    load_and_encode(db_path, page_size)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return duration, peak, tiles, payload
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [1_000, 10_000, 50_000]
+    print(f"{'rows':>7} {'mode':<9} {'tiles':>6} {'first row (s)':>14} {'peak mem (MiB)':>15} {'payload (KiB)':>14}")
+    for rows in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = Path(tmp) / "bench.db"
+            create_db(db_path, rows)
+            for mode, page_size in (("eager", 0), ("windowed", LIST_PAGE_SIZE)):
+                duration, peak, tiles, payload = measure(db_path, page_size)
+                print(f"{rows:>7} {mode:<9} {tiles:>6} {duration:>14.3f} {peak / 2 ** 20:>15.1f} {payload / 1024:>14.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Full refresh of LIBRARY_METADATA: the old in-place DROP / CREATE / INSERT
+(FTS triggers fire per row) against DatabaseManager.refresh_table (load into
+a shadow table, rename, rebuild the FTS index once). A reader polls the table
+during each refresh and reports what it saw.
+
+Usage: python benchmarks/refresh_benchmark.py [rows ...]
+"""
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+sys.path.insert(0, str(SRC_DIR))
+
+from content.db_manager import DatabaseManager, LIBRARY_METADATA_SCHEMA  # noqa: E402
+from content.ingest import batched  # noqa: E402
+from content.search_index import create_fts  # noqa: E402
+
+COLUMNS = ("OBJNAME", "OBJCREATED", "DESCRIPTION")
+
+
+def rows(count: int, version: int):
+    return ((f"LIB{i:06d}", "2024-01-01 00:00:00", f"Library {i} version {version}") for i in range(count))
+
+
+def refresh_in_place(db: DatabaseManager, data) -> int:
+    # refresh_table before the shadow table
+    with db.writer() as conn:
+        cursor = conn.cursor()
+        cursor.execute("DROP TABLE IF EXISTS LIBRARY_METADATA")
+        cursor.execute(f"CREATE TABLE LIBRARY_METADATA {LIBRARY_METADATA_SCHEMA}")
+        create_fts(cursor, "LIBRARY_METADATA", rebuild=True)
+        row_count = 0
+        for batch in batched(data):
+            cursor.executemany(
+                "INSERT INTO LIBRARY_METADATA (OBJNAME, OBJCREATED, DESCRIPTION) VALUES (?, ?, ?)", batch
+            )
+            row_count += len(batch)
+        return row_count
+
+
+def refresh_shadow(db: DatabaseManager, data) -> int:
+    return db.refresh_table("LIBRARY_METADATA", LIBRARY_METADATA_SCHEMA, COLUMNS, data)
+
+
+def poll(db: DatabaseManager, stop: threading.Event, seen: set):
+    while not stop.is_set():
+        try:
+            with db.reader() as conn:
+                seen.add(conn.execute("SELECT COUNT(*) FROM LIBRARY_METADATA").fetchone()[0])
+        except Exception as e:
+            seen.add(type(e).__name__)
+        time.sleep(0.005)
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10_000, 100_000]
+    print(f"{'rows':>7} {'method':<9} {'refresh (s)':>12}  reader saw")
+    for count in sizes:
+        for name, refresh in (("in place", refresh_in_place), ("shadow", refresh_shadow)):
+            with tempfile.TemporaryDirectory() as tmp:
+                db = DatabaseManager(Path(tmp) / "bench.db")
+                db.ensure_schema()
+                refresh_shadow(db, rows(count, 1))
+
+                stop, seen = threading.Event(), set()
+                reader = threading.Thread(target=poll, args=(db, stop, seen))
+                reader.start()
+                start = time.perf_counter()
+                refresh(db, rows(count, 2))
+                duration = time.perf_counter() - start
+                stop.set()
+                reader.join()
+                db.close()
+                print(f"{count:>7} {name:<9} {duration:>12.3f}  {sorted(seen, key=str)}")
+
+
+if __name__ == "__main__":
+    main()
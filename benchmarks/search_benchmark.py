@@ -0,0 +1,82 @@
+"""
+Search latency of the old LIKE '%q%' query against the FTS5 trigram index
+(content.search_index.search) on a synthetic LIBRARY_METADATA table.
+
+Usage: python benchmarks/search_benchmark.py [rows ...]
+"""
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+sys.path.insert(0, str(SRC_DIR))
+
+from content.search_index import create_fts, search  # noqa: E402
+
+SCHEMA = (
+    "(OBJNAME TEXT PRIMARY KEY, OBJCREATED TEXT, DESCRIPTION TEXT, "
+    "ROW_HASH TEXT, SYNC_GEN INTEGER NOT NULL DEFAULT 0, DELETED INTEGER NOT NULL DEFAULT 0)"
+)
+WORDS = ["PAYROLL", "ORDERS", "BACKUP", "TEST", "PROD", "ARCHIVE", "INVOICE", "STOCK", "HR", "FINANCE"]
+QUERIES = ["PAY", "ORD", "ACKU", "INVOI", "ARCH", "L012", "STOCK1", "NOMATCH"]
+REPEAT = 20
+
+
+def create_db(path: Path, rows: int):
+    rng = random.Random(42)
+    with sqlite3.connect(path) as conn:
+        conn.execute(f"CREATE TABLE LIBRARY_METADATA {SCHEMA}")
+        create_fts(conn.cursor(), "LIBRARY_METADATA")
+        conn.executemany(
+            "INSERT INTO LIBRARY_METADATA (OBJNAME, OBJCREATED, DESCRIPTION) VALUES (?, ?, ?)",
+            (
+                (f"{rng.choice(WORDS)[:4]}L{i:06d}", "2024-01-01 00:00:00",
+                 f"{rng.choice(WORDS)} {rng.choice(WORDS)} library {i}")
+                for i in range(rows)
+            ),
+        )
+        conn.commit()
+
+
+def like_search(conn, text):
+    # The query the SearchBars used before the FTS index, over the same columns the index covers
+    return conn.execute(
+        "SELECT OBJNAME FROM LIBRARY_METADATA WHERE DELETED = 0 "
+        "AND (OBJNAME LIKE ? OR DESCRIPTION LIKE ?) LIMIT 50",
+        (f"%{text}%", f"%{text}%"),
+    ).fetchall()
+
+
+def fts_search(conn, text):
+    return search(conn, "LIBRARY_METADATA", text)
+
+
+def median_ms(conn, func, query) -> tuple:
+    timings = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        matches = len(func(conn, query))
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000, matches
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10_000, 100_000]
+    print(f"{'rows':>7} {'query':<8} {'LIKE (ms)':>10} {'hits':>5} {'FTS (ms)':>10} {'hits':>5}")
+    for rows in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = Path(tmp) / "bench.db"
+            create_db(db_path, rows)
+            with sqlite3.connect(db_path) as conn:
+                for query in QUERIES:
+                    like_ms, like_hits = median_ms(conn, like_search, query)
+                    fts_ms, fts_hits = median_ms(conn, fts_search, query)
+                    print(f"{rows:>7} {query:<8} {like_ms:>10.2f} {like_hits:>5} {fts_ms:>10.2f} {fts_hits:>5}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,314 @@
+import asyncio
+import logging
+import sqlite3
+from bisect import bisect_left
+
+import flet as ft
+
+from content.config import LIST_PAGE_SIZE, LIST_WINDOW_PAGES, LIST_TILE_HEIGHT
+from content.db_manager import DatabaseManager, FULL
+
+logger = logging.getLogger("LiveList")
+
+
+class LiveList:
+    """
+    Keeps a column of tiles, keyed by the primary key of a synced metadata
+    table, in step with the local database. load() builds the list once;
+    afterwards every "refresh_<table>" pubsub topic only reads the rows with
+    SYNC_GEN above the last seen generation and inserts, replaces or removes
+    just those tiles.
+
+    Rows are read with keyset pagination (ORDER BY key, WHERE key > last key)
+    and only a window of window_pages * page_size tiles exists at a time.
+    Pages scrolled out at the top are replaced by a spacer of the same height,
+    so tiles need a fixed height (tile_height). page_size=0 loads all rows.
+
+    Tiles are kept in key order, build_tile(*row) creates one tile from the
+    selected columns (the key column first). on_update, if given, is called
+    instead of container.update() after changes were applied.
+    """
+
+    def __init__(self, page: ft.Page, container: ft.Column, db: DatabaseManager, table_name: str,
+                 key_column: str, columns: tuple, build_tile, on_update=None,
+                 page_size: int = LIST_PAGE_SIZE, window_pages: int = LIST_WINDOW_PAGES,
+                 tile_height: float = LIST_TILE_HEIGHT):
+        self.page = page
+        self.container = container
+        self.db = db
+        self.table_name = table_name
+        self.key_column = key_column
+        self.columns = columns
+        self.build_tile = build_tile
+        self.on_update = on_update
+        self.topic = f"refresh_{table_name.lower()}"
+
+        self.page_size = page_size
+        self.max_rows = page_size * window_pages
+        # Space one tile takes in the column, including the spacing after it
+        self.row_extent = tile_height + (container.spacing if container.spacing is not None else 10)
+        self.spacer = ft.Container(height=0)
+
+        self.generation = 0
+        self.keys = []
+        # Rows before the window (replaced by the spacer) and whether the window reaches the last row
+        self.rows_before = 0
+        self.at_end = True
+        self.loaded = False
+        self._lock = asyncio.Lock()
+
+    # ------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------
+    def _current_generation(self, cursor) -> int:
+        return DatabaseManager.sync_generations(cursor, self.table_name)[0]
+
+    def _select_page(self, cursor, after=None, before=None) -> list:
+        """
+        One page of live rows after/before the given key. Fetches one row more
+        than the page size to tell whether there are more rows.
+        """
+        sql = f"SELECT {', '.join(self.columns)} FROM {self.table_name} WHERE DELETED = 0"
+        params = []
+        if after is not None:
+            sql += f" AND {self.key_column} > ?"
+            params.append(after)
+        if before is not None:
+            sql += f" AND {self.key_column} < ?"
+            params.append(before)
+        sql += f" ORDER BY {self.key_column} {'DESC' if before is not None else 'ASC'}"
+        if self.page_size:
+            sql += " LIMIT ?"
+            params.append(self.page_size + 1)
+        return cursor.execute(sql, params).fetchall()
+
+    def _count_before(self, key) -> int:
+        with self.db.reader() as conn:
+            return conn.execute(
+                f"SELECT COUNT(*) FROM {self.table_name} WHERE DELETED = 0 AND {self.key_column} < ?",
+                (key,)
+            ).fetchone()[0]
+
+    def _read(self, **kwargs) -> list:
+        with self.db.reader() as conn:
+            return self._select_page(conn.cursor(), **kwargs)
+
+    # ------------------------------------------------------
+    # Window handling
+    # ------------------------------------------------------
+    def _set_rows_before(self, rows_before: int):
+        self.rows_before = rows_before
+        self.spacer.height = rows_before * self.row_extent
+
+    def load(self, cursor) -> int:
+        """Builds the tiles of the first page from the open cursor, returns the number of rows."""
+        return self.show_first_page(*self.read_first_page(cursor))
+
+    def read_first_page(self, cursor) -> tuple:
+        """
+        (generation, rows) of the first page. Only reads, so it can run on a
+        worker thread; show_first_page() then builds the tiles on the loop.
+        """
+        # Read the generation first: a sync committing in between is picked up
+        # again by the next refresh, applying a row twice is harmless
+        generation = self._current_generation(cursor)
+        return generation, self._select_page(cursor)
+
+    def _read_first_page(self):
+        with self.db.reader() as conn:
+            return self.read_first_page(conn.cursor())
+
+    def show_first_page(self, generation: int, rows) -> int:
+        """Replaces the tiles with rows from read_first_page(), returns their number."""
+        self.generation = generation
+        self.at_end = not self.page_size or len(rows) <= self.page_size
+        rows = rows[:self.page_size or None]
+
+        self.container.controls.clear()
+        self.container.controls.append(self.spacer)
+        self.container.controls.extend(self.build_tile(*row) for row in rows)
+        self.keys = [row[0] for row in rows]
+        self._set_rows_before(0)
+        self.loaded = True
+        return len(rows)
+
+    def _trim(self, from_top: bool):
+        """Drops whole pages from one end until the window fits max_rows again."""
+        excess = len(self.keys) - self.max_rows
+        if not self.page_size or excess <= 0:
+            return
+        drop = -(-excess // self.page_size) * self.page_size
+        if from_top:
+            del self.keys[:drop]
+            del self.container.controls[1:drop + 1]
+            self._set_rows_before(self.rows_before + drop)
+        else:
+            del self.keys[-drop:]
+            del self.container.controls[-drop:]
+            self.at_end = False
+
+    async def load_next(self) -> bool:
+        """Appends the next page; returns True if tiles were added."""
+        if self.at_end or not self.loaded or self._lock.locked():
+            return False
+        async with self._lock:
+            rows = await asyncio.to_thread(self._read, after=self.keys[-1] if self.keys else None)
+            self.at_end = len(rows) <= self.page_size
+            rows = rows[:self.page_size]
+            self.container.controls.extend(self.build_tile(*row) for row in rows)
+            self.keys.extend(row[0] for row in rows)
+            self._trim(from_top=True)
+        return bool(rows)
+
+    async def load_previous(self) -> bool:
+        """Puts the page before the window back in place of the spacer."""
+        if not self.rows_before or not self.keys or self._lock.locked():
+            return False
+        async with self._lock:
+            rows = await asyncio.to_thread(self._read, before=self.keys[0])
+            more = len(rows) > self.page_size
+            rows = rows[:self.page_size][::-1]
+            self.container.controls[1:1] = [self.build_tile(*row) for row in rows]
+            self.keys[:0] = [row[0] for row in rows]
+            self._set_rows_before(max(0, self.rows_before - len(rows)) if more else 0)
+            self._trim(from_top=False)
+        return bool(rows)
+
+    async def handle_scroll(self, e: ft.OnScrollEvent):
+        """
+        Loads pages when the user scrolls within half a page of either end of
+        the window. Controls above the list (search bar) are small against that.
+        """
+        if not self.page_size or not self.loaded:
+            return
+        threshold = self.page_size * self.row_extent / 2
+        changed = False
+        if e.pixels >= e.max_scroll_extent - threshold:
+            changed = await self.load_next()
+        elif self.rows_before and e.pixels <= self.spacer.height + threshold:
+            changed = await self.load_previous()
+        if changed:
+            self._refresh_ui()
+
+    # ------------------------------------------------------
+    # Sync notifications
+    # ------------------------------------------------------
+    def subscribe(self):
+        self.page.pubsub.subscribe_topic(self.topic, self._on_refresh)
+
+    def unsubscribe(self):
+        self.page.pubsub.unsubscribe_topic(self.topic)
+
+    def _read_changes(self):
+        with self.db.reader() as conn:
+            cursor = conn.cursor()
+            generation = self._current_generation(cursor)
+            rows = cursor.execute(
+                f"SELECT {', '.join(self.columns)}, DELETED FROM {self.table_name} WHERE SYNC_GEN > ?",
+                (self.generation,)
+            ).fetchall()
+        return generation, rows
+
+    def _refresh_ui(self):
+        if self.on_update:
+            self.on_update()
+        elif self.container.page:
+            self.container.update()
+
+    async def _on_refresh(self, topic, message):
+        # The message may come from the in-process engine or the ChangeWatcher,
+        # the generations in the database tell what has to be read
+        await self.catch_up()
+
+    async def _apply_changes(self):
+        async with self._lock:
+            try:
+                generation, rows = await asyncio.to_thread(self._read_changes)
+            except sqlite3.Error as e:
+                logger.error(f"Could not read changes of {self.table_name}: {e}")
+                return
+            changed_above = self.apply(rows)
+            if changed_above:
+                # Rows before the window came or went, the spacer has to follow
+                self._set_rows_before(await asyncio.to_thread(self._count_before, self.keys[0]))
+            self.generation = max(self.generation, generation)
+
+        if not rows:
+            return
+        self._refresh_ui()
+        logger.info(f"{self.table_name}: applied {len(rows)} changed rows to the list")
+
+    async def catch_up(self) -> bool:
+        """
+        Applies the syncs since the last one seen, on a sync notification or
+        for a view kept by ViewCache. Nothing is read if the generation did not
+        change; after a full sync the window is rebuilt. Returns True if the
+        list changed.
+        """
+        if not self.loaded:
+            # load() has not run yet and will read the current state anyway
+            return False
+        try:
+            refresh = await asyncio.to_thread(self.db.pending_refresh, self.table_name, self.generation)
+        except sqlite3.Error as e:
+            logger.error(f"Could not read the generation of {self.table_name}: {e}")
+            return False
+        if refresh is None:
+            return False
+        if refresh == FULL:
+            await self._reload()
+        else:
+            await self._apply_changes()
+        return True
+
+    async def _reload(self):
+        """
+        After a full sync every row carries the new generation and removed
+        rows left no tombstone, so the window is rebuilt from the first page.
+        """
+        async with self._lock:
+            try:
+                generation, rows = await asyncio.to_thread(self._read_first_page)
+            except sqlite3.Error as e:
+                logger.error(f"Could not reload {self.table_name}: {e}")
+                return
+            self.show_first_page(generation, rows)
+        self._refresh_ui()
+        logger.info(f"{self.table_name}: reloaded after a full sync")
+
+    def apply(self, rows) -> bool:
+        """
+        Applies (*columns, DELETED) rows to the tiles of the window. Rows after
+        the window are left for load_next(); a window grown past max_rows by
+        inserts drops its last pages, which load_next() reads again.
+
+        :return: True if rows before the window changed
+        """
+        if rows and not self.keys:
+            # Drop the empty/waiting state shown instead of tiles
+            self.container.controls[:] = [self.spacer]
+
+        changed_above = False
+        controls = self.container.controls
+        for *values, deleted in rows:
+            key = values[0]
+            if self.keys and key < self.keys[0] and self.rows_before:
+                changed_above = True
+                continue
+            if self.keys and key > self.keys[-1] and not self.at_end:
+                continue
+
+            index = bisect_left(self.keys, key)
+            present = index < len(self.keys) and self.keys[index] == key
+            if deleted:
+                if present:
+                    del self.keys[index]
+                    del controls[index + 1]
+            elif present:
+                controls[index + 1] = self.build_tile(*values)
+            else:
+                self.keys.insert(index, key)
+                controls.insert(index + 1, self.build_tile(*values))
+        # From the bottom, so the spacer and the tiles above stay where they are
+        self._trim(from_top=False)
+        return changed_above and bool(self.keys)
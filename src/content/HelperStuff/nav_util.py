@@ -1,4 +1,5 @@
 import flet as ft
+from content.preferences import preferences
 
 class TopNav:
     @staticmethod
@@ -12,7 +13,7 @@ class TopNav:
                 alignment=ft.MainAxisAlignment.SPACE_AROUND),
             actions=[
                 # Reference the instance variable here
-                ft.Text(f"Server: {await ft.SharedPreferences().get('server')}"),
+                ft.Text(f"Server: {await preferences(page).get('server')}"),
                 ft.Container(width=60),
             ]
         )
@@ -0,0 +1,170 @@
+import asyncio
+import logging
+import sqlite3
+from bisect import bisect_left
+
+import flet as ft
+
+from content.db_manager import DatabaseManager, FULL
+
+logger = logging.getLogger("PrefixIndex")
+
+
+class PrefixIndex:
+    """
+    Sorted in-memory copy of the key column of a synced metadata table
+    (OBJNAME, AUTHORIZATION_NAME) that answers "name starts with" lookups by
+    binary search, without a database round trip.
+
+    load() fills it once; afterwards every "refresh_<table>" pubsub topic only
+    reads the rows with SYNC_GEN above the last seen generation, like LiveList.
+    Lookups ignore case.
+    """
+
+    def __init__(self, page: ft.Page, db: DatabaseManager, table_name: str, key_column: str):
+        self.page = page
+        self.db = db
+        self.table_name = table_name
+        self.key_column = key_column
+        self.topic = f"refresh_{table_name.lower()}"
+
+        self.generation = 0
+        # Case-folded keys in sorted order and the original keys at the same positions
+        self._folded = []
+        self._names = []
+        self.loaded = False
+        self._lock = asyncio.Lock()
+
+    def __len__(self):
+        return len(self._names)
+
+    # ------------------------------------------------------
+    # Building
+    # ------------------------------------------------------
+    def _current_generation(self, cursor) -> int:
+        return DatabaseManager.sync_generations(cursor, self.table_name)[0]
+
+    def load(self, cursor) -> int:
+        """Reads all live keys from the open cursor, returns their number."""
+        return self.fill(*self.read(cursor))
+
+    def read(self, cursor) -> tuple:
+        """(generation, keys) for fill(). Only reads, so it can run on a worker thread."""
+        generation = self._current_generation(cursor)
+        keys = cursor.execute(
+            f"SELECT {self.key_column} FROM {self.table_name} WHERE DELETED = 0"
+        ).fetchall()
+        return generation, keys
+
+    def fill(self, generation: int, keys) -> int:
+        """Replaces the index with the keys from read(), returns their number."""
+        self.generation = generation
+        pairs = sorted((str(key).casefold(), str(key)) for key, in keys)
+        self._folded = [folded for folded, _ in pairs]
+        self._names = [name for _, name in pairs]
+        self.loaded = True
+        return len(self._names)
+
+    def _find(self, key: str) -> tuple:
+        """Position of key, or where to insert it, and whether it is present."""
+        folded = key.casefold()
+        index = bisect_left(self._folded, folded)
+        while index < len(self._folded) and self._folded[index] == folded:
+            if self._names[index] == key:
+                return index, True
+            index += 1
+        return index, False
+
+    def add(self, key):
+        key = str(key)
+        index, present = self._find(key)
+        if not present:
+            self._folded.insert(index, key.casefold())
+            self._names.insert(index, key)
+
+    def remove(self, key):
+        index, present = self._find(str(key))
+        if present:
+            del self._folded[index]
+            del self._names[index]
+
+    # ------------------------------------------------------
+    # Lookup
+    # ------------------------------------------------------
+    def lookup(self, prefix: str, limit: int) -> list:
+        """
+        Returns up to limit (key,) rows starting with prefix in key order,
+        the same shape as the rows of search_index.search().
+        """
+        prefix = prefix.strip().casefold()
+        if not prefix:
+            return []
+        start = bisect_left(self._folded, prefix)
+        # Every key starting with prefix sorts before prefix + the highest code point
+        end = bisect_left(self._folded, prefix + "\U0010ffff", start, min(start + limit, len(self._folded)))
+        return [(name,) for name in self._names[start:end]]
+
+    # ------------------------------------------------------
+    # Sync notifications
+    # ------------------------------------------------------
+    def subscribe(self):
+        self.page.pubsub.subscribe_topic(self.topic, self._on_refresh)
+
+    def unsubscribe(self):
+        self.page.pubsub.unsubscribe_topic(self.topic)
+
+    def _read_changes(self):
+        with self.db.reader() as conn:
+            cursor = conn.cursor()
+            generation = self._current_generation(cursor)
+            rows = cursor.execute(
+                f"SELECT {self.key_column}, DELETED FROM {self.table_name} WHERE SYNC_GEN > ?",
+                (self.generation,)
+            ).fetchall()
+        return generation, rows
+
+    def _reload(self):
+        with self.db.reader() as conn:
+            return self.read(conn.cursor())
+
+    async def catch_up(self):
+        """Applies the syncs since the last one seen, like LiveList.catch_up()."""
+        if not self.loaded:
+            return
+        try:
+            refresh = await asyncio.to_thread(self.db.pending_refresh, self.table_name, self.generation)
+        except sqlite3.Error as e:
+            logger.error(f"Could not read the generation of {self.table_name}: {e}")
+            return
+        if refresh == FULL:
+            await self._reload_all()
+        elif refresh is not None:
+            await self._apply_changes()
+
+    async def _on_refresh(self, topic, message):
+        # Like LiveList, the database tells what changed, whoever sent the message
+        await self.catch_up()
+
+    async def _reload_all(self):
+        # Removed keys left no tombstone, read them all again
+        async with self._lock:
+            try:
+                self.fill(*await asyncio.to_thread(self._reload))
+            except sqlite3.Error as e:
+                logger.error(f"Could not reload {self.table_name}: {e}")
+
+    async def _apply_changes(self):
+        async with self._lock:
+            try:
+                generation, rows = await asyncio.to_thread(self._read_changes)
+            except sqlite3.Error as e:
+                logger.error(f"Could not read changes of {self.table_name}: {e}")
+                return
+            for key, deleted in rows:
+                if deleted:
+                    self.remove(key)
+                else:
+                    self.add(key)
+            self.generation = max(self.generation, generation)
+        if rows:
+            logger.debug(f"{self.table_name}: applied {len(rows)} changed keys, {len(self)} in the index")
@@ -0,0 +1,124 @@
+import asyncio
+import logging
+import sqlite3
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from content.config import SEARCH_DEBOUNCE
+from content.db_manager import DatabaseManager
+from content.search_index import SEARCH_LIMIT
+
+logger = logging.getLogger("Typeahead")
+
+
+class TypeaheadSearch:
+    """
+    Search-as-you-type for the SearchBars. Keystrokes are debounced, the query
+    runs off the event loop on one reused read connection, a newer keystroke
+    cancels (and interrupts) the running query, and only the newest result is
+    rendered.
+
+    query(conn, text) returns the rows for text, render(text, rows) updates
+    the suggestion controls. Keystroke-to-render latencies are kept for stats().
+
+    instant(text), if given, answers from memory (see PrefixIndex): its rows
+    are rendered right away, and the query only runs when they do not fill
+    the limit.
+    """
+
+    def __init__(self, db: DatabaseManager, query, render, debounce: float = SEARCH_DEBOUNCE,
+                 instant=None, limit: int = SEARCH_LIMIT):
+        self.db = db
+        self.query = query
+        self.render = render
+        self.debounce = debounce
+        self.instant = instant
+        self.limit = limit
+
+        # One thread runs all searches on one connection
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="search")
+        self._conn = None
+        self._task = None
+        self._latest = 0
+        self.latencies = deque(maxlen=200)
+
+    def _run_query(self, text: str):
+        if self._conn is None:
+            # Its own connection, so interrupt() only ever stops a search
+            self._conn = self.db.connect(readonly=True)
+        return self.query(self._conn, text)
+
+    async def on_change(self, e):
+        """SearchBar on_change handler."""
+        keystroke = time.perf_counter()
+        self._latest += 1
+        if self._task and not self._task.done():
+            self._task.cancel()
+        text = e.data or ""
+
+        if self.instant:
+            rows = self.instant(text)
+            if rows:
+                self.render(text, rows)
+                self._record(text, rows, keystroke)
+            if len(rows) >= self.limit:
+                return
+        self._task = asyncio.create_task(self._search(text, self._latest, keystroke))
+
+    async def _search(self, text: str, request: int, keystroke: float):
+        try:
+            await asyncio.sleep(self.debounce)
+            future = asyncio.get_running_loop().run_in_executor(self._executor, self._run_query, text)
+            try:
+                rows = await future
+            except asyncio.CancelledError:
+                # Stop the superseded query instead of letting it hold the search thread
+                if self._conn is not None:
+                    self._conn.interrupt()
+                raise
+        except asyncio.CancelledError:
+            return
+        except sqlite3.OperationalError as e:
+            if "interrupted" not in str(e):
+                logger.error(f"Search for {text!r} failed: {e}")
+            return
+
+        if request != self._latest:
+            return
+        self.render(text, rows)
+        self._record(text, rows, keystroke)
+
+    def _record(self, text: str, rows, keystroke: float):
+        latency = time.perf_counter() - keystroke
+        self.latencies.append(latency)
+        logger.debug(f"Search {text!r}: {len(rows)} rows rendered {latency * 1000:.1f} ms after keystroke")
+
+    def stats(self) -> dict:
+        """p50/p95 keystroke-to-render latency in seconds over the last searches."""
+        values = sorted(self.latencies)
+        if not values:
+            return {"searches": 0, "p50": None, "p95": None}
+        return {
+            "searches": len(values),
+            "p50": values[len(values) // 2],
+            "p95": values[min(len(values) - 1, int(len(values) * 0.95))],
+        }
+
+    def close(self):
+        if self._task and not self._task.done():
+            self._task.cancel()
+
+        def close_connection():
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+        self._executor.submit(close_connection)
+        self._executor.shutdown(wait=False)
+        if self.latencies:
+            stats = self.stats()
+            logger.info(
+                f"{stats['searches']} searches, keystroke to render "
+                f"p50 {stats['p50'] * 1000:.1f} ms, p95 {stats['p95'] * 1000:.1f} ms"
+            )
@@ -0,0 +1,89 @@
+import logging
+from collections import OrderedDict
+
+from content.config import VIEW_CACHE_SIZE
+
+logger = logging.getLogger("ViewCache")
+
+
+class ViewCache:
+    """
+    Keeps the views of the navigation rail alive between visits, so going
+    back to a view shows the tiles it already built instead of decrypting the
+    credentials, reading SharedPreferences and querying SQLite again.
+
+    At most capacity views are kept; the least recently shown one is dropped
+    (and closed, if it has close()) first. The scroll offset of every kept
+    view is remembered so main.py can restore it.
+
+    Views are built by the function registered under their key. A kept view
+    is responsible for catching up with the syncs it missed when it is
+    mounted again (see LiveList.catch_up).
+    """
+
+    def __init__(self, capacity: int = VIEW_CACHE_SIZE):
+        self.capacity = max(1, capacity)
+        self._builders = {}
+        self._views = OrderedDict()
+        self._offsets = {}
+        self.hits = 0
+        self.misses = 0
+
+    def register(self, key: str, build):
+        """build() returns a new view for key."""
+        self._builders[key] = build
+
+    def get(self, key: str):
+        """Returns the kept view for key, building it on first use."""
+        view = self._views.get(key)
+        if view is not None:
+            self.hits += 1
+            self._views.move_to_end(key)
+            return view
+
+        self.misses += 1
+        view = self._views[key] = self._builders[key]()
+        while len(self._views) > self.capacity:
+            dropped_key, dropped = self._views.popitem(last=False)
+            self._offsets.pop(dropped_key, None)
+            self._close(dropped)
+            logger.info(f"Dropped the {dropped_key} view, the least recently used one")
+        return view
+
+    def _key_of(self, view):
+        for key, kept in self._views.items():
+            if kept is view:
+                return key
+        return None
+
+    def remember_offset(self, view, pixels: float):
+        """Stores the scroll offset of view; ignored for views that are not kept."""
+        key = self._key_of(view)
+        if key is not None:
+            self._offsets[key] = pixels
+
+    def offset(self, view) -> float | None:
+        """Scroll offset to restore for view, None if it is not kept."""
+        key = self._key_of(view)
+        if key is None:
+            return None
+        return self._offsets.get(key, 0.0)
+
+    def clear(self):
+        for view in self._views.values():
+            self._close(view)
+        self._views.clear()
+        self._offsets.clear()
+        if self.hits or self.misses:
+            logger.info(f"View cache: {self.hits} views reused, {self.misses} built")
+
+    @staticmethod
+    def _close(view):
+        if hasattr(view, "close"):
+            view.close()
+
+
+def kept_view(page, key: str, build):
+    """The view kept for key by the ViewCache in page.data["views"], or build() if there is none."""
+    views = (page.data or {}).get("views")
+    return views.get(key) if views else build()
@@ -1,11 +1,19 @@
+import asyncio
 import json
-from datetime import datetime
 from pathlib import Path
 import flet as ft
-from content.functions import load_decrypted_credentials, get_or_generate_key
-from iLibrary import Library
+from content.credentials import credential_store
+from content.ibmi_executor import ibmi_executor
 import logging
 from content.HelperStuff.nav_util import TopNav
+from content.HelperStuff.view_cache import kept_view
+from content.HelperStuff.live_list import LiveList
+from content.HelperStuff.typeahead import TypeaheadSearch
+from content.HelperStuff.prefix_index import PrefixIndex
+from content import search_index
+from content.db_manager import db_mgr
+from content.preferences import preferences
+from content.config import LIST_TILE_HEIGHT, PREFIX_INDEX
 import sqlite3
 
 
@@ -30,12 +38,38 @@ class AllLibraries(ft.Column):
         self.DB_PASSWORD = None
         self.DB_SYSTEM = None
         self.DB_PORT = None
+        # Read from SharedPreferences after the first render, the dialogs may open before
+        self.DOWNLOAD_PATH = None
 
         self.path_to_DB = Path(__file__).parent.parent / ".auth"
         self.path_to_DB_file = self.path_to_DB / "libraries_metadata.db"
 
         self.list_container = ft.Column()
         self.input_card = self.list_container
+        # Applies sync notifications to the tiles of the changed libraries only
+        self.live_list = LiveList(
+            page=self.current_page,
+            container=self.list_container,
+            db=db_mgr,
+            table_name="LIBRARY_METADATA",
+            key_column="OBJNAME",
+            columns=("OBJNAME", "OBJCREATED_DISPLAY", "DESCRIPTION"),
+            build_tile=self._build_library_tile,
+            on_update=self._show_list,
+        )
+        # Answers name prefixes without a database round trip
+        self.prefix_index = PrefixIndex(
+            page=self.current_page,
+            db=db_mgr,
+            table_name="LIBRARY_METADATA",
+            key_column="OBJNAME",
+        ) if PREFIX_INDEX else None
+        self.search = TypeaheadSearch(
+            db=db_mgr,
+            query=self._query_libraries,
+            render=self._render_suggestions,
+            instant=self._prefix_suggestions if PREFIX_INDEX else None,
+        )
         self.progress_bar = ft.Container(
                 bgcolor=ft.Colors.PRIMARY_CONTAINER,
                 border_radius=8,
@@ -47,10 +81,56 @@ class AllLibraries(ft.Column):
             )
         self.progress_bar_container = ft.Container(self.progress_bar, alignment=ft.Alignment.TOP_CENTER)
         self.controls.append(self.progress_bar_container)
+        self._shown = False
+        # Set once the tiles (or the empty state) are shown, main.py waits for it at startup
+        self.first_render = asyncio.Event()
 
         # Start initialization
 
-        self.current_page.run_task(self.async_init)
+        self._init = self.current_page.run_task(self.async_init)
+
+    def did_mount(self):
+        self.live_list.subscribe()
+        if self.prefix_index:
+            self.prefix_index.subscribe()
+        if self._shown:
+            # Shown again by the view cache, the tiles are still there
+            self.current_page.run_task(self._reshow)
+        self._shown = True
+
+    async def handle_page_scroll(self, e: ft.OnScrollEvent):
+        """Called by main.py for scroll events of the page content, loads more tiles."""
+        await self.live_list.handle_scroll(e)
+
+    def will_unmount(self):
+        # Kept alive by the view cache, the search thread stays until close()
+        self.live_list.unsubscribe()
+        if self.prefix_index:
+            self.prefix_index.unsubscribe()
+
+    def close(self):
+        """Called by ViewCache when the view is dropped."""
+        # Not shown anymore, it must not keep loading or listening to syncs
+        self._init.cancel()
+        self.live_list.unsubscribe()
+        if self.prefix_index:
+            self.prefix_index.unsubscribe()
+        self.search.close()
+
+    async def _reshow(self):
+        """Catches up with the syncs missed while another view was shown."""
+        if not self.live_list.loaded:
+            if self._init.done():
+                # Nothing to show when the view was built, start over
+                self.controls[:] = [self.progress_bar_container]
+                self.progress_bar_container.visible = True
+                self.list_container.controls.clear()
+                self._init = self.current_page.run_task(self.async_init)
+            return
+        await self._create_app_bar()
+        await self.live_list.catch_up()
+        if self.prefix_index:
+            await self.prefix_index.catch_up()
 
     def __exit__(self, exc_type, exc_val, exc_tb):
         self.progress_bar.visible = True
@@ -67,18 +147,19 @@ class AllLibraries(ft.Column):
     # ----------------------------
     # Handle Search changes
     # ----------------------------
-    def handle_change(self, e):
-        # 3. Get the search query
-        query = e.data.upper().strip()
-
-        # 4. Filter: Ensure 'library' is treated as a string
-        # We check if 'query' is inside the 'library' name
-        DBConnect = sqlite3.connect(self.path_to_DB_file)
-        cursor = DBConnect.cursor()
-        data_lib = cursor.execute("SELECT OBJNAME FROM LIBRARY_METADATA WHERE OBJNAME LIKE ? LIMIT 50", (f"%{query}%",))
-        raw_data = data_lib.fetchall()
-
-        # 5. Clear and Repopulate
+    @staticmethod
+    def _query_libraries(conn, text):
+        """Runs on the search thread (see TypeaheadSearch). Ranked over name and description."""
+        return search_index.search(conn, "LIBRARY_METADATA", text)
+
+    def _prefix_suggestions(self, text):
+        """Names starting with text, straight from memory; [] until the index is loaded."""
+        if not self.prefix_index.loaded:
+            return []
+        return self.prefix_index.lookup(text, self.search.limit)
+
+    def _render_suggestions(self, text, raw_data):
+        # Clear and Repopulate
         self.lv.controls.clear()
 
         for library_name in raw_data:
@@ -92,27 +173,21 @@ class AllLibraries(ft.Column):
             )
 
         # update the UI
+        self.searchbar.update()
 
     # ------------------------------
     # Init the Main Page
     # ------------------------------
     async def async_init(self):
         #self._show_empty_state("Loading libraries\nplease wait...")
-        await self._create_app_bar()
-
+        # The tiles come from the local database first, everything that waits
+        # for SharedPreferences follows once they are on screen
         # Create ListView and SearchBar
         self.lv = ft.ListView()
         #Fille the Searchbar for the First 10 Librarys
         try:
-            with sqlite3.connect(self.path_to_DB_file, timeout=10) as conn:
-                cursor = conn.cursor()
-
-                # 3. Fetch data
-                cursor.execute("SELECT OBJNAME FROM LIBRARY_METADATA LIMIT 50")
-                data = cursor.fetchall()
-                cursor.close()
-                if data is None:
-                    raise
+            # Read on a worker thread, reader() may wait for a connection
+            data = await asyncio.to_thread(self._read_first_suggestions)
             for i in data:
                 self.lv.controls.append(
                     ft.ListTile(
@@ -134,22 +209,12 @@ class AllLibraries(ft.Column):
             divider_color=ft.Colors.ON_SECONDARY_CONTAINER,
             bar_hint_text="Search for Library...",
             view_hint_text="Suggestions...",
-            on_change=self.handle_change,  # use method, not function
+            on_change=self.search.on_change,  # debounced, runs off the UI loop
             on_tap=self.open_searchbar,  # open searchbar when tapped
             controls=[self.lv],  # ListView inside the SearchBar
             visible=False,
         )
 
-        # Download path and SharedPreferences logic
-        if not await ft.SharedPreferences().contains_key('download_path'):
-            self.DOWNLOAD_PATH = Path.home() / "Downloads"
-            await ft.SharedPreferences().set('download_path', str(self.DOWNLOAD_PATH))
-        else:
-            self.DOWNLOAD_PATH = Path(await ft.SharedPreferences().get('download_path'))
-
-        self.ENCRYPTION_KEY_STR = get_or_generate_key(self.env_file_path)
-
-
         if  self.path_to_DB_file.exists():
             self.input_card.visible = True
             self.list_container.visible = True
@@ -165,9 +230,18 @@ class AllLibraries(ft.Column):
             self._show_empty_state('No libraries found.\nWaiting for sync...')
             self.progress_bar_container.visible = False
             self.current_page.update()
-            return
+        self.first_render.set()
 
+        await self._create_app_bar()
 
+        # Download path and SharedPreferences logic
+        # Answered from memory once the preferences are loaded
+        prefs = preferences(self.current_page)
+        if not await prefs.contains_key('download_path'):
+            self.DOWNLOAD_PATH = Path.home() / "Downloads"
+            prefs.set('download_path', str(self.DOWNLOAD_PATH))
+        else:
+            self.DOWNLOAD_PATH = Path(await prefs.get('download_path'))
 
         self.update()
 
@@ -178,6 +252,27 @@ class AllLibraries(ft.Column):
         await TopNav.top_nav(self.current_page, title="All Libraries")
         self.current_page.update()
 
+    @staticmethod
+    def _read_first_suggestions():
+        with db_mgr.reader() as conn:
+            return conn.execute("SELECT OBJNAME FROM LIBRARY_METADATA WHERE DELETED = 0 LIMIT 50").fetchall()
+
+    def _read_list(self):
+        """
+        Runs on a worker thread: the prefix index keys and the first page of
+        the list, None while the table does not exist yet.
+        """
+        with db_mgr.reader() as conn:
+            cursor = conn.cursor()
+            # 2. Defensive Check: Does the table exist?
+            cursor.execute(
+                "SELECT name FROM sqlite_master WHERE type='table' AND name='LIBRARY_METADATA'"
+            )
+            if not cursor.fetchone():
+                return None
+            keys = self.prefix_index.read(cursor) if self.prefix_index else None
+            return keys, self.live_list.read_first_page(cursor)
+
     async def _rebuild_libraries(self):
         """
         Safely rebuilds the list of libraries.
@@ -187,105 +282,96 @@ class AllLibraries(ft.Column):
         self.list_container.controls.clear()
 
         try:
-            # Use a timeout so we wait if the SyncWorker is currently writing
-
-            with sqlite3.connect(self.path_to_DB_file, timeout=10) as conn:
-                cursor = conn.cursor()
+            # WAL mode: reads the last committed state even while the SyncWorker writes
+            read = await asyncio.to_thread(self._read_list)
+        except sqlite3.OperationalError as e:
+            logger.error(f"Database error: {e}")
+            self._show_empty_state("Database is currently busy. Retrying...")
+            return
+        if read is None:
+            logger.warning("LIBRARY_METADATA table not found. Waiting for sync...")
+            await self._show_syncing_state()
+            return
 
-                # 2. Defensive Check: Does the table exist?
-                cursor.execute(
-                    "SELECT name FROM sqlite_master WHERE type='table' AND name='LIBRARY_METADATA'"
-                )
-                if not cursor.fetchone():
-                    logger.warning("LIBRARY_METADATA table not found. Waiting for sync...")
-                    await self._show_syncing_state()
-                    return
+        # 3. Build the tiles
+        keys, first_page = read
+        if self.prefix_index:
+            self.prefix_index.fill(*keys)
+        if not self.live_list.show_first_page(*first_page):
+            self._show_empty_state("No libraries found.\nWaiting for sync...")
+            return
 
-                # 3. Fetch data
-                cursor.execute("SELECT OBJNAME, OBJCREATED, DESCRIPTION FROM LIBRARY_METADATA")
-                data = cursor.fetchall()
-                if not data:
-                    self._show_empty_state("No libraries found.\nWaiting for sync...")
-                    return
+        # 5. UI Updates
+        self._show_list()
 
-                # 4. Build UI Controls
-                for i, item in enumerate(data):
-                    lib_name, timestamp_str, description_lib = item
+    def _show_list(self):
+        self.input_card.visible = True
+        self.list_container.visible = True
+        self.progress_bar_container.visible = False
+        self.searchbar.visible = True
+        self.update()
 
-                    try:
-                        dt_object = datetime.strptime(timestamp_str, "%Y-%m-%d %H:%M:%S")
-                        formatted_str = dt_object.strftime("%A, %b %d, %Y")
-                    except (ValueError, TypeError):
-                        formatted_str = "Unknown Date"
-                    subtitle = ft.Column(
-                        spacing=0,
-                        controls=[
-                            ft.Row(
-                                controls=[
-                                    ft.Text(f"Description:", weight=ft.FontWeight.BOLD), ft.Text(f"{description_lib}"),
+    def _build_library_tile(self, lib_name, created_display, description_lib):
+        # Formatted at sync time (OBJCREATED_DISPLAY), None if the date could not be parsed
+        formatted_str = created_display or "Unknown Date"
+        subtitle = ft.Column(
+            spacing=0,
+            controls=[
+                ft.Row(
+                    controls=[
+                        ft.Text(f"Description:", weight=ft.FontWeight.BOLD), ft.Text(f"{description_lib}"),
 
-                             ]
+                 ]
 
-                            ),
-                            ft.Row(
+                ),
+                ft.Row(
 
 
-                                controls=[
-                                    ft.Text(f"Created:", weight=ft.FontWeight.BOLD), ft.Text(f"{formatted_str}"),
+                    controls=[
+                        ft.Text(f"Created:", weight=ft.FontWeight.BOLD), ft.Text(f"{formatted_str}"),
 
-                                ]
+                    ]
 
-                            )
-                        ]
-                    )
+                )
+            ]
+        )
 
-                    new_library_tile = ft.Container(
-                        content=ft.ListTile(
-                            leading=ft.CircleAvatar(
-                                content=ft.Text(lib_name[0:2].upper()),
-                                bgcolor=ft.Colors.TERTIARY,
-                                color=ft.Colors.ON_TERTIARY,
-                            ),
-                            title=ft.Text(lib_name),
-                            subtitle=subtitle,
-                            bgcolor=ft.Colors.INVERSE_PRIMARY,
-                            is_three_line=True,
+        return ft.Container(
+            content=ft.ListTile(
+                leading=ft.CircleAvatar(
+                    content=ft.Text(lib_name[0:2].upper()),
+                    bgcolor=ft.Colors.TERTIARY,
+                    color=ft.Colors.ON_TERTIARY,
+                ),
+                title=ft.Text(lib_name),
+                subtitle=subtitle,
+                bgcolor=ft.Colors.INVERSE_PRIMARY,
+                is_three_line=True,
+                on_click=lambda e, name=lib_name: self.current_page.run_task(
+                    self._show_single_library_info, name
+                ),
+                trailing=ft.PopupMenuButton(
+                    icon=ft.Icons.MORE_VERT,
+                    items=[
+                        ft.PopupMenuItem(
+                            "Show Details",
                             on_click=lambda e, name=lib_name: self.current_page.run_task(
                                 self._show_single_library_info, name
-                            ),
-                            trailing=ft.PopupMenuButton(
-                                icon=ft.Icons.MORE_VERT,
-                                items=[
-                                    ft.PopupMenuItem(
-                                        "Show Details",
-                                        on_click=lambda e, name=lib_name: self.current_page.run_task(
-                                            self._show_single_library_info, name
-                                        )
-                                    ),
-                                    ft.PopupMenuItem(
-                                        "Get SaveFile",
-                                        on_click=lambda e, name=lib_name: self.current_page.run_task(
-                                            self._get_single_savefile, name
-                                        )
-                                    ),
-                                ],
-                            ),
+                            )
                         ),
-                        border_radius=8,
-                    )
-                    self.list_container.controls.append(new_library_tile)
-        except sqlite3.OperationalError as e:
-            logger.error(f"Database error: {e}")
-            self._show_empty_state("Database is currently busy. Retrying...")
-            return
-
-        # 5. UI Updates
-        self.input_card.visible = True
-        self.list_container.visible = True
-        self.progress_bar_container.visible = False
-        self.searchbar.visible = True
-        self.update()
-
+                        ft.PopupMenuItem(
+                            "Get SaveFile",
+                            on_click=lambda e, name=lib_name: self.current_page.run_task(
+                                self._get_single_savefile, name
+                            )
+                        ),
+                    ],
+                ),
+            ),
+            border_radius=8,
+            # Fixed height so LiveList can replace scrolled out pages by a spacer
+            height=LIST_TILE_HEIGHT,
+        )
 
 
     def _show_empty_state(self, message):
@@ -320,12 +406,12 @@ class AllLibraries(ft.Column):
     async def _get_single_savefile(self, name: str):
         """Get the Single Savefile of a Library """
 
-        def download_save_file(library_name: str, savefile_name: str, description: str, version: str, authority: str,
+        async def download_save_file(library_name: str, savefile_name: str, description: str, version: str, authority: str,
                                download_path: str):
 
 
             try:
-                credentials = load_decrypted_credentials(self.ENCRYPTION_KEY_STR, self.env_file_path)
+                credentials = credential_store.get_credentials()
                 self.DB_USER = credentials["user"]
                 self.DB_PASSWORD = credentials["password"]
                 self.DB_SYSTEM = credentials["system"]
@@ -333,32 +419,33 @@ class AllLibraries(ft.Column):
                 self.DB_PORT = credentials["port"]
                 self.current_page.pop_dialog()
                 data = None
-                with Library(self.DB_USER, self.DB_PASSWORD, self.DB_SYSTEM, self.DB_DRIVER) as lib:
-                    try:
-                        data = lib.saveLibrary(
-                            library=library_name,
-                            saveFileName=savefile_name,
-                            description=description,
-                            localPath=download_path,
-                            remPath=f'/home/{self.DB_USER.upper()}/',
-                            authority=authority,
-                            version=version,
-                            getZip=True,
-                            port=self.DB_PORT
-                        )
-                        self.current_page.run_task(ft.SharedPreferences().set, 'download_path', download_path)
-                        data = json.loads(data)
-                        if data['code'] != 200:
-                            raise Exception(data['error']['details'])
-                    except Exception as e:
-                        self.current_page.show_dialog(ft.SnackBar(
-                            content=ft.Text(f"{e}", color=ft.Colors.WHITE),
-                            bgcolor=ft.Colors.RED_ACCENT_400))
-                        return
-                    message = data['message']
+                try:
+                    data = await ibmi_executor.save_library(
+                        credentials,
+                        library=library_name,
+                        saveFileName=savefile_name,
+                        description=description,
+                        localPath=download_path,
+                        remPath=f'/home/{self.DB_USER.upper()}/',
+                        authority=authority,
+                        version=version,
+                        getZip=True,
+                        port=self.DB_PORT
+                    )
+                    preferences(self.current_page).set('download_path', download_path)
+                    self.DOWNLOAD_PATH = Path(download_path)
+                    data = json.loads(data)
+                    if data['code'] != 200:
+                        raise Exception(data['error']['details'])
+                except Exception as e:
                     self.current_page.show_dialog(ft.SnackBar(
-                        content=ft.Text(f"{message}", color=ft.Colors.WHITE),
-                        bgcolor=ft.Colors.GREEN_ACCENT_400))
+                        content=ft.Text(f"{e}", color=ft.Colors.WHITE),
+                        bgcolor=ft.Colors.RED_ACCENT_400))
+                    return
+                message = data['message']
+                self.current_page.show_dialog(ft.SnackBar(
+                    content=ft.Text(f"{message}", color=ft.Colors.WHITE),
+                    bgcolor=ft.Colors.GREEN_ACCENT_400))
 
             except Exception as e:
                 if hasattr(self, "input_card"):
@@ -419,7 +506,7 @@ class AllLibraries(ft.Column):
                 ft.TextField(
                     ref=save_file_download_path_text_field_ref,
                     label="Download Path",
-                    value=str(self.DOWNLOAD_PATH),
+                    value=str(self.DOWNLOAD_PATH or Path.home() / "Downloads"),
                     border_color=ft.Colors.PRIMARY,
                 ),
             ],
@@ -432,7 +519,8 @@ class AllLibraries(ft.Column):
                     style=ft.ButtonStyle(
                         bgcolor=ft.Colors.PRIMARY,
                         color=ft.Colors.ON_PRIMARY),
-                    on_click=lambda e: download_save_file(
+                    on_click=lambda e: self.current_page.run_task(
+                        download_save_file,
                         library_name=name,
                         savefile_name=save_file_name_text_field_ref.current.value,
                         description=save_file_description_text_field_ref.current.value,
@@ -449,7 +537,8 @@ class AllLibraries(ft.Column):
     async def _go_to_settings(self):
         self.current_page.update()
         from content.settings import Settings
-        await self.content_manager(Settings(self.current_page, self.content_manager))
+        await self.content_manager(kept_view(
+            self.current_page, "settings", lambda: Settings(self.current_page, self.content_manager)))
 
     async def _show_syncing_state(self):
         self.progress_bar_container.visible = True
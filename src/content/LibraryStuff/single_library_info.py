@@ -1,13 +1,70 @@
-import os
+import asyncio
 import json
-from datetime import datetime
+import time
 from pathlib import Path
 from content.HelperStuff.nav_util import TopNav
+from content.HelperStuff.view_cache import kept_view
 import flet as ft
-from dotenv import load_dotenv
 
-from content.functions import load_decrypted_credentials, get_or_generate_key
-from iLibrary import Library
+from content.credentials import credential_store
+from content.ibmi_executor import ibmi_executor
+from content.timestamps import format_timestamp
+from content.config import FILE_INFO_PAGE_SIZE
+from content.detail_cache import detail_cache, age_text, LIBRARY_INFO
+from content.preferences import preferences
+
+# getFileInfo columns shown as formatted dates
+TIMESTAMP_KEYS = ("OBJCREATED",
+                  "LAST_USED_TIMESTAMP",
+                  "LAST_RESET_TIMESTAMP",
+                  "CHANGE_TIMESTAMP",
+                  "SOURCE_TIMESTAMP",
+                  "SAVE_TIMESTAMP",
+                  "RESTORE_TIMESTAMP",
+                  "SAVE_WHILE_ACTIVE_TIMESTAMP",
+                  "JOURNAL_START_TIMESTAMP")
+
+
+def object_panel(item: dict) -> ft.ExpansionPanel:
+    """
+    Collapsed panel of one getFileInfo row. Only the header is built here, the
+    attribute table is added by object_table() when the panel is expanded.
+    """
+    return ft.ExpansionPanel(
+        header=ft.ListTile(
+            title=ft.Text(item.get("OBJNAME", "Unknown"), weight=ft.FontWeight.BOLD)),
+        can_tap_header=True,
+        bgcolor=ft.Colors.TRANSPARENT,
+        content=ft.Container(padding=10),
+        data=item,
+    )
+
+
+def object_table(item: dict) -> ft.DataTable:
+    """Attribute table of one getFileInfo row, empty values left out."""
+    content_column = ft.DataTable(
+        columns=[ft.DataColumn(label=ft.Text()),
+                 ft.DataColumn(label=ft.Text())],
+        rows=[],
+        width=1000,
+    )
+    for key, value in item.items():
+        if not value or value == "None" or key == "OBJNAME":
+            continue
+        if key in TIMESTAMP_KEYS:
+            # Memoized, the same timestamps repeat across objects and reloads
+            value = format_timestamp(value)
+
+        content_column.rows.append(
+            ft.DataRow(
+                cells=[
+                    ft.DataCell(ft.Text(f"{key.replace('_', ' ').title()}: ", weight=ft.FontWeight.BOLD, size=15)),
+                    ft.DataCell(ft.Text(value=str(value))),
+                ],
+            ),
+        )
+    return content_column
+
 
 #Information about Library: <NAME>
 class Info(ft.Column):
@@ -33,6 +90,29 @@ class Info(ft.Column):
 
         self.list_container = ft.Column()
         self.input_card = self.list_container
+        # Objects of the library, one page at a time (see _load_objects_page)
+        self.panel_list = ft.ExpansionPanelList(
+            expand_icon_color=ft.Colors.PRIMARY,
+            elevation=0,
+            divider_color=ft.Colors.PRIMARY,
+            controls=[],
+            on_change=self._on_panel_change,
+        )
+        self.more_button = ft.TextButton(
+            "Show more", visible=False, on_click=lambda e: self.current_page.run_task(self._load_objects_page))
+        # Why the last "Show more" / scroll load failed, shown below the panels
+        self.load_error = ft.Text(color=ft.Colors.ERROR, visible=False)
+        self.objects_shown = 0
+        self.objects_total = 0
+        # Parts of the card filled by _show_library_info / _show_objects
+        self.info_slot = ft.Column(horizontal_alignment=ft.CrossAxisAlignment.CENTER)
+        self.objects_slot = ft.Column(horizontal_alignment=ft.CrossAxisAlignment.CENTER)
+        # Age of the shown details: part ("info", "objects") -> fetched_at, parts being fetched again
+        self.age_text = ft.Text(size=12, italic=True, visible=False)
+        self.fetched_at = {}
+        self.refreshing = set()
+        self.offline = False
+        self._page_lock = asyncio.Lock()
         self.current_page.run_task(self._create_app_bar)
         self.progress_bar = ft.ProgressRing()
         self.progress_bar_container = ft.Container(self.progress_bar, alignment=ft.Alignment.CENTER)
@@ -46,7 +126,6 @@ class Info(ft.Column):
         self.progress_bar.visible = True
         self.progress_bar_container.visible = True
         self.current_page.update()
-        self.lib.conn.close()
 
     async def _create_app_bar(self):
         await TopNav.top_nav(page=self.current_page, title=f"Library Info: {self.library}")
@@ -55,9 +134,9 @@ class Info(ft.Column):
     async def _go_back(self):
         try:
             from content.LibraryStuff.all_libraries import AllLibraries
-            await self.content_manager(AllLibraries(
-                self.current_page,
-                content_manager=self.content_manager))
+            await self.content_manager(kept_view(
+                self.current_page, "libraries",
+                lambda: AllLibraries(self.current_page, content_manager=self.content_manager)))
         except Exception as e:
             self.current_page.show_dialog(ft.SnackBar(
                 content=ft.Text(
@@ -66,14 +145,10 @@ class Info(ft.Column):
                 bgcolor=ft.Colors.RED_ACCENT_400)
             )
     async def async_init(self):
-        self.ENCRYPTION_KEY_STR = get_or_generate_key(self.env_file_path)
-        load_dotenv(self.env_file_path, override=True)
+        self.ENCRYPTION_KEY_STR = credential_store.get_key()
 
-        if os.getenv("ENCRYPTED_DB_CREDENTIALS"):
-            self.db_credentials = load_decrypted_credentials(
-                key=self.ENCRYPTION_KEY_STR,
-                env_file_path=self.env_file_path,
-            )
+        if credential_store.has_encrypted_credentials():
+            self.db_credentials = credential_store.get_credentials()
 
             if self.db_credentials:
                 self.DB_DRIVER = self.db_credentials["driver"]
@@ -97,246 +172,333 @@ class Info(ft.Column):
         self.update()
 
     async def _get_info_about_library(self):
+        # 1. Clear previous results and show the card right away, both parts still loading
+        self.input_card.controls.clear()
+        self.panel_list.controls.clear()
+        self.objects_shown = self.objects_total = 0
+        self.more_button.visible = False
+        self.load_error.visible = False
+        self.fetched_at.clear()
+        self.refreshing.clear()
+        self.offline = False
+        self.age_text.visible = False
+        self.info_slot.controls = [ft.ProgressRing()]
+        self.objects_slot.controls = [ft.ProgressRing()]
+        self.input_card.controls.append(self._header_section())
+        self.progress_bar.visible = False
+        self.progress_bar_container.visible = False
+        self.update()
+
+        # 2. Both requests run at the same time, each part is shown as soon as its own call returns
+        #    (or right away from the detail cache, fetched again in the background when stale)
+        await asyncio.gather(self._show_library_info(), self._show_objects())
+
+    def _set_age(self, part: str, fetched_at: float, refreshing: bool = False, offline: bool = False):
+        """Updates the age indicator of the card, which shows the oldest part."""
+        self.fetched_at[part] = fetched_at
+        if refreshing:
+            self.refreshing.add(part)
+        else:
+            self.refreshing.discard(part)
+        self.offline = self.offline or offline
+        self.age_text.value = age_text(min(self.fetched_at.values()), bool(self.refreshing), self.offline)
+        self.age_text.visible = True
+
+    async def _show_library_info(self):
+        """Fills the library attributes (size, owner, ...) into the card."""
+        cached = await detail_cache.get(LIBRARY_INFO, self.db_credentials, self.library)
+        if cached is not None:
+            self._render_library_info(cached["value"])
+            stale = detail_cache.is_stale(cached)
+            self._set_age("info", cached["fetched_at"], refreshing=stale)
+            self.update()
+            if not stale:
+                return
+
         try:
-            # 1. Clear previous results and show progress
-            self.input_card.controls.clear()
-            self.progress_bar.visible = True
-            self.progress_bar_container.visible = True
+            # Fetch data (off the event loop)
+            result = await ibmi_executor.get_library_info(self.db_credentials, self.library)
+            result = json.loads(result)
+            library_info_data = result['data']
+        except Exception as e:
+            if cached is None:
+                self._show_info_error(e)
+            else:
+                # Server unreachable, keep showing the cached attributes
+                self._set_age("info", cached["fetched_at"], offline=True)
+            self.update()
+            return
+        if cached is not None and not (result.get("success") and library_info_data):
+            # Error envelope (iLibrary reports driver errors this way), keep the cached attributes
+            self._set_age("info", cached["fetched_at"], offline=True)
             self.update()
+            return
 
-            with Library(self.DB_USER, self.DB_PASSWORD, self.DB_SYSTEM, self.DB_DRIVER) as self.lib:
-                # Fetch data
-                result = self.lib.getLibraryInfo(library=self.library)
-                qFiles = self.lib.getFileInfo(library=self.library, qFiles=False)
-
-                data = json.loads(qFiles)
-                data = data["data"]
-                result = json.loads(result)
-                library_info_data = result['data']
-
-                # --- UI CONSTRUCTION ---
-                result_text = ft.DataTable(
-                    columns=[ft.DataColumn(label=ft.Text()),
-                            ft.DataColumn(label=ft.Text())],
-                    rows=[],
-                    width=1000,
-                    )
-                panel_list = ft.ExpansionPanelList(
-                    expand_icon_color=ft.Colors.PRIMARY,
-                    elevation=0,
-                    divider_color=ft.Colors.PRIMARY,
-                    controls=[],
+        try:
+            self._render_library_info(library_info_data)
+        except Exception as e:
+            self._show_info_error(e)
+        else:
+            self._set_age("info", time.time())
+            if result.get("success"):
+                await detail_cache.put(LIBRARY_INFO, self.db_credentials, self.library, library_info_data)
+        self.update()
+
+    def _render_library_info(self, library_info_data):
+        result_text = ft.DataTable(
+            columns=[ft.DataColumn(label=ft.Text()),
+                    ft.DataColumn(label=ft.Text())],
+            rows=[],
+            width=1000,
+            )
+
+        # Process Library Info
+        # Ensure library_info_data is a dict (if it was a list, take the first item)
+        info_dict = library_info_data[0] if isinstance(library_info_data, list) else library_info_data
+
+        for key, value in info_dict.items():
+            if key == "LIBRARY_SIZE" and value:
+                try:
+                    mb = float(value) / 1000000
+                    value = f"{round(mb, 2)} Mb"
+                except:
+                    pass
+
+            if value is not None:
+                result_text.rows.append(
+                    ft.DataRow(
+                        cells=[
+                            ft.DataCell(ft.Text(f"{key.replace('_', ' ').title()}: ", weight=ft.FontWeight.BOLD,
+                                                size=15)),
+                            ft.DataCell(ft.Text(value=str(value))),
+                        ],
+                    ),
                 )
+        self.info_slot.controls = [result_text]
+
+    def _show_info_error(self, e: Exception):
+        # Display the full error for debugging
+        self.info_slot.controls = [
+            ft.Container(
+                padding=20,
+                content=ft.Column([
+                    ft.Text("Connection or Data Error", weight=ft.FontWeight.BOLD, color="red"),
+                    ft.Text(f"Details: {str(e)}", size=12)
+                ])
+            )
+        ]
 
-                # Process File Info
-                for item in data:
-                    if "error" in item:
-                        self.current_page.show_dialog(ft.SnackBar(
-                            content=ft.Text(f"Notice: {item['error']}", color=ft.Colors.WHITE),
-                            bgcolor=ft.Colors.RED_ACCENT_400
-                        ))
-                        # If it's a real error, show the raw output for debugging in the build
-                        if "raw" in item:
-                            panel_list.controls.append(ft.ExpansionPanel(
-                                header=ft.ListTile(title=ft.Text("Raw Debug Data")),
-                                content=ft.Container(content=ft.Text(item["raw"]))
-                            ))
-                        continue
-
-                    content_column = ft.DataTable(
-                    columns=[ft.DataColumn(label=ft.Text()),
-                            ft.DataColumn(label=ft.Text())],
-                    rows=[],
-                    width=1000,
-                    )
-                    for key, value in item.items():
-                        if not value or value == "None" or key == "OBJNAME":
-                            continue
-                        if key in ["OBJCREATED",
-                                   "LAST_USED_TIMESTAMP",
-                                   "LAST_RESET_TIMESTAMP",
-                                   "CHANGE_TIMESTAMP",
-                                   "SOURCE_TIMESTAMP",
-                                   "SAVE_TIMESTAMP",
-                                   "RESTORE_TIMESTAMP",
-                                   "SAVE_WHILE_ACTIVE_TIMESTAMP",
-                                   "JOURNAL_START_TIMESTAMP"]:
-                            try:
-                                dt_object = datetime.strptime(value, "%Y-%m-%d %H:%M:%S")
-                                value = dt_object.strftime("%A, %b %d, %Y")
-                            except (ValueError, TypeError):
-                                value = None
-
-                        content_column.rows.append(
-                            ft.DataRow(
-                                cells=[
-                                    ft.DataCell(ft.Text(f"{key.replace('_', ' ').title()}: ", weight=ft.FontWeight.BOLD, size=15)),
-                                    ft.DataCell(ft.Text(value=str(value))),
-                                ],
-                            ),
-                        )
+    async def _show_objects(self):
+        """Fills the first page of objects into the card, the rest follows on scroll / "Show more"."""
+        # Waits for a load still running from before instead of skipping the first page
+        objects_error = await self._load_objects_page(update=False, wait=True)
+        self.objects_slot.controls = [objects_error] if objects_error else [self.panel_list, self.load_error]
+        self.update()
+        if objects_error is None and "objects" in self.refreshing:
+            await self._revalidate_objects()
 
-                    panel_list.controls.append(
-                        ft.ExpansionPanel(
-                            header=ft.ListTile(
-                                title=ft.Text(item.get("OBJNAME", "Unknown"), weight=ft.FontWeight.BOLD)),
-                            can_tap_header=True,
-                            bgcolor=ft.Colors.TRANSPARENT,
-                            content=ft.Container(content=content_column, padding=10)
-                        )
-                    )
+    async def _revalidate_objects(self):
+        """Fetches the objects again after stale ones were shown, the panels are rebuilt if they changed."""
+        async with self._page_lock:
+            try:
+                page = await ibmi_executor.get_file_info_page(
+                    self.db_credentials, self.library, offset=0,
+                    limit=max(self.objects_shown, FILE_INFO_PAGE_SIZE), refresh=True)
+            except Exception:
+                # Server unreachable or an error envelope (iLibrary reports driver errors
+                # this way), keep showing the cached objects
+                self._set_age("objects", self.fetched_at["objects"], offline=True)
+            else:
+                shown = [panel.data for panel in self.panel_list.controls]
+                if page["total"] != self.objects_total or page["rows"] != shown:
+                    self.panel_list.controls.clear()
+                    self.objects_shown = 0
+                    self._append_objects(page)
+                else:
+                    self._set_age("objects", page["fetched_at"])
+        self.update()
 
-                # Process Library Info
-                # Ensure library_info_data is a dict (if it was a list, take the first item)
-                info_dict = library_info_data[0] if isinstance(library_info_data, list) else library_info_data
-
-                for key, value in info_dict.items():
-                    if key == "LIBRARY_SIZE" and value:
-                        try:
-                            mb = float(value) / 1000000
-                            value = f"{round(mb, 2)} Mb"
-                        except:
-                            pass
-
-                    if value is not None:
-                        result_text.rows.append(
-                            ft.DataRow(
-                                cells=[
-                                    ft.DataCell(ft.Text(f"{key.replace('_', ' ').title()}: ", weight=ft.FontWeight.BOLD,
-                                                        size=15)),
-                                    ft.DataCell(ft.Text(value=str(value))),
-                                ],
+    def _header_section(self) -> ft.Container:
+        """The library card, with info_slot and objects_slot filled in later."""
+        # --- ICON AND LAYOUT SECTION ---
+        img_icon = ft.Container(
+            # Arranges icon and layout elements in a stack
+            content=ft.Stack(
+                controls=[
+                    ft.Container(
+                        padding=ft.Padding.only(top=75),
+                        content=ft.Card(
+                            elevation=10,
+                            content=ft.Container(
+                                padding=ft.Padding.all(25),
+                                content=ft.Column(
+                                    horizontal_alignment=ft.CrossAxisAlignment.CENTER,
+                                    controls=[
+                                        ft.Container(height=40),
+                                        ft.Text(f"Library {self.library.upper()}", size=20,
+                                                weight=ft.FontWeight.BOLD),
+                                        ft.Text(f"Viewing details for {self.library}",
+                                                text_align=ft.TextAlign.CENTER),
+                                        self.age_text,
+                                        ft.Container(height=10),
+                                        self.info_slot,
+                                        ft.Container(height=10),
+                                        ft.Text("Files", size=18, weight=ft.FontWeight.BOLD,
+                                                style=ft.TextStyle(decoration=ft.TextDecoration.UNDERLINE)),
+                                        self.objects_slot,
+                                        self.more_button,
+                                    ],
+                                ),
                             ),
-                        )
-
-                # --- ICON AND LAYOUT SECTION ---
-                img_icon = ft.Container(
-                    # Arranges icon and layout elements in a stack
-                    content=ft.Stack(
+                        ),
+                    ),
+                    ft.Row(
                         controls=[
                             ft.Container(
-                                padding=ft.Padding.only(top=75),
-                                content=ft.Card(
-                                    elevation=10,
-                                    content=ft.Container(
-                                        padding=ft.Padding.all(25),
-                                        content=ft.Column(
-                                            horizontal_alignment=ft.CrossAxisAlignment.CENTER,
-                                            controls=[
-                                                ft.Container(height=40),
-                                                ft.Text(f"Library {self.library.upper()}", size=20,
-                                                        weight=ft.FontWeight.BOLD),
-                                                ft.Text(f"Viewing details for {self.library}",
-                                                        text_align=ft.TextAlign.CENTER),
-                                                ft.Container(height=10),
-                                                result_text,
-                                                ft.Container(height=10),
-                                                ft.Text("Files", size=18, weight=ft.FontWeight.BOLD,
-                                                        style=ft.TextStyle(decoration=ft.TextDecoration.UNDERLINE)),
-                                                panel_list
-                                            ],
-                                        ),
-                                    ),
+                                padding=ft.Padding.only(top=30),
+                                content=ft.IconButton(
+                                    icon=ft.Icons.DOWNLOAD,
+                                    icon_color=ft.Colors.TRANSPARENT,
                                 ),
                             ),
-                            ft.Row(
-                                controls=[
-                                    ft.Container(
-                                        padding=ft.Padding.only(top=30),
-                                        content=ft.IconButton(
-                                            icon=ft.Icons.DOWNLOAD,
-                                            icon_color=ft.Colors.TRANSPARENT,
-                                        ),
-                                    ),
-                                    ft.Container(
-                                        width=130, height=130,
-                                        bgcolor=ft.Colors.PRIMARY,
-                                        shape=ft.BoxShape.CIRCLE,
-                                        alignment=ft.Alignment.CENTER,
-                                        shadow=ft.BoxShadow(blur_radius=8, color=ft.Colors.PRIMARY),
-                                        content=ft.Text(self.library[0:2].upper(), color=ft.Colors.ON_PRIMARY,
-                                                        weight=ft.FontWeight.BOLD, size=40),
-                                    ),
-                                    ft.Container(
-                                        padding=ft.Padding.only(top=30),
-                                        content=ft.IconButton(
-                                            bgcolor=ft.Colors.PRIMARY, icon_color=ft.Colors.ON_PRIMARY, icon=ft.Icons.DOWNLOAD,
-                                            on_click=lambda e: self.current_page.run_task(self._get_single_savefile,
-                                                                                  self.library)
-                                        ),
-                                    )
-                                ],
-                                alignment=ft.MainAxisAlignment.SPACE_AROUND,
+                            ft.Container(
+                                width=130, height=130,
+                                bgcolor=ft.Colors.PRIMARY,
+                                shape=ft.BoxShape.CIRCLE,
+                                alignment=ft.Alignment.CENTER,
+                                shadow=ft.BoxShadow(blur_radius=8, color=ft.Colors.PRIMARY),
+                                content=ft.Text(self.library[0:2].upper(), color=ft.Colors.ON_PRIMARY,
+                                                weight=ft.FontWeight.BOLD, size=40),
                             ),
-                        ]
-                    )
-                )
-
-                header_section = ft.Container(
-                    content=ft.Column(horizontal_alignment=ft.CrossAxisAlignment.CENTER, controls=[img_icon]),
-                    alignment=ft.Alignment.TOP_CENTER,
-                    padding=ft.Padding.only(top=40),
-                )
-
-                self.input_card.controls.append(header_section)
-
-        except Exception as e:
-            self.input_card.controls.clear()
-            # Display the full error for debugging
-            self.input_card.controls.append(
-                ft.Container(
-                    padding=20,
-                    content=ft.Column([
-                        ft.Text("Connection or Data Error", weight=ft.FontWeight.BOLD, color="red"),
-                        ft.Text(f"Details: {str(e)}", size=12)
-                    ])
-                )
+                            ft.Container(
+                                padding=ft.Padding.only(top=30),
+                                content=ft.IconButton(
+                                    bgcolor=ft.Colors.PRIMARY, icon_color=ft.Colors.ON_PRIMARY, icon=ft.Icons.DOWNLOAD,
+                                    on_click=lambda e: self.current_page.run_task(self._get_single_savefile,
+                                                                          self.library)
+                                ),
+                            )
+                        ],
+                        alignment=ft.MainAxisAlignment.SPACE_AROUND,
+                    ),
+                ]
             )
+        )
+
+        return ft.Container(
+            content=ft.Column(horizontal_alignment=ft.CrossAxisAlignment.CENTER, controls=[img_icon]),
+            alignment=ft.Alignment.TOP_CENTER,
+            padding=ft.Padding.only(top=40),
+        )
 
-        finally:
-            self.progress_bar.visible = False
-            self.progress_bar_container.visible = False
+    async def _load_objects_page(self, refresh: bool = False, update: bool = True, wait: bool = False):
+        """
+        Appends the next FILE_INFO_PAGE_SIZE objects as collapsed panels.
+        Returns a Text with the error instead of the list when the first page fails;
+        later failures are shown below the panels and "Show more" stays usable.
+        While a page loads further calls (scroll events, "Show more") do nothing,
+        unless wait is set, then they load the page after it.
+        """
+        if self._page_lock.locked() and not wait:
+            return None
+        async with self._page_lock:
+            try:
+                page = await ibmi_executor.get_file_info_page(
+                    self.db_credentials, self.library, offset=self.objects_shown,
+                    limit=FILE_INFO_PAGE_SIZE, refresh=refresh)
+            except Exception as e:
+                # RuntimeError for error envelopes (e.g. a library without objects),
+                # anything else from the connection (pyodbc, pool, network)
+                if not self.objects_shown:
+                    return ft.Text(str(e) if isinstance(e, RuntimeError) else f"Details: {e}", size=12)
+                self.load_error.value = f"Could not load more objects: {e}"
+                self.load_error.visible = True
+            else:
+                self.load_error.visible = False
+                self._append_objects(page)
+        if update:
             self.update()
+        return None
+
+    def _append_objects(self, page: dict):
+        """Adds the rows of a get_file_info_page() result as collapsed panels."""
+        if not self.objects_shown:
+            # The first page tells how old the objects are, stale ones are fetched again by _show_objects
+            self._set_age("objects", page["fetched_at"], refreshing=detail_cache.is_stale(page))
+        for item in page["rows"]:
+            if "error" in item:
+                self.current_page.show_dialog(ft.SnackBar(
+                    content=ft.Text(f"Notice: {item['error']}", color=ft.Colors.WHITE),
+                    bgcolor=ft.Colors.RED_ACCENT_400
+                ))
+                # If it's a real error, show the raw output for debugging in the build
+                if "raw" in item:
+                    self.panel_list.controls.append(ft.ExpansionPanel(
+                        header=ft.ListTile(title=ft.Text("Raw Debug Data")),
+                        content=ft.Container(content=ft.Text(item["raw"]))
+                    ))
+                continue
+            self.panel_list.controls.append(object_panel(item))
+
+        self.objects_shown += len(page["rows"])
+        self.objects_total = page["total"]
+        self.more_button.visible = self.objects_shown < self.objects_total
+        self.more_button.content = f"Show more ({self.objects_shown} of {self.objects_total})"
+
+    def _on_panel_change(self, e: ft.ExpansionPanelListChangeEvent):
+        """Builds the attribute table of a panel the first time it is expanded."""
+        if not e.expanded:
+            return
+        panel = self.panel_list.controls[e.index]
+        if panel.data is not None and panel.content.content is None:
+            panel.content.content = object_table(panel.data)
+            panel.update()
+
+    async def handle_page_scroll(self, e: ft.OnScrollEvent):
+        """Called by main.py for scroll events of the page content, loads the next objects."""
+        # Roughly a dozen collapsed headers before the end
+        if self.objects_shown < self.objects_total and e.pixels >= e.max_scroll_extent - 1000:
+            await self._load_objects_page()
 
     async def _get_single_savefile(self, name: str):
         """Get the Single Savefile of a Library """
 
-        def download_save_file(library_name: str, savefile_name: str, description: str, version: str, authority: str,
+        async def download_save_file(library_name: str, savefile_name: str, description: str, version: str, authority: str,
                                download_path: str):
             try:
                 self.current_page.pop_dialog()
                 data = None
-                with Library(self.DB_USER, self.DB_PASSWORD, self.DB_SYSTEM, self.DB_DRIVER) as lib:
-                    try:
-                        data = lib.saveLibrary(
-                            library=library_name,
-                            saveFileName=savefile_name,
-                            description=description,
-                            localPath=download_path,
-                            remPath=f'/home/{self.DB_USER.upper()}/',
-                            authority=authority,
-                            version=version,
-                            getZip=True,
-                            port=self.DB_PORT
-                        )
+                try:
+                    data = await ibmi_executor.save_library(
+                        self.db_credentials,
+                        library=library_name,
+                        saveFileName=savefile_name,
+                        description=description,
+                        localPath=download_path,
+                        remPath=f'/home/{self.DB_USER.upper()}/',
+                        authority=authority,
+                        version=version,
+                        getZip=True,
+                        port=self.DB_PORT
+                    )
 
-                        self.current_page.run_task(ft.SharedPreferences().set, 'download_path', download_path)
-                        data = json.loads(data)
+                    preferences(self.current_page).set('download_path', download_path)
+                    data = json.loads(data)
 
-                        if data['code'] != 200:
-                            raise Exception(data['error']['details'])
+                    if data['code'] != 200:
+                        raise Exception(data['error']['details'])
 
-                    except Exception as e:
-                        self.current_page.show_dialog(ft.SnackBar(
-                            content=ft.Text(f"Failed: {e}", color=ft.Colors.WHITE),
-                            bgcolor=ft.Colors.RED_ACCENT_400))
-                        return
+                except Exception as e:
+                    self.current_page.show_dialog(ft.SnackBar(
+                        content=ft.Text(f"Failed: {e}", color=ft.Colors.WHITE),
+                        bgcolor=ft.Colors.RED_ACCENT_400))
+                    return
 
-                    message = data["message"]
+                message = data["message"]
 
-                    self.current_page.show_dialog(ft.SnackBar(
-                        content=ft.Text(f"{message}", color=ft.Colors.WHITE),
-                        bgcolor=ft.Colors.GREEN_ACCENT_400))
+                self.current_page.show_dialog(ft.SnackBar(
+                    content=ft.Text(f"{message}", color=ft.Colors.WHITE),
+                    bgcolor=ft.Colors.GREEN_ACCENT_400))
 
             except Exception as e:
                 if hasattr(self, "input_card"):
@@ -415,7 +577,8 @@ class Info(ft.Column):
                     style=ft.ButtonStyle(
                         bgcolor=ft.Colors.PRIMARY,
                         color=ft.Colors.ON_PRIMARY),
-                    on_click=lambda e: download_save_file(
+                    on_click=lambda e: self.current_page.run_task(
+                        download_save_file,
                         library_name=name,
                         savefile_name=save_file_name_text_field_ref.current.value,
                         description=save_file_description_text_field_ref.current.value,
@@ -1,14 +1,19 @@
+import asyncio
 import sqlite3
-from datetime import datetime
-import os
 import json
 from pathlib import Path
 import flet as ft
-from dotenv import load_dotenv, set_key
 from content.HelperStuff.nav_util import TopNav
-from cryptography.fernet import Fernet
-from content.functions import load_decrypted_credentials, get_or_generate_key
-from iLibrary import User
+from content.HelperStuff.view_cache import kept_view
+from content.HelperStuff.live_list import LiveList
+from content.HelperStuff.typeahead import TypeaheadSearch
+from content.HelperStuff.prefix_index import PrefixIndex
+from content import search_index
+from content.db_manager import db_mgr
+from content.preferences import preferences
+from content.config import LIST_TILE_HEIGHT, PREFIX_INDEX
+from content.credentials import credential_store
+from content.ibmi_executor import ibmi_executor
 
 
 class AllUsers(ft.Column):
@@ -29,12 +34,40 @@ class AllUsers(ft.Column):
         self.DB_USER = None
         self.DB_PASSWORD = None
         self.DB_SYSTEM = None
+        # Read from SharedPreferences after the first render
+        self.DOWNLOAD_PATH = None
 
         self.path_to_DB = Path(__file__).parent.parent / ".auth"
         self.path_to_DB_file = self.path_to_DB / "libraries_metadata.db"
 
         self.list_container = ft.Column()
         self.input_card = self.list_container
+        # Applies sync notifications to the tiles of the changed users only
+        self.live_list = LiveList(
+            page=self.current_page,
+            container=self.list_container,
+            db=db_mgr,
+            table_name="USER_METADATA",
+            key_column="AUTHORIZATION_NAME",
+            # Formatted at sync time, the raw value if it could not be parsed
+            columns=("AUTHORIZATION_NAME", "COALESCE(CREATION_TIMESTAMP_DISPLAY, CREATION_TIMESTAMP)",
+                     "TEXT_DESCRIPTION"),
+            build_tile=self._build_user_tile,
+            on_update=self._show_list,
+        )
+        # Answers name prefixes without a database round trip
+        self.prefix_index = PrefixIndex(
+            page=self.current_page,
+            db=db_mgr,
+            table_name="USER_METADATA",
+            key_column="AUTHORIZATION_NAME",
+        ) if PREFIX_INDEX else None
+        self.search = TypeaheadSearch(
+            db=db_mgr,
+            query=self._query_users,
+            render=self._render_suggestions,
+            instant=self._prefix_suggestions if PREFIX_INDEX else None,
+        )
         self.progress_bar = ft.Container(
                 bgcolor=ft.Colors.PRIMARY_CONTAINER,
                 border_radius=8,
@@ -46,9 +79,53 @@ class AllUsers(ft.Column):
             )
         self.progress_bar_container = ft.Container(self.progress_bar, alignment=ft.Alignment.TOP_CENTER)
         self.controls.append(self.progress_bar_container)
+        self._shown = False
 
         # Start initialization
-        self.current_page.run_task(self.async_init)
+        self._init = self.current_page.run_task(self.async_init)
+
+    def did_mount(self):
+        self.live_list.subscribe()
+        if self.prefix_index:
+            self.prefix_index.subscribe()
+        if self._shown:
+            # Shown again by the view cache, the tiles are still there
+            self.current_page.run_task(self._reshow)
+        self._shown = True
+
+    async def handle_page_scroll(self, e: ft.OnScrollEvent):
+        """Called by main.py for scroll events of the page content, loads more tiles."""
+        await self.live_list.handle_scroll(e)
+
+    def will_unmount(self):
+        # Kept alive by the view cache, the search thread stays until close()
+        self.live_list.unsubscribe()
+        if self.prefix_index:
+            self.prefix_index.unsubscribe()
+
+    def close(self):
+        """Called by ViewCache when the view is dropped."""
+        # Not shown anymore, it must not keep loading or listening to syncs
+        self._init.cancel()
+        self.live_list.unsubscribe()
+        if self.prefix_index:
+            self.prefix_index.unsubscribe()
+        self.search.close()
+
+    async def _reshow(self):
+        """Catches up with the syncs missed while another view was shown."""
+        if not self.live_list.loaded:
+            if self._init.done():
+                # Nothing to show when the view was built, start over
+                self.controls[:] = [self.progress_bar_container]
+                self.progress_bar_container.visible = True
+                self.list_container.controls.clear()
+                self._init = self.current_page.run_task(self.async_init)
+            return
+        await self._create_app_bar()
+        await self.live_list.catch_up()
+        if self.prefix_index:
+            await self.prefix_index.catch_up()
 
     def __exit__(self, exc_type, exc_val, exc_tb):
         self.progress_bar.visible = True
@@ -60,43 +137,16 @@ class AllUsers(ft.Column):
 
     async def async_init(self):
         #self.current_page.run_task(self._load_server_status)
-        await self._create_app_bar()
-
+        # The tiles come from the local database first, everything that waits
+        # for SharedPreferences follows once they are on screen
 
         def open_searchbar(e):
             self.current_page.run_task(self.searchbar.open_view)
 
-        def handle_change(e):
-            # 2. Use self.user_list (the sanitized version)
-            query = e.data.upper()
-
-            # 3. Defensive check: ensure user is treated as a string during filter
-            DBConnect = sqlite3.connect(self.path_to_DB_file)
-            cursor = DBConnect.cursor()
-            data_lib = cursor.execute("SELECT AUTHORIZATION_NAME FROM USER_METADATA WHERE AUTHORIZATION_NAME LIKE ? LIMIT 50", (f"%{query}%",))
-            raw_data = data_lib.fetchall()
-            lv.controls.clear()
-            for i in raw_data:
-                lv.controls.append(
-                    ft.ListTile(
-                        title=ft.Text(f"{i[0]}"),
-                        on_click=lambda e, name=i[0]: self.current_page.run_task(
-                            self._show_single_user_info, name
-                        ),
-                        data=i
-                    )
-                )
-            self.searchbar.update()
-
-        lv = ft.ListView()
+        lv = self.lv = ft.ListView()
         #Fetch First 10 Users
-        with sqlite3.connect(self.path_to_DB_file, timeout=10) as conn:
-            cursor = conn.cursor()
-
-            # 3. Fetch data
-            cursor.execute("SELECT AUTHORIZATION_NAME FROM USER_METADATA LIMIT 50")
-            data = cursor.fetchall()
-            cursor.close()
+        # Read on a worker thread, reader() may wait for a connection
+        data = await asyncio.to_thread(self._read_first_suggestions)
         for i in data:
             lv.controls.append(
                 ft.ListTile(
@@ -116,47 +166,61 @@ class AllUsers(ft.Column):
             divider_color=ft.Colors.ON_SECONDARY_CONTAINER,
             bar_hint_text="Search for User...",
             view_hint_text="Suggestions...",
-            on_change=handle_change,
+            on_change=self.search.on_change,
             on_tap=open_searchbar,
             controls=[lv],
             visible=False,
         )
 
-        if not await ft.SharedPreferences().contains_key('download_path'):
-            self.DOWNLOAD_PATH = Path.home() / "Downloads"
-            await ft.SharedPreferences().set('download_path', str(self.DOWNLOAD_PATH))
-        else:
-            self.DOWNLOAD_PATH = Path(await ft.SharedPreferences().get('download_path'))
+        # The credentials are only decrypted when a user action needs them
+        if credential_store.has_encrypted_credentials():
+            self.input_card.visible = True
+            self.list_container.visible = True
 
-        self.ENCRYPTION_KEY_STR = get_or_generate_key(self.env_file_path)
-        load_dotenv(self.env_file_path, override=True)
+            self.controls.append(self.searchbar)
+            if self.input_card not in self.controls:
+                self.controls.extend([self.input_card])
+            await self._rebuild_users()
+        else:
+            self._show_loading_status("No users found.\nWaiting for sync...")
 
-        if os.getenv("ENCRYPTED_DB_CREDENTIALS"):
-            self.db_credentials = load_decrypted_credentials(
-                key=self.ENCRYPTION_KEY_STR,
-                env_file_path=self.env_file_path,
-            )
+        await self._create_app_bar()
 
-            if self.db_credentials:
-                self.DB_DRIVER = self.db_credentials["driver"]
-                self.DB_USER = self.db_credentials["user"]
-                self.DB_PASSWORD = self.db_credentials["password"]
-                self.DB_SYSTEM = self.db_credentials["system"]
-                self.input_card.visible = True
-                self.list_container.visible = True
-
-                self.controls.append(self.searchbar)
-                if self.input_card not in self.controls:
-                    self.controls.extend([self.input_card])
-                await self._rebuild_users()
-            else:
-             pass
+        # Answered from memory once the preferences are loaded
+        prefs = preferences(self.current_page)
+        if not await prefs.contains_key('download_path'):
+            self.DOWNLOAD_PATH = Path.home() / "Downloads"
+            prefs.set('download_path', str(self.DOWNLOAD_PATH))
         else:
-            self._show_loading_status("No users found.\nWaiting for sync...")
-            return
+            self.DOWNLOAD_PATH = Path(await prefs.get('download_path'))
 
         self.update()
 
+    @staticmethod
+    def _query_users(conn, text):
+        """Runs on the search thread (see TypeaheadSearch). Ranked over name and description."""
+        return search_index.search(conn, "USER_METADATA", text)
+
+    def _prefix_suggestions(self, text):
+        """Names starting with text, straight from memory; [] until the index is loaded."""
+        if not self.prefix_index.loaded:
+            return []
+        return self.prefix_index.lookup(text, self.search.limit)
+
+    def _render_suggestions(self, text, raw_data):
+        self.lv.controls.clear()
+        for i in raw_data:
+            self.lv.controls.append(
+                ft.ListTile(
+                    title=ft.Text(f"{i[0]}"),
+                    on_click=lambda e, name=i[0]: self.current_page.run_task(
+                        self._show_single_user_info, name
+                    ),
+                    data=i
+                )
+            )
+        self.searchbar.update()
+
     async def _create_app_bar(self):
         """
             Creating the App Bar
@@ -164,6 +228,30 @@ class AllUsers(ft.Column):
         await TopNav.top_nav(self.current_page, title="All Users")
         self.current_page.update()
 
+    @staticmethod
+    def _read_first_suggestions():
+        with db_mgr.reader() as conn:
+            return conn.execute(
+                "SELECT AUTHORIZATION_NAME FROM USER_METADATA WHERE DELETED = 0 LIMIT 50"
+            ).fetchall()
+
+    def _read_list(self):
+        """
+        Runs on a worker thread: the prefix index keys and the first page of
+        the list, None while the table does not exist yet.
+        """
+        with db_mgr.reader() as conn:
+            cursor = conn.cursor()
+            # 2. Defensive Check: Does the table exist?
+            # This prevents crashing if the sync worker hasn't run yet.
+            cursor.execute(
+                "SELECT name FROM sqlite_master WHERE type='table' AND name='USER_METADATA'"
+            )
+            if not cursor.fetchone():
+                return None
+            keys = self.prefix_index.read(cursor) if self.prefix_index else None
+            return keys, self.live_list.read_first_page(cursor)
+
     async def _rebuild_users(self):
         """
         Safely rebuilds the list of users from the local SQLite database.
@@ -176,86 +264,73 @@ class AllUsers(ft.Column):
         self.list_container.controls.clear()
 
         try:
-            # Use a timeout in case the background worker is currently writing
-            with sqlite3.connect(self.path_to_DB_file, timeout=10) as conn:
-                cursor = conn.cursor()
-
-                # 2. Defensive Check: Does the table exist?
-                # This prevents crashing if the sync worker hasn't run yet.
-                cursor.execute(
-                    "SELECT name FROM sqlite_master WHERE type='table' AND name='USER_METADATA'"
-                )
-                if not cursor.fetchone():
-                    print("USER_METADATA table not found yet. Showing syncing state.")
-                    self._show_loading_status("Initializing users...")
-                    return
-
-                # 3. Fetch data
-                cursor.execute("SELECT AUTHORIZATION_NAME, CREATION_TIMESTAMP, TEXT_DESCRIPTION FROM USER_METADATA")
-                data = cursor.fetchall()
-
-                if not data:
-                    self._show_loading_status("No users found.\nWaiting for sync...")
-                    return
-
-                # 4. Loop through data and build UI
-                for item in data:
-                    username = str(item[0]).strip()
-                    timestamp_str = item[1]
-                    description = item[2]
-
-                    try:
-                        dt_object = datetime.strptime(timestamp_str, "%Y-%m-%d %H:%M:%S")
-                        formatted_str = dt_object.strftime("%A, %b %d, %Y")
-                    except:
-                        formatted_str = timestamp_str
-
-                    new_user_tile = ft.Container(
-                        content=ft.ListTile(
-                            leading=ft.CircleAvatar(
-                                content=ft.Text(username[0:2].upper()),
-                                bgcolor=ft.Colors.TERTIARY,
-                                color=ft.Colors.ON_TERTIARY
-                            ),
-                            title=ft.Text(username),
-                            subtitle=ft.Text(f"Description: {description} \nCreated: {formatted_str}"),
-                            is_three_line=True,
-                            bgcolor=ft.Colors.INVERSE_PRIMARY,
-                            on_click=lambda e, name=username: self.current_page.run_task(
-                                self._show_single_user_info, name
-                            ),
-                            trailing=ft.PopupMenuButton(
-                                icon=ft.Icons.MORE_VERT,
-                                items=[
-                                    ft.PopupMenuItem(
-                                        content=ft.Row([ft.Icon(ft.Icons.INFO_OUTLINE), ft.Text("Show Details")]),
-                                        on_click=lambda e, name=username: self.current_page.run_task(
-                                            self._show_single_user_info, name)
-                                    ),
-                                    ft.PopupMenuItem(
-                                        content=ft.Row([ft.Icon(ft.Icons.OUTGOING_MAIL), ft.Text("Send Message")]),
-                                        on_click=lambda e, name=username: self.current_page.run_task(
-                                            self._send_message_to_user, name)
-                                    ),
-                                ],
-                            ),
-                        ),
-                        border_radius=8,
-                    )
-                    self.list_container.controls.append(new_user_tile)
-
+            # WAL mode: reads the last committed state even while the background worker writes
+            read = await asyncio.to_thread(self._read_list)
         except sqlite3.OperationalError as e:
             print(f"Database access error: {e}")
             self._show_loading_status("Database Busy...\nPlease wait.")
             return
+        if read is None:
+            print("USER_METADATA table not found yet. Showing syncing state.")
+            self._show_loading_status("Initializing users...")
+            return
+
+        # 3. Build the tiles
+        keys, first_page = read
+        if self.prefix_index:
+            self.prefix_index.fill(*keys)
+        if not self.live_list.show_first_page(*first_page):
+            self._show_loading_status("No users found.\nWaiting for sync...")
+            return
 
         # 5. UI Updates
+        self._show_list()
+
+    def _show_list(self):
         self.input_card.visible = True
         self.list_container.visible = True
         self.progress_bar_container.visible = False
         self.searchbar.visible = True
         self.update()
 
+    def _build_user_tile(self, authorization_name, formatted_str, description):
+        username = str(authorization_name).strip()
+
+        return ft.Container(
+            content=ft.ListTile(
+                leading=ft.CircleAvatar(
+                    content=ft.Text(username[0:2].upper()),
+                    bgcolor=ft.Colors.TERTIARY,
+                    color=ft.Colors.ON_TERTIARY
+                ),
+                title=ft.Text(username),
+                subtitle=ft.Text(f"Description: {description} \nCreated: {formatted_str}"),
+                is_three_line=True,
+                bgcolor=ft.Colors.INVERSE_PRIMARY,
+                on_click=lambda e, name=username: self.current_page.run_task(
+                    self._show_single_user_info, name
+                ),
+                trailing=ft.PopupMenuButton(
+                    icon=ft.Icons.MORE_VERT,
+                    items=[
+                        ft.PopupMenuItem(
+                            content=ft.Row([ft.Icon(ft.Icons.INFO_OUTLINE), ft.Text("Show Details")]),
+                            on_click=lambda e, name=username: self.current_page.run_task(
+                                self._show_single_user_info, name)
+                        ),
+                        ft.PopupMenuItem(
+                            content=ft.Row([ft.Icon(ft.Icons.OUTGOING_MAIL), ft.Text("Send Message")]),
+                            on_click=lambda e, name=username: self.current_page.run_task(
+                                self._send_message_to_user, name)
+                        ),
+                    ],
+                ),
+            ),
+            border_radius=8,
+            # Fixed height so LiveList can replace scrolled out pages by a spacer
+            height=LIST_TILE_HEIGHT,
+        )
+
     def _show_loading_status(self, message):
         """Shows an error/empty message."""
         self.list_container.controls.append(
@@ -301,35 +376,29 @@ class AllUsers(ft.Column):
     # --------------------------------------------------------
 
     def encrypt_credentials(self, **credentials):
-        fernet = Fernet(self.ENCRYPTION_KEY_STR.encode())
-        token = fernet.encrypt(json.dumps(credentials).encode())
-
-        set_key(
-            dotenv_path=self.env_file_path,
-            key_to_set="ENCRYPTED_DB_CREDENTIALS",
-            value_to_set=token.decode(),
-        )
+        credential_store.save_credentials(**credentials)
 
 
     async def _send_message_to_user(self, username):
-        def send_msg(e):
+        async def send_msg(e):
             if message_textfield.value == '' or message_textfield.value is None:
                 message_textfield.helper = "Please enter a message"
                 self.current_page.update()
                 return
-            with User(self.DB_USER, self.DB_PASSWORD, self.DB_SYSTEM, self.DB_DRIVER) as msg:
-                data:str = msg.send_message_to_user(username=str(username) , message=message_textfield.value)
-                get_data = json.loads(data)
+            # Read now, the view may be older than the last change of the settings
+            data:str = await ibmi_executor.send_message_to_user(
+                credential_store.get_credentials(), username=str(username), message=message_textfield.value)
+            get_data = json.loads(data)
 
-                if get_data.get("success"):
-                    msg_feedback = ft.Text(f"{get_data.get('message')}")
-                    snack_bg_color = ft.Colors.GREEN_ACCENT_400
+            if get_data.get("success"):
+                msg_feedback = ft.Text(f"{get_data.get('message')}")
+                snack_bg_color = ft.Colors.GREEN_ACCENT_400
 
-                if get_data.get("error"):
-                    msg_feedback = ft.Text(f"Message sent was not successfully to {username}")
-                    snack_bg_color = ft.Colors.RED_ACCENT_400
-                self.current_page.pop_dialog()
-                self.current_page.show_dialog(ft.SnackBar(content=msg_feedback, bgcolor=snack_bg_color))
+            if get_data.get("error"):
+                msg_feedback = ft.Text(f"Message sent was not successfully to {username}")
+                snack_bg_color = ft.Colors.RED_ACCENT_400
+            self.current_page.pop_dialog()
+            self.current_page.show_dialog(ft.SnackBar(content=msg_feedback, bgcolor=snack_bg_color))
 
 
         message_textfield = ft.TextField(
@@ -337,7 +406,7 @@ class AllUsers(ft.Column):
             autofocus=True,
             border_color=ft.Colors.PRIMARY,
             multiline=True,
-            on_submit=send_msg,
+            on_submit=lambda e: self.current_page.run_task(send_msg, e),
             shift_enter=True,
             min_lines=1,
             max_lines=10,
@@ -346,7 +415,7 @@ class AllUsers(ft.Column):
         send_button = ft.TextButton(
             content=ft.Text("Send", color=ft.Colors.ON_PRIMARY),
             style=ft.ButtonStyle(bgcolor=ft.Colors.PRIMARY),
-            on_click = lambda e: send_msg(e),
+            on_click = lambda e: self.current_page.run_task(send_msg, e),
         )
         message_dialog = ft.AlertDialog(
             title=ft.Text(f"Send Message to User: {username}"),
@@ -358,4 +427,5 @@ class AllUsers(ft.Column):
     async def _go_to_settings(self):
         self.current_page.update()
         from content.settings import Settings
-        await self.content_manager(Settings(self.current_page, self.content_manager))
\ No newline at end of file
+        await self.content_manager(kept_view(
+            self.current_page, "settings", lambda: Settings(self.current_page, self.content_manager)))
\ No newline at end of file
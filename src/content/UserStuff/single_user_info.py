@@ -1,13 +1,14 @@
-import os
 import json
-from datetime import datetime
+import time
 from pathlib import Path
 from content.HelperStuff.nav_util import TopNav
+from content.HelperStuff.view_cache import kept_view
 import flet as ft
-from dotenv import load_dotenv
 
-from content.functions import load_decrypted_credentials, get_or_generate_key
-from iLibrary import User
+from content.credentials import credential_store
+from content.ibmi_executor import ibmi_executor
+from content.timestamps import format_timestamp
+from content.detail_cache import detail_cache, age_text, USER_INFO
 
 class SingleUserInfo(ft.Column):
 
@@ -30,6 +31,8 @@ class SingleUserInfo(ft.Column):
         self.DB_SYSTEM = None
 
         self.list_container = ft.Column()
+        # Age of the shown profile, it may come from the detail cache
+        self.age_text = ft.Text(size=12, italic=True)
         self.input_card = self.list_container
         self.current_page.run_task(self._create_app_bar)
         self.progress_bar = ft.ProgressRing()
@@ -45,7 +48,6 @@ class SingleUserInfo(ft.Column):
         self.progress_bar_container.visible = True
 
         self.current_page.update()
-        self.lib.conn.close()
 
     async def _create_app_bar(self):
         await TopNav.top_nav(self.current_page, title=f"User Info: {self.user}")
@@ -54,9 +56,9 @@ class SingleUserInfo(ft.Column):
     async def _go_back(self):
         try:
             from content.UserStuff.all_users import AllUsers
-            await self.content_manager(AllUsers(
-                self.current_page,
-                content_manager=self.content_manager))
+            await self.content_manager(kept_view(
+                self.current_page, "users",
+                lambda: AllUsers(self.current_page, content_manager=self.content_manager)))
         except Exception as e:
             self.current_page.show_dialog(ft.SnackBar(
                 content=ft.Text(
@@ -65,14 +67,10 @@ class SingleUserInfo(ft.Column):
                 bgcolor=ft.Colors.RED_ACCENT_400)
             )
     async def async_init(self):
-        self.ENCRYPTION_KEY_STR = get_or_generate_key(self.env_file_path)
-        load_dotenv(self.env_file_path, override=True)
+        self.ENCRYPTION_KEY_STR = credential_store.get_key()
 
-        if os.getenv("ENCRYPTED_DB_CREDENTIALS"):
-            self.db_credentials = load_decrypted_credentials(
-                key=self.ENCRYPTION_KEY_STR,
-                env_file_path=self.env_file_path,
-            )
+        if credential_store.has_encrypted_credentials():
+            self.db_credentials = credential_store.get_credentials()
 
             if self.db_credentials:
                 self.DB_DRIVER = self.db_credentials["driver"]
@@ -102,197 +100,38 @@ class SingleUserInfo(ft.Column):
             self.progress_bar_container.visible = True
             self.update()
 
-            with (User(self.DB_USER, self.DB_PASSWORD, self.DB_SYSTEM, self.DB_DRIVER) as self.User):
-                # Fetch data
-                result = self.User.getSingleUserInformation(username=str(self.user))
+            cached = await detail_cache.get(USER_INFO, self.db_credentials, str(self.user))
+            if cached is not None:
+                # Shown right away, fetched again below when stale
+                self._render_user(cached["value"])
+                stale = detail_cache.is_stale(cached)
+                self.age_text.value = age_text(cached["fetched_at"], refreshing=stale)
+                self.progress_bar.visible = False
+                self.progress_bar_container.visible = False
+                self.update()
+                if not stale:
+                    return
+
+            # Fetch data (off the event loop)
+            try:
+                result = await ibmi_executor.get_single_user_information(self.db_credentials, str(self.user))
                 result = json.loads(result)
-                data = result['data']
-
-               #for key, value in data.items():
-                #
-                # # --- UI CONSTRUCTION ---
-                result_text = ft.DataTable(
-                    columns=[ft.DataColumn(label=ft.Text()),
-                            ft.DataColumn(label=ft.Text())],
-                    rows=[],
-                    width=1000,
-                    )
-                panel_list = ft.ExpansionPanelList(
-                    expand_icon_color=ft.Colors.PRIMARY,
-                    elevation=0,
-                    divider_color=ft.Colors.PRIMARY,
-                    controls=[],
-                )
-                #
-                # # Process File Info
-                for item in data:
-                    if "error" in item:
-                        self.current_page.show_dialog(ft.SnackBar(
-                            content=ft.Text(f"Notice: {item['error']}", color=ft.Colors.WHITE),
-                            bgcolor=ft.Colors.RED_ACCENT_400
-                        ))
-                        # If it's a real error, show the raw output for debugging in the build
-                        if "raw" in item:
-                            panel_list.controls.append(ft.ExpansionPanel(
-                                header=ft.ListTile(title=ft.Text("Raw Debug Data")),
-                                content=ft.Container(content=ft.Text(item["raw"]))
-                            ))
-                        continue
-
-                # # Process user Info
-                # # Ensure user_info_data is a dict (if it was a list, take the first item)
-                info_dict = data[0] if isinstance(data, list) else data
-
-                #Formating the Info About the User
-                for key, value in info_dict.items():
-                    #set up the Storage
-                    if key in ["MAXIMUM_ALLOWED_STORAGE", "STORAGE_USED"] and value:
-                        try:
-                            mb = float(value) / 1000
-                            value = f"{round(mb, 2)} Mb"
-                        except:
-                            pass
-
-                    #format the Time
-                    if key in ["PREVIOUS_SIGNON",
-                               "PASSWORD_CHANGE_DATE",
-                               "DATE_PASSWORD_EXPIRES",
-                               "TOTP_KEY_LAST_CHANGED",
-                               "USER_EXPIRATION_DATE",
-                               "CREATION_TIMESTAMP",
-                               "LAST_RESET_TIMESTAMP",
-                               "LAST_USED_TIMESTAMP"]:
-
-                        try:
-                            dt_object = datetime.strptime(value, "%Y-%m-%d %H:%M:%S")
-                            value = dt_object.strftime("%A, %b %d, %Y")
-                        except (ValueError, TypeError):
-                            value = None
-
-                    #if Value not None append it to the User Panel
-                    if value is not None:
-                        result_text.rows.append(
-                            ft.DataRow(
-                                cells=[
-                                    ft.DataCell(ft.Text(f"{key.replace('_', ' ').title()}: ", weight=ft.FontWeight.BOLD, size=15)),
-                                    ft.DataCell(ft.Text(value=str(value))),
-                                ],
-                            ),
-                        )
-
-
-                # -- Set User Class Name and Status Color--
-                user_status = data["STATUS"]
-                status_color = ft.Colors.GREEN
-                if not user_status == "*ENABLED":
-                    status_color = ft.Colors.RED
-
-                user_class_name = data["USER_CLASS_NAME"]
-                match user_class_name:
-                    case "*USER":
-                        user_class_name_color = ft.Colors.LIME
-                    case "*PGMR":
-                        user_class_name_color = ft.Colors.PINK
-                    case "*SECADM":
-                        user_class_name_color = ft.Colors.PURPLE
-                    case "*SECOFR":
-                        user_class_name_color = ft.Colors.INDIGO
-                    case "*SYSOPR":
-                        user_class_name_color = ft.Colors.RED_ACCENT_400
-
-                user_badge = ft.Row(
-                    alignment=ft.MainAxisAlignment.CENTER,
-                    controls=[
-                        ft.Container( #active Status
-                            content=ft.Text(
-                                value=user_status,
-                                color=ft.Colors.WHITE,
-                                weight=ft.FontWeight.BOLD,
-                                size=10
-                            ),
-                            bgcolor=status_color,
-                            padding=ft.padding.only(left=4, right=4, top=2, bottom=2),  # Padding around the text
-                            border_radius=ft.border_radius.all(10),  # Rounded corners for a pill/badge shape
-                        ),
-                        ft.Container(  #  Status Class Name
-                            content=ft.Text(
-                                value=user_class_name,
-                                color=ft.Colors.WHITE,
-                                weight=ft.FontWeight.BOLD,
-                                size=10
-                            ),
-                            bgcolor=user_class_name_color,
-                            padding=ft.padding.only(left=4, right=4, top=2, bottom=2),  # Padding around the text
-                            border_radius=ft.border_radius.all(10),  # Rounded corners for a pill/badge shape
-                        )
-                    ]
-                )
-
-
-
-                img_icon = ft.Container(
-                    content=ft.Stack(
-                        controls=[
-                            ft.Container(
-                                padding=ft.padding.only(top=75),
-                                content=ft.Card(
-                                    elevation=10,
-                                    content=ft.Container(
-                                        padding=ft.padding.all(25),
-                                        content=ft.Column(
-                                            horizontal_alignment=ft.CrossAxisAlignment.CENTER,
-                                            controls=[
-                                                ft.Container(height=40),
-                                                ft.Text(f"{self.user.upper()}", size=20,
-                                                        weight=ft.FontWeight.BOLD),
-                                                user_badge,
-                                                ft.Container(height=10),
-                                                result_text,
-                                                ft.Container(height=10),
-
-                                                panel_list
-                                            ],
-                                        ),
-                                    ),
-                                ),
-                            ),
-                            ft.Row(
-                                [
-                                    ft.Container(
-                                        padding=ft.Padding.only(top=30),
-                                        content=None,
-                                    ),
-                                    ft.Container(
-                                        width=130, height=130,
-                                        bgcolor=ft.Colors.PRIMARY,
-                                        shape=ft.BoxShape.CIRCLE,
-                                        alignment=ft.Alignment.CENTER,
-                                        shadow=ft.BoxShadow(blur_radius=8, color=ft.Colors.PRIMARY),
-                                        content=ft.Text(self.user[0:2].upper(), color=ft.Colors.ON_PRIMARY,
-                                                        weight=ft.FontWeight.BOLD, size=40),
-                                    ),
-                                    ft.Container(
-                                        padding=ft.Padding.only(top=30),
-                                        content=ft.IconButton(
-                                            bgcolor=ft.Colors.PRIMARY, icon_color=ft.Colors.ON_PRIMARY, icon=ft.Icons.OUTGOING_MAIL,
-                                            on_click=lambda e: self.current_page.run_task(self._send_message_to_user),
-                                            tooltip="Send Message"
-                                        ),
-                                    )
-                                ],
-                                alignment=ft.MainAxisAlignment.SPACE_AROUND,
-                            ),
-                        ]
-                    )
-                )
-
-                header_section = ft.Container(
-                    content=ft.Column(horizontal_alignment=ft.CrossAxisAlignment.CENTER, controls=[img_icon]),
-                    alignment=ft.Alignment.TOP_CENTER,
-                    padding=ft.padding.only(top=40),
-                )
+            except Exception:
+                if cached is None:
+                    raise
+                # Server unreachable, keep showing the cached profile
+                self.age_text.value = age_text(cached["fetched_at"], offline=True)
+                return
+            data = result['data']
+            if cached is not None and not (result.get("success") and data):
+                # iLibrary reports driver errors as an error envelope, keep the cached profile too
+                self.age_text.value = age_text(cached["fetched_at"], offline=True)
+                return
 
-                self.input_card.controls.append(header_section)
+            self._render_user(data)
+            self.age_text.value = age_text(time.time())
+            if result.get("success"):
+                await detail_cache.put(USER_INFO, self.db_credentials, str(self.user), data)
 
         except Exception as e:
             self.input_card.controls.clear()
@@ -312,24 +151,210 @@ class SingleUserInfo(ft.Column):
             self.progress_bar_container.visible = False
             self.update()
 
+    def _render_user(self, data):
+        """Builds the profile card from the getSingleUserInformation data."""
+        self.input_card.controls.clear()
+        #for key, value in data.items():
+        #
+        # # --- UI CONSTRUCTION ---
+        result_text = ft.DataTable(
+            columns=[ft.DataColumn(label=ft.Text()),
+                    ft.DataColumn(label=ft.Text())],
+            rows=[],
+            width=1000,
+            )
+        panel_list = ft.ExpansionPanelList(
+            expand_icon_color=ft.Colors.PRIMARY,
+            elevation=0,
+            divider_color=ft.Colors.PRIMARY,
+            controls=[],
+        )
+        #
+        # # Process File Info
+        for item in data:
+            if "error" in item:
+                self.current_page.show_dialog(ft.SnackBar(
+                    content=ft.Text(f"Notice: {item['error']}", color=ft.Colors.WHITE),
+                    bgcolor=ft.Colors.RED_ACCENT_400
+                ))
+                # If it's a real error, show the raw output for debugging in the build
+                if "raw" in item:
+                    panel_list.controls.append(ft.ExpansionPanel(
+                        header=ft.ListTile(title=ft.Text("Raw Debug Data")),
+                        content=ft.Container(content=ft.Text(item["raw"]))
+                    ))
+                continue
+
+        # # Process user Info
+        # # Ensure user_info_data is a dict (if it was a list, take the first item)
+        info_dict = data[0] if isinstance(data, list) else data
+
+        #Formating the Info About the User
+        for key, value in info_dict.items():
+            #set up the Storage
+            if key in ["MAXIMUM_ALLOWED_STORAGE", "STORAGE_USED"] and value:
+                try:
+                    mb = float(value) / 1000
+                    value = f"{round(mb, 2)} Mb"
+                except:
+                    pass
+
+            #format the Time
+            if key in ["PREVIOUS_SIGNON",
+                       "PASSWORD_CHANGE_DATE",
+                       "DATE_PASSWORD_EXPIRES",
+                       "TOTP_KEY_LAST_CHANGED",
+                       "USER_EXPIRATION_DATE",
+                       "CREATION_TIMESTAMP",
+                       "LAST_RESET_TIMESTAMP",
+                       "LAST_USED_TIMESTAMP"]:
+
+                # Memoized, the same timestamps repeat across objects and reloads
+                value = format_timestamp(value)
+
+            #if Value not None append it to the User Panel
+            if value is not None:
+                result_text.rows.append(
+                    ft.DataRow(
+                        cells=[
+                            ft.DataCell(ft.Text(f"{key.replace('_', ' ').title()}: ", weight=ft.FontWeight.BOLD, size=15)),
+                            ft.DataCell(ft.Text(value=str(value))),
+                        ],
+                    ),
+                )
+
+
+        # -- Set User Class Name and Status Color--
+        user_status = data["STATUS"]
+        status_color = ft.Colors.GREEN
+        if not user_status == "*ENABLED":
+            status_color = ft.Colors.RED
+
+        user_class_name = data["USER_CLASS_NAME"]
+        match user_class_name:
+            case "*USER":
+                user_class_name_color = ft.Colors.LIME
+            case "*PGMR":
+                user_class_name_color = ft.Colors.PINK
+            case "*SECADM":
+                user_class_name_color = ft.Colors.PURPLE
+            case "*SECOFR":
+                user_class_name_color = ft.Colors.INDIGO
+            case "*SYSOPR":
+                user_class_name_color = ft.Colors.RED_ACCENT_400
+
+        user_badge = ft.Row(
+            alignment=ft.MainAxisAlignment.CENTER,
+            controls=[
+                ft.Container( #active Status
+                    content=ft.Text(
+                        value=user_status,
+                        color=ft.Colors.WHITE,
+                        weight=ft.FontWeight.BOLD,
+                        size=10
+                    ),
+                    bgcolor=status_color,
+                    padding=ft.padding.only(left=4, right=4, top=2, bottom=2),  # Padding around the text
+                    border_radius=ft.border_radius.all(10),  # Rounded corners for a pill/badge shape
+                ),
+                ft.Container(  #  Status Class Name
+                    content=ft.Text(
+                        value=user_class_name,
+                        color=ft.Colors.WHITE,
+                        weight=ft.FontWeight.BOLD,
+                        size=10
+                    ),
+                    bgcolor=user_class_name_color,
+                    padding=ft.padding.only(left=4, right=4, top=2, bottom=2),  # Padding around the text
+                    border_radius=ft.border_radius.all(10),  # Rounded corners for a pill/badge shape
+                )
+            ]
+        )
+
+
+
+        img_icon = ft.Container(
+            content=ft.Stack(
+                controls=[
+                    ft.Container(
+                        padding=ft.padding.only(top=75),
+                        content=ft.Card(
+                            elevation=10,
+                            content=ft.Container(
+                                padding=ft.padding.all(25),
+                                content=ft.Column(
+                                    horizontal_alignment=ft.CrossAxisAlignment.CENTER,
+                                    controls=[
+                                        ft.Container(height=40),
+                                        ft.Text(f"{self.user.upper()}", size=20,
+                                                weight=ft.FontWeight.BOLD),
+                                        user_badge,
+                                        ft.Container(height=10),
+                                        result_text,
+                                        ft.Container(height=10),
+
+                                        panel_list
+                                    ],
+                                ),
+                            ),
+                        ),
+                    ),
+                    ft.Row(
+                        [
+                            ft.Container(
+                                padding=ft.Padding.only(top=30),
+                                content=None,
+                            ),
+                            ft.Container(
+                                width=130, height=130,
+                                bgcolor=ft.Colors.PRIMARY,
+                                shape=ft.BoxShape.CIRCLE,
+                                alignment=ft.Alignment.CENTER,
+                                shadow=ft.BoxShadow(blur_radius=8, color=ft.Colors.PRIMARY),
+                                content=ft.Text(self.user[0:2].upper(), color=ft.Colors.ON_PRIMARY,
+                                                weight=ft.FontWeight.BOLD, size=40),
+                            ),
+                            ft.Container(
+                                padding=ft.Padding.only(top=30),
+                                content=ft.IconButton(
+                                    bgcolor=ft.Colors.PRIMARY, icon_color=ft.Colors.ON_PRIMARY, icon=ft.Icons.OUTGOING_MAIL,
+                                    on_click=lambda e: self.current_page.run_task(self._send_message_to_user),
+                                    tooltip="Send Message"
+                                ),
+                            )
+                        ],
+                        alignment=ft.MainAxisAlignment.SPACE_AROUND,
+                    ),
+                ]
+            )
+        )
+
+        header_section = ft.Container(
+            content=ft.Column(horizontal_alignment=ft.CrossAxisAlignment.CENTER, controls=[img_icon]),
+            alignment=ft.Alignment.TOP_CENTER,
+            padding=ft.padding.only(top=40),
+        )
+
+        self.input_card.controls.append(header_section)
+
     async def _send_message_to_user(self):
-        def send_msg(e):
+        async def send_msg(e):
             if message_textfield.value == '' or message_textfield.value is None:
                 message_textfield.helper = "Please enter a message"
                 self.current_page.update()
                 return
-            with User(self.DB_USER, self.DB_PASSWORD, self.DB_SYSTEM, self.DB_DRIVER) as msg:
-                data:str = msg.send_message_to_user(username=str(self.user) , message=message_textfield.value)
-                get_data = json.loads(data)
-                if get_data.get("success"):
-                    msg_feedback = ft.Text(f"Message sent successfully to {self.user}")
-                    snack_bg_color = ft.Colors.GREEN_ACCENT_400
+            data:str = await ibmi_executor.send_message_to_user(
+                self.db_credentials, username=str(self.user), message=message_textfield.value)
+            get_data = json.loads(data)
+            if get_data.get("success"):
+                msg_feedback = ft.Text(f"Message sent successfully to {self.user}")
+                snack_bg_color = ft.Colors.GREEN_ACCENT_400
 
-                if get_data.get("error"):
-                    msg_feedback = ft.Text(f"Message sent was not successfully to {self.user}")
-                    snack_bg_color = ft.Colors.RED_ACCENT_400
-                self.current_page.pop_dialog()
-                self.current_page.show_dialog(ft.SnackBar(content=msg_feedback, bgcolor=snack_bg_color))
+            if get_data.get("error"):
+                msg_feedback = ft.Text(f"Message sent was not successfully to {self.user}")
+                snack_bg_color = ft.Colors.RED_ACCENT_400
+            self.current_page.pop_dialog()
+            self.current_page.show_dialog(ft.SnackBar(content=msg_feedback, bgcolor=snack_bg_color))
 
 
         message_textfield = ft.TextField(
@@ -337,7 +362,7 @@ class SingleUserInfo(ft.Column):
             autofocus=True,
             border_color=ft.Colors.PRIMARY,
             multiline=True,
-            on_submit=send_msg,
+            on_submit=lambda e: self.current_page.run_task(send_msg, e),
             shift_enter=True,
             min_lines=1,
             max_lines=10,
@@ -346,7 +371,7 @@ class SingleUserInfo(ft.Column):
         send_button = ft.TextButton(
             content=ft.Text("Send", color=ft.Colors.ON_PRIMARY),
             style=ft.ButtonStyle(bgcolor=ft.Colors.PRIMARY),
-            on_click = lambda e: send_msg(e),
+            on_click = lambda e: self.current_page.run_task(send_msg, e),
         )
         message_dialog = ft.AlertDialog(
             title=ft.Text(f"Send Message to User: {self.user}"),
@@ -0,0 +1,81 @@
+import asyncio
+import logging
+import sqlite3
+
+from content.config import CHANGE_POLL_INTERVAL
+from content.db_manager import DatabaseManager, db_mgr, INCREMENTAL, FULL
+
+logger = logging.getLogger("ChangeWatcher")
+
+
+class ChangeWatcher:
+    """
+    Notices commits of the out-of-process sync worker to libraries_metadata.db
+    and republishes them on the local page.pubsub on the "refresh_<table>"
+    topics the in-process worker publishes to, as {"mode": ...} without row
+    counts. The mode is FULL when FULL_GEN moved, i.e. a full refresh that
+    left no tombstones.
+
+    PRAGMA data_version only changes when another connection committed, so
+    polling it on one long-lived connection is cheap. SYNC_GENERATION then
+    tells which tables actually changed. Polls run on a worker thread, a
+    busy database never blocks the event loop.
+    """
+
+    def __init__(self, page, db: DatabaseManager = None, interval: float = CHANGE_POLL_INTERVAL):
+        self.page = page
+        self.db = db or db_mgr
+        self.interval = interval
+        self.running = False
+        self._conn = None
+        self._data_version = None
+        self._generations = {}
+
+    def _poll(self) -> list[tuple]:
+        """Returns (table, sync mode) of the tables whose generation changed since the last poll."""
+        if self._conn is None:
+            # data_version is per connection, so this one is not taken from the read pool
+            self._conn = self.db.connect(readonly=True)
+        data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+        if data_version == self._data_version:
+            return []
+        self._data_version = data_version
+
+        rows = self._conn.execute("SELECT TABLE_NAME, GEN, FULL_GEN FROM SYNC_GENERATION")
+        generations = {table: (gen, full_gen) for table, gen, full_gen in rows}
+        changed = []
+        for table, (gen, full_gen) in generations.items():
+            previous = self._generations.get(table, (None, None))
+            if previous[0] != gen:
+                changed.append((table, FULL if previous[1] != full_gen else INCREMENTAL))
+        self._generations = generations
+        return changed
+
+    async def run(self):
+        """Polls until stop() is called. The first poll only records the current state."""
+        self.running = True
+        try:
+            await asyncio.to_thread(self._poll)
+        except sqlite3.Error as e:
+            logger.error(f"Could not read sync state: {e}")
+
+        while self.running:
+            await asyncio.sleep(self.interval)
+            try:
+                changed = await asyncio.to_thread(self._poll)
+            except sqlite3.OperationalError as e:
+                # Usually the worker holding the write lock, try again next time
+                logger.debug(f"Change poll skipped: {e}")
+                continue
+            for table, mode in changed:
+                logger.info(f"{table} changed by the sync worker process ({mode}).")
+                self.page.pubsub.send_all_on_topic(f"refresh_{table.lower()}", {"mode": mode})
+        self._close()
+
+    def stop(self):
+        self.running = False
+
+    def _close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
@@ -1,2 +1,73 @@
 #Setting upt the Server Status
-SERVER_STATUS = True
\ No newline at end of file
+SERVER_STATUS = True
+
+#Number of worker threads that run blocking IBM i calls (pyodbc / paramiko)
+IBMI_EXECUTOR_WORKERS = 4
+
+#Objects of a library (getFileInfo) shown per page in the library info view; fetched rows
+#are kept this many seconds for the following pages, for at most this many libraries
+FILE_INFO_PAGE_SIZE = 100
+FILE_INFO_CACHE_TTL = 60.0
+FILE_INFO_CACHE_SIZE = 4
+
+#Detail cache (library info, objects, user profiles): entries older than this many seconds
+#are shown and fetched again, compressed entries are evicted least recently used above this size
+DETAIL_CACHE_TTL = 300.0
+DETAIL_CACHE_MAX_BYTES = 32 * 1024 * 1024
+
+#Background crawl of getLibraryInfo into LIBRARY_DETAIL by the sync worker (env
+#ILIBRARY_DETAIL_CRAWL=1/0 overrides): calls at once, calls started per second, libraries per checkpoint
+DETAIL_CRAWL = False
+DETAIL_CRAWL_CONCURRENCY = 2
+DETAIL_CRAWL_RATE = 2.0
+DETAIL_CRAWL_BATCH = 20
+
+#Background sync scheduling (seconds)
+SYNC_BASE_INTERVAL = 60.0
+SYNC_MIN_INTERVAL = 15.0
+SYNC_MAX_INTERVAL = 600.0
+SYNC_MAX_BACKOFF = 900.0
+SYNC_JITTER = 0.1
+
+#IBM i connection pool
+POOL_MIN_SIZE = 1
+POOL_MAX_SIZE = 4
+POOL_IDLE_TIMEOUT = 300.0
+POOL_HEALTH_CHECK_AFTER = 30.0
+
+#Sync run history (SYNC_RUNS), older runs are pruned
+SYNC_RUNS_KEEP = 1000
+
+#Background sync worker: "in_process" runs it on the Flet event loop, "process" starts
+#`python -m content.sync_worker` as its own process (env ILIBRARY_SYNC_WORKER_MODE overrides);
+#frozen / flet build apps have no interpreter for that and always sync in-process
+SYNC_WORKER_MODE = "in_process"
+#How often the UI checks the SQLite file for commits of the worker process (seconds)
+CHANGE_POLL_INTERVAL = 1.0
+
+#Windowed library/user lists: rows per page, pages kept as controls, fixed tile height (px)
+LIST_PAGE_SIZE = 100
+LIST_WINDOW_PAGES = 3
+LIST_TILE_HEIGHT = 96
+
+#SharedPreferences cache: writes within this many seconds are sent to the client together
+PREFS_WRITE_DELAY = 0.25
+
+#Navigation rail views kept alive between visits, the least recently used one is dropped first.
+#One per rail view, so going round the rail never rebuilds a view
+VIEW_CACHE_SIZE = 3
+
+#Search bars: wait this long after the last keystroke before querying (seconds)
+SEARCH_DEBOUNCE = 0.15
+#Search bars: answer name prefixes from an in-memory index before querying the database
+PREFIX_INDEX = True
+
+#SQLite access (db_manager): read-only connections kept open, statements cached per
+#connection, how long to wait for a lock (seconds), page cache (KiB) and mmap size (bytes)
+DB_READ_POOL_SIZE = 4
+DB_STATEMENT_CACHE = 256
+DB_BUSY_TIMEOUT = 10.0
+DB_CACHE_SIZE_KB = 16384
+DB_MMAP_SIZE = 64 * 1024 * 1024
+#Page cache (KiB) while a full refresh loads a table
+DB_BULK_CACHE_SIZE_KB = 65536
@@ -0,0 +1,212 @@
+import hashlib
+import logging
+import re
+import threading
+import time
+from contextlib import contextmanager
+
+from content.config import POOL_MIN_SIZE, POOL_MAX_SIZE, POOL_IDLE_TIMEOUT, POOL_HEALTH_CHECK_AFTER
+
+logger = logging.getLogger("ConnectionPool")
+
+# iLibrary classes by kind. iLibrary pulls in pyodbc and paramiko, so it is
+# imported on the first connection instead of at startup
+_CONNECTION_CLASSES = {
+    "library": "Library",
+    "user": "User",
+}
+
+# iLibrary reports driver errors as {"success": false, ...} envelopes instead of raising
+_FAILURE_ENVELOPE = re.compile(r'^\s*\{\s*"success"\s*:\s*false')
+
+
+def _is_failure_envelope(result) -> bool:
+    return isinstance(result, str) and _FAILURE_ENVELOPE.match(result) is not None
+
+
+class ConnectionPool:
+    """
+    Keeps opened iLibrary Library/User objects (one ODBC connection each) alive
+    between calls, keyed by (kind, system, user, driver, port, password hash),
+    so changed credentials never reuse a session opened with the old ones.
+
+    Connections are health checked on checkout when they sat idle for longer
+    than health_check_after seconds, or when their last call returned an error
+    envelope (see call()), and are transparently replaced when dead. Idle
+    connections past idle_timeout are closed on every checkout and checkin.
+
+    close_all() starts a new epoch: connections checked out before it are
+    closed when they come back instead of being reused.
+    """
+
+    def __init__(self,
+                 min_size: int = POOL_MIN_SIZE,
+                 max_size: int = POOL_MAX_SIZE,
+                 idle_timeout: float = POOL_IDLE_TIMEOUT,
+                 health_check_after: float = POOL_HEALTH_CHECK_AFTER):
+        self.min_size = min_size
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.health_check_after = health_check_after
+        self._cond = threading.Condition()
+        # key -> list of (connection, last_used)
+        self._idle = {}
+        # key -> number of connections handed out or being opened
+        self._in_use = {}
+        # Bumped by close_all(), connections of an older epoch are not checked in again
+        self._epoch = 0
+        self.stats = {"created": 0, "reused": 0, "reconnects": 0, "closed": 0}
+
+    @staticmethod
+    def _key(kind: str, creds: dict) -> tuple:
+        password_hash = hashlib.sha256(str(creds["password"]).encode()).hexdigest()
+        return kind, creds["system"], creds["user"], creds["driver"], str(creds.get("port")), password_hash
+
+    @staticmethod
+    def _open(kind: str, creds: dict):
+        import iLibrary
+        connection_class = getattr(iLibrary, _CONNECTION_CLASSES[kind])
+        return connection_class(creds["user"], creds["password"], creds["system"], creds["driver"]).__enter__()
+
+    def _close(self, connection):
+        try:
+            connection.iclose()
+        except Exception as e:
+            logger.warning(f"Error while closing pooled connection: {e}")
+        self.stats["closed"] += 1
+
+    @staticmethod
+    def _is_healthy(connection) -> bool:
+        if getattr(connection, "conn", None) is None:
+            return False
+        try:
+            with connection.conn.cursor() as cursor:
+                cursor.execute("SELECT 1 FROM SYSIBM.SYSDUMMY1")
+                cursor.fetchall()
+            return True
+        except Exception:
+            return False
+
+    def _prune(self, now: float) -> list:
+        """Removes idle connections past idle_timeout (keeping min_size per key). Caller holds the lock."""
+        expired = []
+        for key, idle in self._idle.items():
+            while idle and len(idle) + self._in_use.get(key, 0) > self.min_size \
+                    and now - idle[0][1] > self.idle_timeout:
+                expired.append(idle.pop(0)[0])
+        return expired
+
+    def _checkout(self, kind: str, creds: dict) -> tuple:
+        """Returns (connection, epoch), the epoch goes back to _checkin()."""
+        key = self._key(kind, creds)
+        expired = []
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                expired.extend(self._prune(now))
+                idle = self._idle.setdefault(key, [])
+                if idle:
+                    candidate, last_used = idle.pop()
+                    break
+                if self._in_use.get(key, 0) < self.max_size:
+                    candidate, last_used = None, now
+                    break
+                # Pool exhausted: wait for a checkin
+                self._cond.wait()
+            self._in_use[key] = self._in_use.get(key, 0) + 1
+            epoch = self._epoch
+
+        for connection in expired:
+            self._close(connection)
+
+        try:
+            if candidate is not None:
+                if now - last_used < self.health_check_after or self._is_healthy(candidate):
+                    self.stats["reused"] += 1
+                    return candidate, epoch
+                logger.info(f"Pooled {kind} connection to {creds['system']} is dead, reconnecting.")
+                self.stats["reconnects"] += 1
+                self._close(candidate)
+            connection = self._open(kind, creds)
+            self.stats["created"] += 1
+            return connection, epoch
+        except Exception:
+            self._release_slot(key)
+            raise
+
+    def _release_slot(self, key):
+        with self._cond:
+            self._in_use[key] = max(0, self._in_use.get(key, 0) - 1)
+            self._cond.notify()
+
+    def _checkin(self, kind: str, creds: dict, connection, epoch: int, suspect: bool = False):
+        key = self._key(kind, creds)
+        now = time.monotonic()
+        # A suspect connection counts as idle forever, the next checkout health checks it
+        last_used = float("-inf") if suspect else now
+        with self._cond:
+            self._in_use[key] = max(0, self._in_use.get(key, 0) - 1)
+            stale = epoch != self._epoch
+            if not stale:
+                self._idle.setdefault(key, []).append((connection, last_used))
+            expired = self._prune(now)
+            self._cond.notify()
+
+        if stale:
+            # Checked out before close_all(), e.g. opened with replaced credentials
+            self._close(connection)
+        for expired_connection in expired:
+            self._close(expired_connection)
+
+    @contextmanager
+    def connection(self, kind: str, creds: dict):
+        """
+        Checks out an opened Library ("library") or User ("user") object.
+        A connection whose call raised is discarded instead of returned to the pool.
+        """
+        connection, epoch = self._checkout(kind, creds)
+        try:
+            yield connection
+        except Exception:
+            self._close(connection)
+            self._release_slot(self._key(kind, creds))
+            raise
+        self._checkin(kind, creds, connection, epoch)
+
+    def call(self, kind: str, creds: dict, method: str, timings: dict | None = None, **kwargs):
+        """
+        Runs method(**kwargs) on a pooled connection and returns its result.
+        iLibrary returns error envelopes instead of raising, also for a dropped
+        connection, so after one the connection is health checked on its next checkout.
+        If timings is given, the time spent getting the connection and running
+        the call are stored as timings["connect"] and timings["fetch"].
+        """
+        start = time.perf_counter()
+        connection, epoch = self._checkout(kind, creds)
+        connected = time.perf_counter()
+        try:
+            result = getattr(connection, method)(**kwargs)
+        except Exception:
+            self._close(connection)
+            self._release_slot(self._key(kind, creds))
+            raise
+        if timings is not None:
+            timings["connect"] = connected - start
+            timings["fetch"] = time.perf_counter() - connected
+        self._checkin(kind, creds, connection, epoch, suspect=_is_failure_envelope(result))
+        return result
+
+    def close_all(self):
+        """
+        Closes every idle connection, e.g. on shutdown or after credentials
+        changed. Connections checked out right now are closed on checkin.
+        """
+        with self._cond:
+            self._epoch += 1
+            idle, self._idle = self._idle, {}
+        for connections in idle.values():
+            for connection, _ in connections:
+                self._close(connection)
+
+
+connection_pool = ConnectionPool()
@@ -0,0 +1,112 @@
+import json
+import logging
+import threading
+from pathlib import Path
+
+from content.functions import get_or_generate_key
+
+logger = logging.getLogger("CredentialStore")
+
+
+class CredentialStore:
+    """
+    Loads the encryption key and decrypts the IBM i credentials from .env once
+    and serves them from memory. The cache is dropped when the .env mtime
+    changes or when new credentials are saved through save_credentials().
+
+    The token is only decrypted when the credentials are asked for, so the
+    startup check has_encrypted_credentials() does not import cryptography.
+    """
+
+    def __init__(self, env_file_path: Path = Path(__file__).parent / ".env"):
+        self.env_file_path = env_file_path
+        self._lock = threading.Lock()
+        self._mtime = None
+        self._loaded = False
+        self._key = None
+        self._encrypted_token = None
+        self._credentials = None
+        self._decrypted = False
+        self.hits = 0
+        self.misses = 0
+
+    def _current_mtime(self):
+        try:
+            return self.env_file_path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def _load(self):
+        """Re-reads .env when it changed since the last load. Caller holds the lock."""
+        mtime = self._current_mtime()
+        if self._loaded and mtime == self._mtime:
+            self.hits += 1
+            return
+
+        self.misses += 1
+        from dotenv import dotenv_values
+        # get_or_generate_key creates the file / key if needed, so stat again afterwards
+        self._key = get_or_generate_key(self.env_file_path)
+        self._encrypted_token = dotenv_values(self.env_file_path).get("ENCRYPTED_DB_CREDENTIALS")
+        self._credentials = None
+        self._decrypted = False
+        self._mtime = self._current_mtime()
+        self._loaded = True
+
+    def _decrypt(self):
+        """Decrypts the loaded token once. Caller holds the lock."""
+        if self._decrypted:
+            return
+        self._decrypted = True
+        if not self._encrypted_token:
+            return
+        from cryptography.fernet import Fernet, InvalidToken
+        try:
+            decrypted = Fernet(self._key.encode()).decrypt(self._encrypted_token.encode())
+            self._credentials = json.loads(decrypted.decode("utf-8"))
+        except (InvalidToken, ValueError) as e:
+            logger.error(f"Could not decrypt credentials: {e}")
+
+    def get_key(self) -> str:
+        with self._lock:
+            self._load()
+            return self._key
+
+    def has_encrypted_credentials(self) -> bool:
+        """True if .env holds a credential token, even if it cannot be decrypted."""
+        with self._lock:
+            self._load()
+            return bool(self._encrypted_token)
+
+    def get_credentials(self) -> dict | None:
+        """Returns a copy of the decrypted credentials, or None if missing/invalid."""
+        with self._lock:
+            self._load()
+            self._decrypt()
+            return dict(self._credentials) if self._credentials else None
+
+    def save_credentials(self, **credentials):
+        """Encrypts and writes the credentials to .env and refreshes the cache."""
+        from cryptography.fernet import Fernet
+        from dotenv import set_key
+        with self._lock:
+            self._load()
+            token = Fernet(self._key.encode()).encrypt(json.dumps(credentials).encode())
+            set_key(
+                dotenv_path=self.env_file_path,
+                key_to_set="ENCRYPTED_DB_CREDENTIALS",
+                value_to_set=token.decode(),
+            )
+            self._loaded = False
+
+    def invalidate(self):
+        with self._lock:
+            self._loaded = False
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+credential_store = CredentialStore()
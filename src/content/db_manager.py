@@ -1,27 +1,417 @@
 import sqlite3
 import logging
+import queue
+import threading
+import time
+from contextlib import contextmanager
 from pathlib import Path
 
+from content.config import (
+    SYNC_RUNS_KEEP, DB_READ_POOL_SIZE, DB_STATEMENT_CACHE, DB_BUSY_TIMEOUT, DB_CACHE_SIZE_KB, DB_MMAP_SIZE,
+    DB_BULK_CACHE_SIZE_KB,
+)
+from content.ingest import batched, row_hash
+from content.search_index import FTS_TABLES, create_fts
+from content.timestamps import with_timestamp_columns
+
+# Columns shared by every synced metadata table:
+#   ROW_HASH  - hash of the synced values, used to skip unchanged rows
+#   SYNC_GEN  - sync generation in which the row was last inserted/changed/deleted
+#   DELETED   - tombstone flag for rows that disappeared from the IBM i
+SYNC_COLUMNS = (("ROW_HASH", "TEXT"), ("SYNC_GEN", "INTEGER NOT NULL DEFAULT 0"), ("DELETED", "INTEGER NOT NULL DEFAULT 0"))
+
+# Sync modes (sync_engine.SyncEngine.run), also what a reader of a synced table
+# has to do to catch up (DatabaseManager.pending_refresh):
+#   INCREMENTAL - only inserted/changed rows are written, missing rows are tombstoned
+#   FULL        - the table is rebuilt from the snapshot (shadow table swap)
+INCREMENTAL = "incremental"
+FULL = "full"
+
+# Timestamp column of each metadata table, stored next to it at sync time as
+#   <column>_EPOCH   - seconds since 1970 (indexed, for sorting and date ranges)
+#   <column>_DISPLAY - the text the lists show, so they render without parsing
+TIMESTAMP_COLUMNS = {"LIBRARY_METADATA": "OBJCREATED", "USER_METADATA": "CREATION_TIMESTAMP"}
+
+LIBRARY_METADATA_SCHEMA = (
+    "(OBJNAME TEXT PRIMARY KEY, OBJCREATED TEXT, DESCRIPTION TEXT, CHANGE_TIMESTAMP TEXT, "
+    "OBJCREATED_EPOCH INTEGER, OBJCREATED_DISPLAY TEXT, "
+    "ROW_HASH TEXT, SYNC_GEN INTEGER NOT NULL DEFAULT 0, DELETED INTEGER NOT NULL DEFAULT 0)"
+)
+USER_METADATA_SCHEMA = (
+    "(AUTHORIZATION_NAME TEXT PRIMARY KEY, CREATION_TIMESTAMP TEXT, TEXT_DESCRIPTION TEXT, "
+    "CREATION_TIMESTAMP_EPOCH INTEGER, CREATION_TIMESTAMP_DISPLAY TEXT, "
+    "ROW_HASH TEXT, SYNC_GEN INTEGER NOT NULL DEFAULT 0, DELETED INTEGER NOT NULL DEFAULT 0)"
+)
+# Synced columns added to a metadata table after its first release
+ADDED_COLUMNS = {"LIBRARY_METADATA": (("CHANGE_TIMESTAMP", "TEXT"),)}
+# getLibraryInfo result per library, filled by detail_crawler.DetailCrawler. CHANGE_TIMESTAMP is
+# the one of LIBRARY_METADATA at crawl time; ERROR is set (the old detail kept) when the call failed
+LIBRARY_DETAIL_SCHEMA = (
+    "(OBJNAME TEXT PRIMARY KEY, CHANGE_TIMESTAMP TEXT, OBJECT_COUNT INTEGER, LIBRARY_SIZE INTEGER, "
+    "DETAIL TEXT, CRAWLED_AT TEXT, ERROR TEXT)"
+)
+# Position of a resumable walk over a table: last finished key and completed passes
+CRAWL_CHECKPOINT_SCHEMA = "(CRAWLER TEXT PRIMARY KEY, LAST_KEY TEXT, PASSES INTEGER NOT NULL DEFAULT 0, UPDATED_AT TEXT)"
+# One row per sync cycle. Phase durations are summed over all entities of the
+# cycle; since entities run concurrently they can add up to more than DURATION.
+SYNC_RUNS_SCHEMA = (
+    "(RUN_ID INTEGER PRIMARY KEY AUTOINCREMENT, STARTED_AT TEXT, FINISHED_AT TEXT, DURATION REAL, "
+    "CONNECT_S REAL, FETCH_S REAL, PARSE_S REAL, WRITE_S REAL, NOTIFY_S REAL, "
+    "ROWS_INSERTED INTEGER, ROWS_UPDATED INTEGER, ROWS_DELETED INTEGER, "
+    "BYTES_RECEIVED INTEGER, ERROR_CLASS TEXT, MODE TEXT)"
+)
+# Compressed detail payloads (library info, objects, user profiles), see detail_cache.py
+DETAIL_CACHE_SCHEMA = (
+    "(KIND TEXT NOT NULL, SYSTEM TEXT NOT NULL, DETAIL_KEY TEXT NOT NULL, PAYLOAD BLOB NOT NULL, "
+    "SIZE INTEGER NOT NULL, FETCHED_AT REAL NOT NULL, LAST_USED REAL NOT NULL, "
+    "PRIMARY KEY (KIND, SYSTEM, DETAIL_KEY))"
+)
+SYNC_RUN_COLUMNS = (
+    "STARTED_AT", "FINISHED_AT", "DURATION", "CONNECT_S", "FETCH_S", "PARSE_S", "WRITE_S", "NOTIFY_S",
+    "ROWS_INSERTED", "ROWS_UPDATED", "ROWS_DELETED", "BYTES_RECEIVED", "ERROR_CLASS", "MODE",
+)
+
+METADATA_SCHEMAS = {
+    "LIBRARY_METADATA": LIBRARY_METADATA_SCHEMA,
+    "USER_METADATA": USER_METADATA_SCHEMA,
+}
+
+
 class DatabaseManager:
-    def __init__(self):
-        self.db_path = Path(__file__).parent / ".auth" / "libraries_metadata.db"
+    """
+    Single access point to libraries_metadata.db.
+
+    The database runs in WAL mode, so readers see the last committed state
+    while a sync writes. All writes go through one long-lived writer
+    connection (writer()), reads borrow one of a small pool of read-only
+    connections (reader()). Connections stay open, so sqlite3's per-connection
+    statement cache reuses the prepared statements of repeated queries.
+    Waits for the writer and for a free reader are counted in stats().
+    """
+
+    def __init__(self, db_path=None, read_pool_size: int = DB_READ_POOL_SIZE):
+        self.db_path = Path(db_path) if db_path else Path(__file__).parent / ".auth" / "libraries_metadata.db"
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.read_pool_size = read_pool_size
+
+        self._writer = None
+        self._write_lock = threading.Lock()
+        self._readers = queue.LifoQueue()
+        self._reader_count = 0
+        self._pool_lock = threading.Lock()
+        self._stats = {
+            kind: {"acquired": 0, "contended": 0, "wait_total": 0.0, "wait_max": 0.0, "busy": 0}
+            for kind in ("write", "read")
+        }
+
+    # ------------------------------------------------------
+    # Connections
+    # ------------------------------------------------------
+    def connect(self, readonly: bool = False) -> sqlite3.Connection:
+        """
+        Opens a connection with the app's pragmas. For callers that need a
+        connection of their own (the search thread, the change watcher);
+        everything else uses reader() / writer().
+        """
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=DB_BUSY_TIMEOUT,
+            check_same_thread=False,
+            cached_statements=DB_STATEMENT_CACHE,
+            # Transactions are started explicitly, see writer()
+            isolation_level=None,
+        )
+        conn.execute("PRAGMA journal_mode = WAL")
+        # In WAL mode NORMAL only syncs at checkpoints and cannot corrupt the database
+        conn.execute("PRAGMA synchronous = NORMAL")
+        conn.execute(f"PRAGMA cache_size = -{DB_CACHE_SIZE_KB}")
+        conn.execute(f"PRAGMA mmap_size = {DB_MMAP_SIZE}")
+        conn.execute("PRAGMA temp_store = MEMORY")
+        if readonly:
+            conn.execute("PRAGMA query_only = ON")
+        return conn
+
+    def _record_wait(self, kind: str, waited: float):
+        stats = self._stats[kind]
+        stats["acquired"] += 1
+        stats["wait_total"] += waited
+        stats["wait_max"] = max(stats["wait_max"], waited)
+        if waited > 0.001:
+            stats["contended"] += 1
+
+    def _record_busy(self, kind: str, error: sqlite3.OperationalError):
+        if "locked" in str(error) or "busy" in str(error):
+            self._stats[kind]["busy"] += 1
+
+    @contextmanager
+    def writer(self):
+        """
+        The writer connection inside one BEGIN IMMEDIATE transaction, committed
+        when the block ends and rolled back on an exception. Writers from
+        several threads queue up here instead of on SQLite's busy handler.
+        """
+        start = time.perf_counter()
+        with self._write_lock:
+            self._record_wait("write", time.perf_counter() - start)
+            if self._writer is None:
+                self._writer = self.connect()
+            conn = self._writer
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                yield conn
+                conn.execute("COMMIT")
+            except BaseException as e:
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
+                if isinstance(e, sqlite3.OperationalError):
+                    self._record_busy("write", e)
+                raise
+
+    @contextmanager
+    def reader(self):
+        """A read-only connection from the pool, returned when the block ends."""
+        start = time.perf_counter()
+        try:
+            conn = self._readers.get_nowait()
+        except queue.Empty:
+            with self._pool_lock:
+                grow = self._reader_count < self.read_pool_size
+                if grow:
+                    self._reader_count += 1
+            conn = self.connect(readonly=True) if grow else self._readers.get()
+        self._record_wait("read", time.perf_counter() - start)
+        try:
+            yield conn
+        except sqlite3.OperationalError as e:
+            self._record_busy("read", e)
+            raise
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            self._readers.put(conn)
+
+    def stats(self) -> dict:
+        """Lock/pool waits per kind: acquisitions, waits over 1 ms, total/max wait (s), busy errors."""
+        return {kind: dict(values) for kind, values in self._stats.items()}
+
+    def close(self):
+        """Closes all connections, e.g. before the database file is removed or on exit."""
+        with self._write_lock:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+        with self._pool_lock:
+            while True:
+                try:
+                    self._readers.get_nowait().close()
+                except queue.Empty:
+                    break
+            self._reader_count = 0
+
+        write, read = self._stats["write"], self._stats["read"]
+        logging.info(
+            f"DatabaseManager: {write['acquired']} writes ({write['contended']} waited, "
+            f"max {write['wait_max'] * 1000:.1f} ms, {write['busy']} busy), "
+            f"{read['acquired']} reads ({read['contended']} waited, max {read['wait_max'] * 1000:.1f} ms, "
+            f"{read['busy']} busy)"
+        )
+
+    def ensure_schema(self):
+        """
+        Creates the metadata tables if needed and adds the sync columns
+        to tables created by older versions of the app.
+        """
+        try:
+            with self.writer() as conn:
+                cursor = conn.cursor()
+                # FULL_GEN: generation of the last full refresh, which leaves no tombstones
+                cursor.execute(
+                    "CREATE TABLE IF NOT EXISTS SYNC_GENERATION "
+                    "(TABLE_NAME TEXT PRIMARY KEY, GEN INTEGER NOT NULL, FULL_GEN INTEGER NOT NULL DEFAULT 0)"
+                )
+                if "FULL_GEN" not in {row[1] for row in cursor.execute("PRAGMA table_info(SYNC_GENERATION)")}:
+                    cursor.execute("ALTER TABLE SYNC_GENERATION ADD COLUMN FULL_GEN INTEGER NOT NULL DEFAULT 0")
+                cursor.execute(f"CREATE TABLE IF NOT EXISTS SYNC_RUNS {SYNC_RUNS_SCHEMA}")
+                if "MODE" not in {row[1] for row in cursor.execute("PRAGMA table_info(SYNC_RUNS)")}:
+                    cursor.execute("ALTER TABLE SYNC_RUNS ADD COLUMN MODE TEXT")
+                cursor.execute(f"CREATE TABLE IF NOT EXISTS DETAIL_CACHE {DETAIL_CACHE_SCHEMA}")
+                cursor.execute(f"CREATE TABLE IF NOT EXISTS LIBRARY_DETAIL {LIBRARY_DETAIL_SCHEMA}")
+                cursor.execute(f"CREATE TABLE IF NOT EXISTS CRAWL_CHECKPOINT {CRAWL_CHECKPOINT_SCHEMA}")
+                for table_name, schema in METADATA_SCHEMAS.items():
+                    cursor.execute(f"CREATE TABLE IF NOT EXISTS {table_name} {schema}")
+                    existing = {row[1] for row in cursor.execute(f"PRAGMA table_info({table_name})")}
+                    for column, column_type in (*SYNC_COLUMNS, *ADDED_COLUMNS.get(table_name, ())):
+                        if column not in existing:
+                            cursor.execute(f"ALTER TABLE {table_name} ADD COLUMN {column} {column_type}")
+                    if table_name in TIMESTAMP_COLUMNS:
+                        self._ensure_timestamp_columns(cursor, table_name, existing)
+                    if table_name in FTS_TABLES:
+                        # Index rows synced before the search index existed
+                        new_index = not cursor.execute(
+                            "SELECT 1 FROM sqlite_master WHERE name = ?", (FTS_TABLES[table_name]["fts_table"],)
+                        ).fetchone()
+                        create_fts(cursor, table_name, rebuild=new_index)
+        except sqlite3.Error as e:
+            logging.error(f"DatabaseManager Error in ensure_schema: {e}")
+
+    @staticmethod
+    def _ensure_timestamp_columns(cursor, table_name, existing):
+        """Adds the _EPOCH/_DISPLAY columns and their index, filling them for rows synced before."""
+        column = TIMESTAMP_COLUMNS[table_name]
+        if f"{column}_EPOCH" not in existing:
+            cursor.execute(f"ALTER TABLE {table_name} ADD COLUMN {column}_EPOCH INTEGER")
+            cursor.execute(f"ALTER TABLE {table_name} ADD COLUMN {column}_DISPLAY TEXT")
+            rows = cursor.execute(f"SELECT rowid, {column} FROM {table_name}").fetchall()
+            cursor.executemany(
+                f"UPDATE {table_name} SET {column}_EPOCH = ?, {column}_DISPLAY = ? WHERE rowid = ?",
+                ((epoch, display, rowid) for rowid, _, epoch, display in with_timestamp_columns(rows, 1))
+            )
+        _create_timestamp_index(cursor, table_name)
 
-    def refresh_table(self, table_name, schema, insert_sql, data):
+    @contextmanager
+    def _bulk_load(self, conn: sqlite3.Connection):
+        """Larger page cache while a table is loaded in one go, restored afterwards."""
+        conn.execute(f"PRAGMA cache_size = -{DB_BULK_CACHE_SIZE_KB}")
+        try:
+            yield
+        finally:
+            conn.execute(f"PRAGMA cache_size = -{DB_CACHE_SIZE_KB}")
+
+    def refresh_table(self, table_name, schema, columns, data) -> int:
         """
-        Safely drops, recreates, and repopulates a table.
+        Replaces the content of a table with data. The rows are loaded into a
+        shadow table that is renamed to table_name once complete, so readers
+        keep the old rows until the commit and never see a missing or half
+        filled table. data may be a lazy iterator, it is inserted in batches.
+        The _EPOCH/_DISPLAY columns of TIMESTAMP_COLUMNS are filled in here.
+        Metadata tables also get ROW_HASH and a new SYNC_GEN, as if every row
+        had been inserted by a delta sync, so the next delta sync only writes
+        real changes; FULL_GEN tells readers that missed it to reload instead.
+        Returns the row count.
         """
+        timestamp_column = TIMESTAMP_COLUMNS.get(table_name)
+        if timestamp_column in columns:
+            data = with_timestamp_columns(data, columns.index(timestamp_column))
+            columns = (*columns, f"{timestamp_column}_EPOCH", f"{timestamp_column}_DISPLAY")
+        synced = table_name in METADATA_SCHEMAS
+        if synced:
+            columns = (*columns, "ROW_HASH", "SYNC_GEN")
+
+        shadow = f"{table_name}_SHADOW"
+        insert_sql = f"INSERT INTO {shadow} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
         try:
-            # timeout=10 helps prevent 'database is locked' errors
-            with sqlite3.connect(self.db_path, timeout=10) as conn:
+            # One transaction, nothing changes if data fails half way
+            with self.writer() as conn, self._bulk_load(conn):
                 cursor = conn.cursor()
-                # Using f-strings for table names is okay here as they are internal,
-                # but we use '?' placeholders for the actual data to prevent SQL injection.
+                if synced:
+                    gen_row = cursor.execute(
+                        "SELECT GEN FROM SYNC_GENERATION WHERE TABLE_NAME = ?", (table_name,)
+                    ).fetchone()
+                    generation = (gen_row[0] if gen_row else 0) + 1
+                    data = ((*row, row_hash(row), generation) for row in data if row[0] is not None)
+                cursor.execute(f"DROP TABLE IF EXISTS {shadow}")
+                cursor.execute(f"CREATE TABLE {shadow} {schema}")
+                # The shadow has no FTS triggers, the index is rebuilt once after the swap
+                row_count = 0
+                for batch in batched(data):
+                    cursor.executemany(insert_sql, batch)
+                    row_count += len(batch)
+
                 cursor.execute(f"DROP TABLE IF EXISTS {table_name}")
-                cursor.execute(f"CREATE TABLE {table_name} {schema}")
-                cursor.executemany(insert_sql, data)
-                conn.commit()
+                cursor.execute(f"ALTER TABLE {shadow} RENAME TO {table_name}")
+                if table_name in TIMESTAMP_COLUMNS:
+                    _create_timestamp_index(cursor, table_name)
+                if table_name in FTS_TABLES:
+                    # DROP took the triggers along, the index still holds the old rows
+                    create_fts(cursor, table_name, rebuild=True)
+                if synced:
+                    cursor.execute(
+                        """INSERT INTO SYNC_GENERATION (TABLE_NAME, GEN, FULL_GEN) VALUES (?, ?, ?)
+                           ON CONFLICT(TABLE_NAME) DO UPDATE SET GEN = EXCLUDED.GEN, FULL_GEN = EXCLUDED.FULL_GEN""",
+                        (table_name, generation, generation)
+                    )
+                return row_count
         except sqlite3.Error as e:
             logging.error(f"DatabaseManager Error in refresh_table: {e}")
             raise  # Re-raise so the calling function knows the sync failed
-db_mgr = DatabaseManager()
\ No newline at end of file
+
+    @staticmethod
+    def sync_generations(cursor, table_name: str) -> tuple:
+        """(GEN, FULL_GEN) of table_name from SYNC_GENERATION, (0, 0) before its first sync."""
+        row = cursor.execute(
+            "SELECT GEN, FULL_GEN FROM SYNC_GENERATION WHERE TABLE_NAME = ?", (table_name,)
+        ).fetchone()
+        return tuple(row) if row else (0, 0)
+
+    def pending_refresh(self, table_name: str, seen_generation: int) -> str | None:
+        """
+        What a reader that applied the syncs of table_name up to seen_generation
+        (LiveList, PrefixIndex) has to do: None if nothing changed, INCREMENTAL
+        to read the rows with a higher SYNC_GEN, FULL to read everything again
+        after a full refresh (it leaves no tombstones) or a reset of the table.
+        """
+        with self.reader() as conn:
+            generation, full_generation = self.sync_generations(conn.cursor(), table_name)
+        if generation == seen_generation:
+            return None
+        if full_generation > seen_generation or generation < seen_generation:
+            return FULL
+        return INCREMENTAL
+
+    def record_sync_run(self, run: dict):
+        """Stores one sync cycle (keys of SYNC_RUN_COLUMNS) and prunes old runs."""
+        try:
+            with self.writer() as conn:
+                conn.execute(
+                    f"INSERT INTO SYNC_RUNS ({', '.join(SYNC_RUN_COLUMNS)}) "
+                    f"VALUES ({', '.join('?' * len(SYNC_RUN_COLUMNS))})",
+                    tuple(run.get(column) for column in SYNC_RUN_COLUMNS)
+                )
+                conn.execute(
+                    "DELETE FROM SYNC_RUNS WHERE RUN_ID <= (SELECT MAX(RUN_ID) FROM SYNC_RUNS) - ?",
+                    (SYNC_RUNS_KEEP,)
+                )
+        except sqlite3.Error as e:
+            logging.error(f"DatabaseManager Error in record_sync_run: {e}")
+
+    def recent_sync_runs(self, limit: int = 20) -> list[dict]:
+        """Newest sync runs first."""
+        with self.reader() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = sqlite3.Row
+            rows = cursor.execute("SELECT * FROM SYNC_RUNS ORDER BY RUN_ID DESC LIMIT ?", (limit,))
+            return [dict(row) for row in rows]
+
+    def sync_run_percentiles(self, limit: int = 100) -> dict:
+        """
+        p50/p95 of the cycle duration and of each phase over the last runs.
+
+        :return: {"runs": n, "DURATION": (p50, p95), "FETCH_S": (p50, p95), ...}
+        """
+        columns = ("DURATION", "CONNECT_S", "FETCH_S", "PARSE_S", "WRITE_S", "NOTIFY_S")
+        with self.reader() as conn:
+            rows = conn.execute(
+                f"SELECT {', '.join(columns)} FROM SYNC_RUNS ORDER BY RUN_ID DESC LIMIT ?", (limit,)
+            ).fetchall()
+
+        result = {"runs": len(rows)}
+        for index, column in enumerate(columns):
+            values = sorted(row[index] for row in rows if row[index] is not None)
+            result[column] = (_percentile(values, 50), _percentile(values, 95))
+        return result
+
+
+def _create_timestamp_index(cursor, table_name):
+    column = TIMESTAMP_COLUMNS[table_name]
+    cursor.execute(f"CREATE INDEX IF NOT EXISTS IDX_{table_name}_{column}_EPOCH ON {table_name} ({column}_EPOCH)")
+
+
+def _percentile(sorted_values: list, percent: float):
+    """Nearest-rank percentile of an already sorted list, None if empty."""
+    if not sorted_values:
+        return None
+    rank = max(1, -(-len(sorted_values) * percent // 100))
+    return sorted_values[int(rank) - 1]
+
+
+db_mgr = DatabaseManager()
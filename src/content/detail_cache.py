@@ -0,0 +1,138 @@
+import asyncio
+import json
+import logging
+import sqlite3
+import threading
+import time
+import zlib
+
+from content.config import DETAIL_CACHE_TTL, DETAIL_CACHE_MAX_BYTES
+from content.db_manager import db_mgr, DatabaseManager
+
+logger = logging.getLogger("DetailCache")
+
+# Kinds of cached details
+LIBRARY_INFO = "library_info"
+FILE_INFO = "file_info"
+USER_INFO = "user_info"
+
+
+class DetailCache:
+    """
+    Results of the detail calls (getLibraryInfo, getFileInfo,
+    getSingleUserInformation) in the DETAIL_CACHE table, keyed by kind, IBM i
+    system and user, and the library/user name. Values are stored as zlib
+    compressed JSON.
+
+    The views show a cached value right away and fetch again when it is older
+    than ttl (stale-while-revalidate), or keep showing it when the server is
+    unreachable. Above max_bytes of compressed payloads the least recently
+    used entries are dropped.
+
+    load()/store() run on the calling thread, get()/put() on a worker thread.
+    Reads only take a reader connection: their LAST_USED is kept in memory and
+    written with the next store(), before it evicts. Cache errors are logged
+    and treated as a miss.
+    """
+
+    def __init__(self, db: DatabaseManager = db_mgr, ttl: float = DETAIL_CACHE_TTL,
+                 max_bytes: int = DETAIL_CACHE_MAX_BYTES):
+        self.db = db
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.stats = {"hits": 0, "misses": 0, "stores": 0, "evicted": 0}
+        # (kind, system, key) -> time of the last load() not yet written to LAST_USED
+        self._used = {}
+        self._used_lock = threading.Lock()
+
+    @staticmethod
+    def _system(creds: dict) -> str:
+        return f"{creds['system']}/{creds['user']}"
+
+    def load(self, kind: str, creds: dict, key: str) -> dict | None:
+        """The cached value as {"value": ..., "fetched_at": epoch seconds}, None if there is none."""
+        system = self._system(creds)
+        try:
+            with self.db.reader() as conn:
+                row = conn.execute(
+                    "SELECT PAYLOAD, FETCHED_AT FROM DETAIL_CACHE WHERE KIND = ? AND SYSTEM = ? AND DETAIL_KEY = ?",
+                    (kind, system, key)
+                ).fetchone()
+            if row is None:
+                self.stats["misses"] += 1
+                return None
+            value = json.loads(zlib.decompress(row[0]))
+        except (sqlite3.Error, zlib.error, ValueError) as e:
+            logger.warning(f"Could not read {kind} {key} from the detail cache: {e}")
+            return None
+        with self._used_lock:
+            self._used[(kind, system, key)] = time.time()
+        self.stats["hits"] += 1
+        return {"value": value, "fetched_at": row[1]}
+
+    def store(self, kind: str, creds: dict, key: str, value, fetched_at: float | None = None):
+        """Stores value (anything json.dumps takes) and evicts old entries above max_bytes."""
+        payload = zlib.compress(json.dumps(value, separators=(",", ":")).encode())
+        now = time.time()
+        with self._used_lock:
+            used, self._used = self._used, {}
+        try:
+            with self.db.writer() as conn:
+                # Reads since the last store, so eviction sees them
+                conn.executemany(
+                    "UPDATE DETAIL_CACHE SET LAST_USED = MAX(LAST_USED, ?) "
+                    "WHERE KIND = ? AND SYSTEM = ? AND DETAIL_KEY = ?",
+                    ((last_used, *entry) for entry, last_used in used.items())
+                )
+                conn.execute(
+                    "INSERT OR REPLACE INTO DETAIL_CACHE "
+                    "(KIND, SYSTEM, DETAIL_KEY, PAYLOAD, SIZE, FETCHED_AT, LAST_USED) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (kind, self._system(creds), key, payload, len(payload), fetched_at or now, now)
+                )
+                # Everything after the newest max_bytes, by last use
+                evicted = conn.execute(
+                    "DELETE FROM DETAIL_CACHE WHERE rowid IN (SELECT rowid FROM ("
+                    "SELECT rowid, SUM(SIZE) OVER (ORDER BY LAST_USED DESC, rowid DESC) AS TOTAL FROM DETAIL_CACHE"
+                    ") WHERE TOTAL > ?)",
+                    (self.max_bytes,)
+                ).rowcount
+        except sqlite3.Error as e:
+            with self._used_lock:
+                # Written with the next store
+                self._used = {**used, **self._used}
+            logger.warning(f"Could not store {kind} {key} in the detail cache: {e}")
+            return
+        self.stats["stores"] += 1
+        if evicted:
+            self.stats["evicted"] += evicted
+            logger.info(f"Detail cache above {self.max_bytes} bytes, evicted {evicted} entries")
+
+    async def get(self, kind: str, creds: dict, key: str) -> dict | None:
+        return await asyncio.to_thread(self.load, kind, creds, key)
+
+    async def put(self, kind: str, creds: dict, key: str, value):
+        await asyncio.to_thread(self.store, kind, creds, key, value)
+
+    def is_stale(self, entry: dict) -> bool:
+        return time.time() - entry["fetched_at"] > self.ttl
+
+
+def age_text(fetched_at: float, refreshing: bool = False, offline: bool = False) -> str:
+    """Age indicator of shown details, e.g. "Updated 5 min ago, refreshing..."."""
+    seconds = max(0.0, time.time() - fetched_at)
+    if seconds < 60:
+        age = "just now"
+    elif seconds < 3600:
+        age = f"{int(seconds // 60)} min ago"
+    elif seconds < 86400:
+        age = f"{int(seconds // 3600)} h ago"
+    else:
+        age = f"{int(seconds // 86400)} days ago"
+    if offline:
+        return f"Server unreachable, showing data from {age}"
+    if refreshing:
+        return f"Updated {age}, refreshing..."
+    return f"Updated {age}"
+
+
+detail_cache = DetailCache()
@@ -0,0 +1,201 @@
+import asyncio
+import json
+import logging
+import time
+from datetime import datetime
+
+from content.config import DETAIL_CRAWL_CONCURRENCY, DETAIL_CRAWL_RATE, DETAIL_CRAWL_BATCH
+from content.credentials import credential_store
+from content.db_manager import db_mgr, DatabaseManager
+from content.detail_cache import detail_cache, LIBRARY_INFO
+from content.ibmi_executor import ibmi_executor
+from content.sync_engine import sync_engine
+
+logger = logging.getLogger("DetailCrawler")
+
+# Row of the crawler in CRAWL_CHECKPOINT
+CRAWLER = "LIBRARY_DETAIL"
+
+
+class RateBudget:
+    """Spaces the starts of calls at least 1/rate seconds apart, across all callers."""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next = 0.0
+
+    async def acquire(self):
+        now = time.monotonic()
+        start = max(now, self._next)
+        self._next = start + self.interval
+        if start > now:
+            await asyncio.sleep(start - now)
+
+
+def _to_int(value):
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+class DetailCrawler:
+    """
+    Low-priority walk over LIBRARY_METADATA that stores the getLibraryInfo
+    result (size, object count, ...) of every library in LIBRARY_DETAIL, and in
+    the detail cache, so the library info view opens without a call.
+
+    A library is crawled when it has no detail yet, its last call failed, or
+    its CHANGE_TIMESTAMP in LIBRARY_METADATA moved since the crawl. Libraries
+    are walked in name order and the last finished name is kept in
+    CRAWL_CHECKPOINT after every batch, so a restarted worker continues where
+    it stopped. A pass ends at the last name; failed libraries are tried again
+    in the next pass.
+
+    At most concurrency calls run at once, started at most rate per second,
+    and none while a sync cycle runs.
+    """
+
+    def __init__(self, db: DatabaseManager = db_mgr, concurrency: int = DETAIL_CRAWL_CONCURRENCY,
+                 rate: float = DETAIL_CRAWL_RATE, batch_size: int = DETAIL_CRAWL_BATCH):
+        self.db = db
+        self.concurrency = concurrency
+        self.budget = RateBudget(rate)
+        self.batch_size = batch_size
+        self.stats = {"crawled": 0, "failed": 0, "passes": 0}
+        self._task = None
+
+    # ------------------------------------------------------
+    # Control
+    # ------------------------------------------------------
+    def start(self):
+        """Starts a pass over the pending libraries unless one is running."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self.run_pass())
+        return self._task
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    # ------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------
+    def _read_checkpoint(self) -> str:
+        with self.db.reader() as conn:
+            row = conn.execute("SELECT LAST_KEY FROM CRAWL_CHECKPOINT WHERE CRAWLER = ?", (CRAWLER,)).fetchone()
+        return row[0] if row and row[0] else ""
+
+    def _save_checkpoint(self, last_key: str, pass_done: bool = False):
+        with self.db.writer() as conn:
+            conn.execute(
+                """INSERT INTO CRAWL_CHECKPOINT (CRAWLER, LAST_KEY, PASSES, UPDATED_AT) VALUES (?, ?, ?, ?)
+                   ON CONFLICT(CRAWLER) DO UPDATE SET LAST_KEY = EXCLUDED.LAST_KEY,
+                   PASSES = PASSES + EXCLUDED.PASSES, UPDATED_AT = EXCLUDED.UPDATED_AT""",
+                (CRAWLER, last_key, int(pass_done), datetime.now().isoformat(timespec="seconds"))
+            )
+            if pass_done:
+                # Details of libraries that are gone
+                conn.execute(
+                    "DELETE FROM LIBRARY_DETAIL WHERE OBJNAME NOT IN "
+                    "(SELECT OBJNAME FROM LIBRARY_METADATA WHERE DELETED = 0)"
+                )
+
+    def _pending(self, after: str) -> list:
+        """The next (OBJNAME, CHANGE_TIMESTAMP) rows after the given name that need a crawl."""
+        with self.db.reader() as conn:
+            return conn.execute(
+                """SELECT m.OBJNAME, m.CHANGE_TIMESTAMP FROM LIBRARY_METADATA m
+                   LEFT JOIN LIBRARY_DETAIL d ON d.OBJNAME = m.OBJNAME
+                   WHERE m.DELETED = 0 AND m.OBJNAME > ?
+                     AND (d.OBJNAME IS NULL OR d.ERROR IS NOT NULL OR d.CHANGE_TIMESTAMP IS NOT m.CHANGE_TIMESTAMP)
+                   ORDER BY m.OBJNAME LIMIT ?""",
+                (after, self.batch_size)
+            ).fetchall()
+
+    def _store(self, name: str, change_timestamp, info: dict):
+        with self.db.writer() as conn:
+            conn.execute(
+                """INSERT INTO LIBRARY_DETAIL
+                   (OBJNAME, CHANGE_TIMESTAMP, OBJECT_COUNT, LIBRARY_SIZE, DETAIL, CRAWLED_AT, ERROR)
+                   VALUES (?, ?, ?, ?, ?, ?, NULL)
+                   ON CONFLICT(OBJNAME) DO UPDATE SET CHANGE_TIMESTAMP = EXCLUDED.CHANGE_TIMESTAMP,
+                   OBJECT_COUNT = EXCLUDED.OBJECT_COUNT, LIBRARY_SIZE = EXCLUDED.LIBRARY_SIZE,
+                   DETAIL = EXCLUDED.DETAIL, CRAWLED_AT = EXCLUDED.CRAWLED_AT, ERROR = NULL""",
+                (name, change_timestamp, _to_int(info.get("OBJECT_COUNT")), _to_int(info.get("LIBRARY_SIZE")),
+                 json.dumps(info, default=str), datetime.now().isoformat(timespec="seconds"))
+            )
+
+    def _store_error(self, name: str, error: str):
+        with self.db.writer() as conn:
+            conn.execute(
+                """INSERT INTO LIBRARY_DETAIL (OBJNAME, CRAWLED_AT, ERROR) VALUES (?, ?, ?)
+                   ON CONFLICT(OBJNAME) DO UPDATE SET CRAWLED_AT = EXCLUDED.CRAWLED_AT, ERROR = EXCLUDED.ERROR""",
+                (name, datetime.now().isoformat(timespec="seconds"), error)
+            )
+
+    # ------------------------------------------------------
+    # Crawling
+    # ------------------------------------------------------
+    async def run_pass(self) -> int:
+        """Crawls the pending libraries from the checkpoint to the last name, returns how many were stored."""
+        if not credential_store.has_encrypted_credentials():
+            return 0
+        creds = credential_store.get_credentials()
+        if not creds:
+            return 0
+
+        start = time.perf_counter()
+        last_key = await asyncio.to_thread(self._read_checkpoint)
+        if last_key:
+            logger.info(f"Resuming library detail crawl after {last_key}")
+        semaphore = asyncio.Semaphore(self.concurrency)
+        crawled = failed = 0
+        while True:
+            batch = await asyncio.to_thread(self._pending, last_key)
+            if not batch:
+                break
+            results = await asyncio.gather(*(
+                self._crawl(creds, name, change_timestamp, semaphore) for name, change_timestamp in batch
+            ))
+            crawled += sum(results)
+            failed += len(results) - sum(results)
+            last_key = batch[-1][0]
+            await asyncio.to_thread(self._save_checkpoint, last_key)
+
+        await asyncio.to_thread(self._save_checkpoint, "", True)
+        self.stats["passes"] += 1
+        if crawled or failed:
+            logger.info(
+                f"Library detail crawl pass finished in {time.perf_counter() - start:.1f}s "
+                f"({crawled} stored, {failed} failed)"
+            )
+        return crawled
+
+    async def _crawl(self, creds: dict, name: str, change_timestamp, semaphore: asyncio.Semaphore) -> bool:
+        async with semaphore:
+            # Sync cycles go first
+            while sync_engine.busy:
+                await asyncio.sleep(1.0)
+            await self.budget.acquire()
+            try:
+                result = json.loads(await ibmi_executor.get_library_info(creds, name))
+                if not result.get("success"):
+                    raise RuntimeError((result.get("error") or {}).get("details") or result.get("message"))
+                data = result["data"]
+                info = data[0] if isinstance(data, list) else data
+                if not isinstance(info, dict):
+                    raise RuntimeError("getLibraryInfo returned no row")
+                await asyncio.to_thread(self._store, name, change_timestamp, info)
+            except Exception as e:
+                logger.warning(f"Could not crawl library {name}: {e}")
+                await asyncio.to_thread(self._store_error, name, f"{type(e).__name__}: {e}")
+                self.stats["failed"] += 1
+                return False
+            await detail_cache.put(LIBRARY_INFO, creds, name, data)
+            self.stats["crawled"] += 1
+            return True
@@ -1,209 +1,66 @@
-import sqlite3
 from pathlib import Path
 import json
 import os
 import socket
-import pyodbc
-from dotenv import load_dotenv, set_key
-from cryptography.fernet import Fernet
-import flet as ft
-from iLibrary import Library, User
-
-from content.db_manager import db_mgr
 import logging
+from typing import TYPE_CHECKING
 
-def load_decrypted_credentials(key: str, env_file_path: Path) -> dict | None:
-    """
-    Loads the encrypted credential token from the .env file, decrypts it,
-    and returns the credentials as a Python dictionary.
-
-    Args:
-        key: The encryption key (must match the key used for encryption).
-        env_file_path: Path object pointing to the .env file.
-
-    Returns:
-        A dictionary of credentials or None if the token is missing or invalid.
-    """
-    # 1. Load the .env file contents into the OS environment
-    # This ensures os.getenv() will see the encrypted token.
-    load_dotenv(dotenv_path=env_file_path, override=True)
-
-    # 2. Retrieve the encrypted token string
-    encrypted_token_str = os.getenv("ENCRYPTED_DB_CREDENTIALS")
-
-    if not encrypted_token_str:
-        print("WARN: ENCRYPTED_DB_CREDENTIALS not found in .env file.")
-        return None
-
-    try:
-        # 3. Initialize Fernet with the key
-        f = Fernet(key.encode())
-
-        # 4. Decrypt the token
-        # The token must be encoded from its base64 string back into bytes for decryption
-        decrypted_bytes = f.decrypt(encrypted_token_str.encode())
-
-        # 5. Decode back to a string and parse the JSON
-        decrypted_string = decrypted_bytes.decode("utf-8")
-
-        # 6. Parse the JSON string back into a Python dictionary
-        credentials = json.loads(decrypted_string)
-
-        #print("INFO: Database credentials successfully loaded and decrypted.")
-        return credentials
-
-    except Exception as e:
-        #print(f"ERROR: Decryption failed. Key mismatch or data corruption. Details: {e}")
-        return None
-
+if TYPE_CHECKING:
+    # Only for the annotations, the sync worker process imports this module without Flet
+    import flet as ft
 
 # --- Background Task: Sync and Banner Management ---
 
 logger = logging.getLogger("QueryAfterSettings")
 
 
-async def run_query_after_settings(page: ft.Page, page_content: ft.Container):
+async def run_query_after_settings(page: "ft.Page", page_content: "ft.Container"):
     """
     Executed after settings are saved.
     Loads credentials and performs an immediate sync of Library and User metadata.
     """
-    env_file_path = Path(__file__).parent / ".env"
-
-    # 1. Load and Decrypt Credentials
-    load_dotenv(env_file_path, override=True)
-    encryption_key = get_or_generate_key(env_file_path)
-    credentials_str = os.getenv("ENCRYPTED_DB_CREDENTIALS")
+    from content.credentials import credential_store
 
-    if not credentials_str:
+    # 1. Load and Decrypt Credentials (cached, re-read only when .env changed)
+    if not credential_store.has_encrypted_credentials():
         logger.warning("Sync aborted: No credentials found.")
         return
 
-    db_creds = load_decrypted_credentials(encryption_key, env_file_path)
+    db_creds = credential_store.get_credentials()
     if not db_creds:
         logger.error("Sync aborted: Could not decrypt credentials.")
         return
 
     # Update Global State
-    await ft.SharedPreferences().set('server', str(db_creds["system"]))
+    from content.preferences import preferences
+    preferences(page).set('server', str(db_creds["system"]))
 
     # Close any open dialogs (like the settings modal)
     page.pop_dialog()
 
-    # 2. Synchronize Library Data
-    try:
-        with Library(db_creds["user"], db_creds["password"],
-                     db_creds["system"], db_creds["driver"]) as lib:
-
-            raw_data = json.loads(lib.getAllLibraries())
-            items = raw_data.get('data', [])
-
-            values = [
-                (item.get('OBJNAME'), item.get('OBJCREATED'), item.get("TEXT"))
-                for item in items if isinstance(item, dict)
-            ]
-
-            # Use the manager to refresh the table
-            db_mgr.refresh_table(
-                table_name="LIBRARY_METADATA",
-                schema="(OBJNAME TEXT PRIMARY KEY, OBJCREATED TEXT, DESCRIPTION TEXT)",
-                insert_sql="INSERT INTO LIBRARY_METADATA VALUES (?, ?, ?)",
-                data=values
-            )
-            logger.info(f"Library Sync: {len(values)} items processed.")
-
-    except Exception as e:
-        logger.exception(f"Library Sync failed: {e}")
-
-    # 3. Synchronize User Data
-    try:
-        with User(db_creds["user"], db_creds["password"],
-                  db_creds["system"], db_creds["driver"]) as user:
-
-            raw_data = json.loads(user.getAllUsers())
-            items = raw_data.get('data', [])
-
-            values = [
-                (item.get('AUTHORIZATION_NAME'), item.get('CREATION_TIMESTAMP'), item.get('TEXT_DESCRIPTION'))
-                for item in items if isinstance(item, dict)
-            ]
+    # 2. Rebuild Library and User Data from the new system. A running
+    # background cycle is not interrupted, the full sync follows it.
+    from content.sync_engine import sync_engine, FULL
+    from content.worker_process import WorkerProcess
 
-            # Use the manager to refresh the table
-            db_mgr.refresh_table(
-                table_name="USER_METADATA",
-                schema="(AUTHORIZATION_NAME TEXT PRIMARY KEY, CREATION_TIMESTAMP TEXT, TEXT_DESCRIPTION TEXT)",
-                insert_sql="INSERT INTO USER_METADATA VALUES (?, ?, ?)",
-                data=values
-            )
-            logger.info(f"User Sync: {len(values)} items processed.")
-
-    except Exception as e:
-        logger.exception(f"User Sync failed: {e}")
+    worker = (page.data or {}).get("worker")
+    if isinstance(worker, WorkerProcess):
+        # The worker process owns the writes, let it rebuild the tables right away
+        worker.sync_now(FULL)
+    else:
+        if sync_engine.page is None:
+            sync_engine.page = page
+        results = await sync_engine.run(FULL)
+        for table_name, counts in results.items():
+            if counts is None:
+                logger.error(f"{table_name} sync failed.")
+            else:
+                logger.info(f"{table_name} sync: {counts['inserted']} items processed.")
 
     # Final UI Refresh
     page.update()
 
 
-async def _sync_library_data(page, creds, db_path):
-    try:
-        with Library(creds["user"], creds["password"], creds["system"], creds["driver"]) as lib:
-            raw_data = json.loads(lib.getAllLibraries())
-            items = raw_data.get('data', [])
-
-            values = [
-                (item.get('OBJNAME'), item.get('OBJCREATED'), item.get('TEXT'))
-                for item in items if isinstance(item, dict)
-            ]
-
-            _execute_db_transaction(
-                db_path,
-                "DROP TABLE IF EXISTS LIBRARY_METADATA",
-                "CREATE TABLE LIBRARY_METADATA (OBJNAME TEXT PRIMARY KEY, OBJCREATED TEXT, DESCRIPTION TEXT)",
-                "INSERT INTO LIBRARY_METADATA (OBJNAME, OBJCREATED, DESCRIPTION) VALUES (?, ?, ?)",
-                values
-            )
-
-            logger.info("Library metadata synced successfully.")
-    except Exception as e:
-        logger.error(f"Library Sync Error: {e}")
-
-
-async def _sync_user_data(page, creds, db_path):
-    try:
-        with User(creds["user"], creds["password"], creds["system"], creds["driver"]) as user:
-            raw_data = json.loads(user.getAllUsers())
-            items = raw_data.get('data', [])
-
-            values = [
-                (item.get('AUTHORIZATION_NAME'), item.get('CREATION_TIMESTAMP'), item.get('TEXT_DESCRIPTION'))
-                for item in items if isinstance(item, dict)
-            ]
-
-            _execute_db_transaction(
-                db_path,
-                "DROP TABLE IF EXISTS USER_METADATA",
-                "CREATE TABLE USER_METADATA (AUTHORIZATION_NAME TEXT PRIMARY KEY, CREATION_TIMESTAMP TEXT, TEXT_DESCRIPTION TEXT)",
-                "INSERT INTO USER_METADATA (AUTHORIZATION_NAME, CREATION_TIMESTAMP, TEXT_DESCRIPTION) VALUES (?, ?, ?)",
-                values
-            )
-
-            logger.info("User metadata synced successfully.")
-    except Exception as e:
-        logger.error(f"User Sync Error: {e}")
-
-
-def _execute_db_transaction(db_path, drop_sql, create_sql, insert_sql, values):
-    """Internal helper to minimize boilerplate for SQLite operations."""
-    try:
-        with sqlite3.connect(db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute(drop_sql)
-            cursor.execute(create_sql)
-            cursor.executemany(insert_sql, values)
-            conn.commit()
-    except sqlite3.Error as e:
-        logger.error(f"Database Transaction Error: {e}")
-        raise  # Pass it up to the caller to handle UI notifications
-
 def get_or_generate_key(env_file_path: Path) -> str:
     """
     Loads the environment file and retrieves the APP_ENCRYPTION_KEY.
@@ -215,6 +72,9 @@ def get_or_generate_key(env_file_path: Path) -> str:
     Returns:
         The encryption key as a UTF-8 string.
     """
+    # Imported here, not at startup (see CredentialStore)
+    from dotenv import load_dotenv, set_key
+
     # 1. Ensure the .env file exists
     # Create the file if it doesn't exist.
     env_file_path.touch(mode=0o600, exist_ok=True)
@@ -228,6 +88,7 @@ def get_or_generate_key(env_file_path: Path) -> str:
 
     if key is None:
         # 4. Key is missing: Generate a new one
+        from cryptography.fernet import Fernet
         new_key_bytes = Fernet.generate_key()
         new_key_string = new_key_bytes.decode()
 
@@ -243,10 +104,12 @@ def get_or_generate_key(env_file_path: Path) -> str:
         return key
 
 def try_to_build_connection(db_driver:str, db_host:str, port:int, db_user:str, db_password:str) -> bool:
+    # Only needed for the connection test in the settings, not at startup
+    import pyodbc
     try:
-        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        sock.settimeout(2)
-        result = sock.connect_ex((db_host, port))
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+            sock.settimeout(2)
+            result = sock.connect_ex((db_host, port))
         if result == 0:
             conn_str = (
                 f"DRIVER={db_driver};"
@@ -254,7 +117,8 @@ def try_to_build_connection(db_driver:str, db_host:str, port:int, db_user:str, d
                 f"UID={db_user};"
                 f"PWD={db_password};"
             )
-            pyodbc.connect(conn_str, autocommit=True)
+            conn = pyodbc.connect(conn_str, autocommit=True)
+            conn.close()
 
             return True
         else:
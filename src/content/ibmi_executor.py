@@ -0,0 +1,167 @@
+import asyncio
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from content.config import IBMI_EXECUTOR_WORKERS, FILE_INFO_CACHE_TTL, FILE_INFO_CACHE_SIZE
+from content.connection_pool import connection_pool
+from content.detail_cache import detail_cache, FILE_INFO
+from content.ingest import iter_envelope_rows
+
+logger = logging.getLogger("IBMiExecutor")
+
+
+class IBMiExecutor:
+    """
+    Runs every blocking IBM i call (pyodbc + paramiko via iLibrary) on a
+    bounded thread pool, so the Flet event loop never waits on the server.
+    """
+
+    def __init__(self, max_workers: int = IBMI_EXECUTOR_WORKERS):
+        self.max_workers = max_workers
+        self._executor = None
+        self._lock = threading.Lock()
+        # name -> {"calls": int, "errors": int, "total": float, "max": float}
+        self.stats = {}
+        # (system, user, library, q_files) -> (kept_since, fetched_at, rows), see get_file_info_page()
+        self._file_info = OrderedDict()
+
+    def configure(self, max_workers: int):
+        """Changes the pool size. Running calls finish on the old pool."""
+        with self._lock:
+            if max_workers == self.max_workers and self._executor:
+                return
+            old_executor = self._executor
+            self.max_workers = max_workers
+            self._executor = None
+        if old_executor:
+            old_executor.shutdown(wait=False)
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix="ibmi",
+                )
+            return self._executor
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor:
+            executor.shutdown(wait=False, cancel_futures=True)
+        connection_pool.close_all()
+
+    def _record(self, name: str, duration: float, failed: bool):
+        with self._lock:
+            entry = self.stats.setdefault(name, {"calls": 0, "errors": 0, "total": 0.0, "max": 0.0})
+            entry["calls"] += 1
+            entry["errors"] += int(failed)
+            entry["total"] += duration
+            entry["max"] = max(entry["max"], duration)
+
+    async def run(self, name: str, func, *args, **kwargs):
+        """
+        Awaits func(*args, **kwargs) on the IBM i pool and logs how long it took.
+
+        :param name: label used for the timing log and stats
+        """
+        loop = asyncio.get_running_loop()
+
+        def timed_call():
+            start = time.perf_counter()
+            failed = True
+            try:
+                result = func(*args, **kwargs)
+                failed = False
+                return result
+            finally:
+                duration = time.perf_counter() - start
+                self._record(name, duration, failed)
+                logger.info(f"{name} {'failed' if failed else 'finished'} in {duration:.3f}s")
+
+        return await loop.run_in_executor(self._get_executor(), timed_call)
+
+    # ------------------------------------------------------
+    # Awaitable wrappers around iLibrary
+    # ------------------------------------------------------
+    async def get_all_libraries(self, creds: dict, timings: dict | None = None) -> str:
+        return await self.run("getAllLibraries", connection_pool.call, "library", creds, "getAllLibraries", timings)
+
+    async def get_all_users(self, creds: dict, timings: dict | None = None) -> str:
+        return await self.run("getAllUsers", connection_pool.call, "user", creds, "getAllUsers", timings)
+
+    async def get_library_info(self, creds: dict, library: str) -> str:
+        return await self.run("getLibraryInfo", connection_pool.call,
+                              "library", creds, "getLibraryInfo", library=library)
+
+    async def get_file_info(self, creds: dict, library: str, q_files: bool = False) -> str:
+        return await self.run("getFileInfo", connection_pool.call,
+                              "library", creds, "getFileInfo", library=library, qFiles=q_files)
+
+    def _cached_file_info(self, key):
+        with self._lock:
+            entry = self._file_info.get(key)
+            if entry is None or time.monotonic() - entry[0] > FILE_INFO_CACHE_TTL:
+                return None
+            self._file_info.move_to_end(key)
+            return entry[1:]
+
+    def _store_file_info(self, key, fetched_at, rows):
+        with self._lock:
+            self._file_info[key] = (time.monotonic(), fetched_at, rows)
+            self._file_info.move_to_end(key)
+            while len(self._file_info) > FILE_INFO_CACHE_SIZE:
+                self._file_info.popitem(last=False)
+
+    async def get_file_info_page(self, creds: dict, library: str, offset: int, limit: int,
+                                 q_files: bool = False, refresh: bool = False) -> dict:
+        """
+        One page of the getFileInfo rows of library as
+        {"rows": [...], "total": n, "fetched_at": epoch seconds}.
+
+        getFileInfo cannot page on the server, so the rows are fetched and
+        parsed once on the pool thread and kept for FILE_INFO_CACHE_TTL seconds;
+        further pages are slices of them. Without them in memory the rows come
+        from the detail cache, whatever their age (check fetched_at), and only
+        then from the server. refresh always fetches and updates both caches.
+        Raises RuntimeError for error envelopes (e.g. a library without objects).
+        """
+        key = (creds["system"], creds["user"], library.upper(), q_files)
+        detail_key = f"{library.upper()}|{q_files}"
+
+        def call():
+            entry = None if refresh else self._cached_file_info(key)
+            if entry is None and not refresh:
+                cached = detail_cache.load(FILE_INFO, creds, detail_key)
+                if cached is not None:
+                    entry = cached["fetched_at"], cached["value"]
+                    self._store_file_info(key, *entry)
+            if entry is None:
+                payload = connection_pool.call("library", creds, "getFileInfo", library=library, qFiles=q_files)
+                rows = [row for row in iter_envelope_rows(payload, "getFileInfo") if isinstance(row, dict)]
+                entry = time.time(), rows
+                self._store_file_info(key, *entry)
+                detail_cache.store(FILE_INFO, creds, detail_key, rows, fetched_at=entry[0])
+            fetched_at, rows = entry
+            return {"rows": rows[offset:offset + limit], "total": len(rows), "fetched_at": fetched_at}
+
+        return await self.run("getFileInfoPage", call)
+
+    async def get_single_user_information(self, creds: dict, username: str) -> str:
+        return await self.run("getSingleUserInformation", connection_pool.call,
+                              "user", creds, "getSingleUserInformation", username=username)
+
+    async def save_library(self, creds: dict, **kwargs) -> str:
+        """Creates the SAVF on the server and downloads it; kwargs go to Library.saveLibrary."""
+        return await self.run("saveLibrary", connection_pool.call, "library", creds, "saveLibrary", **kwargs)
+
+    async def send_message_to_user(self, creds: dict, username: str, message: str) -> str:
+        return await self.run("send_message_to_user", connection_pool.call,
+                              "user", creds, "send_message_to_user", username=username, message=message)
+
+
+ibmi_executor = IBMiExecutor()
@@ -0,0 +1,114 @@
+import asyncio
+import logging
+
+import flet as ft
+
+from content.config import PREFS_WRITE_DELAY
+
+logger = logging.getLogger("Preferences")
+
+
+class Preferences:
+    """
+    In-process copy of the SharedPreferences of one page (one client session:
+    in the web/remote mode every browser has its own preferences).
+
+    load() reads all keys once, afterwards get()/contains_key() are answered
+    from memory. set() changes the copy right away and sends the write to the
+    client in the background; writes within write_delay seconds go out
+    together and only the last value of a key is sent. Use preferences(page)
+    to get the instance of a page.
+    """
+
+    def __init__(self, write_delay: float = PREFS_WRITE_DELAY):
+        self.write_delay = write_delay
+        self._values = {}
+        # True once every key was read, missing keys are then known to be unset
+        self._complete = False
+        self._load_lock = asyncio.Lock()
+        self._pending = {}
+        self._flush_task = None
+        self.hits = 0
+        self.round_trips = 0
+
+    async def load(self):
+        """Reads all keys from the client; only the first call does any work."""
+        async with self._load_lock:
+            if self._complete:
+                return
+            shared = ft.SharedPreferences()
+            try:
+                keys = await shared.get_keys("")
+                values = await asyncio.gather(*(shared.get(key) for key in keys))
+            except Exception as e:
+                # Keys are then read one by one on first use
+                logger.error(f"Could not load the preferences: {e}")
+                return
+            finally:
+                self.round_trips += 1
+            # Writes issued while loading are newer than what the client sent
+            self._values = {**dict(zip(keys, values)), **self._values}
+            self._complete = True
+            logger.info(f"Loaded {len(keys)} preferences")
+
+    async def get(self, key: str, default=None):
+        if not self._complete:
+            await self.load()
+        if key in self._values:
+            self.hits += 1
+            value = self._values[key]
+            return default if value is None else value
+        if self._complete:
+            self.hits += 1
+            return default
+        self.round_trips += 1
+        value = self._values[key] = await ft.SharedPreferences().get(key)
+        return default if value is None else value
+
+    async def contains_key(self, key: str) -> bool:
+        return await self.get(key) is not None
+
+    def set(self, key: str, value):
+        """Stores value in memory at once, the client gets it with the next batch."""
+        self._values[key] = value
+        self._pending[key] = value
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.write_delay)
+        await self.flush()
+
+    async def flush(self):
+        """Sends the pending writes to the client now."""
+        pending, self._pending = self._pending, {}
+        if not pending:
+            return
+        shared = ft.SharedPreferences()
+        self.round_trips += 1
+        results = await asyncio.gather(
+            *(shared.set(key, value) for key, value in pending.items()), return_exceptions=True
+        )
+        for key, result in zip(pending, results):
+            if isinstance(result, Exception):
+                logger.error(f"Could not save preference {key!r}: {result}")
+
+    async def clear(self):
+        """Removes all preferences, here and on the client."""
+        if self._flush_task and not self._flush_task.done():
+            self._flush_task.cancel()
+        self._pending.clear()
+        self._values.clear()
+        self._complete = True
+        self.round_trips += 1
+        await ft.SharedPreferences().clear()
+
+
+def preferences(page: ft.Page) -> Preferences:
+    """The Preferences of page, created on first use and kept in page.data["prefs"]."""
+    if page.data is None:
+        page.data = {}
+    prefs = page.data.get("prefs")
+    if prefs is None:
+        prefs = page.data["prefs"] = Preferences()
+    return prefs
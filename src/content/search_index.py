@@ -0,0 +1,126 @@
+import logging
+import sqlite3
+
+logger = logging.getLogger("SearchIndex")
+
+# FTS5 tables over the synced metadata: base table -> index definition.
+# The key column is listed first and weighted higher when ranking.
+FTS_TABLES = {
+    "LIBRARY_METADATA": {
+        "fts_table": "LIBRARY_FTS",
+        "columns": ("OBJNAME", "DESCRIPTION"),
+        "weights": (10.0, 1.0),
+    },
+    "USER_METADATA": {
+        "fts_table": "USER_FTS",
+        "columns": ("AUTHORIZATION_NAME", "TEXT_DESCRIPTION"),
+        "weights": (10.0, 1.0),
+    },
+}
+
+# The trigram tokenizer cannot match fewer than three characters
+MIN_FTS_QUERY = 3
+SEARCH_LIMIT = 50
+
+
+def create_fts(cursor: sqlite3.Cursor, table_name: str, rebuild: bool = False) -> bool:
+    """
+    Creates the external-content FTS5 table of table_name and the triggers
+    that keep it in step with every insert, update and delete, whichever
+    write path (delta sync, upsert, refresh_table) they come from.
+    rebuild re-indexes all existing rows, needed when the table was recreated.
+
+    Runs in its own savepoint: on a SQLite built without FTS5 or the trigram
+    tokenizer nothing is created, False is returned and search() uses LIKE,
+    while the rest of the caller's transaction goes through.
+    """
+    cursor.execute("SAVEPOINT create_fts")
+    try:
+        _create_fts(cursor, table_name, rebuild)
+    except sqlite3.OperationalError as e:
+        cursor.execute("ROLLBACK TO create_fts")
+        cursor.execute("RELEASE create_fts")
+        logger.warning(f"No full-text index for {table_name}, searching with LIKE: {e}")
+        return False
+    cursor.execute("RELEASE create_fts")
+    return True
+
+
+def _create_fts(cursor: sqlite3.Cursor, table_name: str, rebuild: bool):
+    index = FTS_TABLES[table_name]
+    fts_table = index["fts_table"]
+    columns = ", ".join(index["columns"])
+    new_values = ", ".join(f"new.{column}" for column in index["columns"])
+    old_values = ", ".join(f"old.{column}" for column in index["columns"])
+
+    cursor.execute(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts_table} USING fts5("
+        f"{columns}, content='{table_name}', content_rowid='rowid', tokenize='trigram')"
+    )
+    cursor.execute(
+        f"""CREATE TRIGGER IF NOT EXISTS {fts_table}_AI AFTER INSERT ON {table_name} BEGIN
+                INSERT INTO {fts_table} (rowid, {columns}) VALUES (new.rowid, {new_values});
+            END"""
+    )
+    cursor.execute(
+        f"""CREATE TRIGGER IF NOT EXISTS {fts_table}_AD AFTER DELETE ON {table_name} BEGIN
+                INSERT INTO {fts_table} ({fts_table}, rowid, {columns}) VALUES ('delete', old.rowid, {old_values});
+            END"""
+    )
+    # Tombstoning only touches DELETED / SYNC_GEN and leaves the index alone
+    cursor.execute(
+        f"""CREATE TRIGGER IF NOT EXISTS {fts_table}_AU AFTER UPDATE OF {columns} ON {table_name} BEGIN
+                INSERT INTO {fts_table} ({fts_table}, rowid, {columns}) VALUES ('delete', old.rowid, {old_values});
+                INSERT INTO {fts_table} (rowid, {columns}) VALUES (new.rowid, {new_values});
+            END"""
+    )
+    if rebuild:
+        cursor.execute(f"INSERT INTO {fts_table} ({fts_table}) VALUES ('rebuild')")
+
+
+def fts_available(conn: sqlite3.Connection, table_name: str) -> bool:
+    """Whether the FTS table of table_name exists, see create_fts()."""
+    return conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE name = ?", (FTS_TABLES[table_name]["fts_table"],)
+    ).fetchone() is not None
+
+
+def search(conn: sqlite3.Connection, table_name: str, text: str, limit: int = SEARCH_LIMIT) -> list:
+    """
+    Returns up to limit (key,) rows of live rows matching text in the key or
+    description, best matches first. Queries shorter than three characters
+    fall back to LIKE on the key column, and without a full-text index (see
+    create_fts()) LIKE on the key and description is used, ordered by key.
+    """
+    index = FTS_TABLES[table_name]
+    key_column = index["columns"][0]
+    text = text.strip()
+
+    if len(text) < MIN_FTS_QUERY:
+        return _search_like(conn, table_name, (key_column,), text, limit)
+    if not fts_available(conn, table_name):
+        return _search_like(conn, table_name, index["columns"], text, limit)
+
+    fts_table = index["fts_table"]
+    # Quoted as one phrase, so user input is never parsed as FTS syntax
+    phrase = '"' + text.replace('"', '""') + '"'
+    weights = ", ".join(str(weight) for weight in index["weights"])
+    return conn.execute(
+        f"""SELECT m.{key_column} FROM {fts_table} f
+            JOIN {table_name} m ON m.rowid = f.rowid
+            WHERE {fts_table} MATCH ? AND m.DELETED = 0
+            ORDER BY bm25({fts_table}, {weights}) LIMIT ?""",
+        (phrase, limit)
+    ).fetchall()
+
+
+def _search_like(conn: sqlite3.Connection, table_name: str, columns: tuple, text: str, limit: int) -> list:
+    key_column = FTS_TABLES[table_name]["columns"][0]
+    # % and _ in the input are matched literally, like in the FTS phrase
+    pattern = "%" + text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+    matches = " OR ".join(f"{column} LIKE ? ESCAPE '\\'" for column in columns)
+    return conn.execute(
+        f"SELECT {key_column} FROM {table_name} WHERE DELETED = 0 AND ({matches}) "
+        f"ORDER BY {key_column} LIMIT ?",
+        (*[pattern] * len(columns), limit)
+    ).fetchall()
@@ -4,11 +4,13 @@ import os
 import sqlite3
 import flet as ft
 from pathlib import Path
-from content.functions import load_decrypted_credentials, get_or_generate_key, try_to_build_connection, load_app_info, run_query_after_settings
-import json
+from content.functions import try_to_build_connection, load_app_info, run_query_after_settings
+from content.credentials import credential_store
 from content.HelperStuff.nav_util import TopNav
-from dotenv import load_dotenv, set_key
-from cryptography.fernet import Fernet
+from content.ibmi_executor import ibmi_executor
+from content.connection_pool import connection_pool
+from content.db_manager import db_mgr
+from content.preferences import preferences
 
 
 class Settings(ft.Column):
@@ -34,8 +36,15 @@ class Settings(ft.Column):
         self.input_card = self.list_container
 
         # Start initialization
+        self._shown = False
         self.current_page.run_task(self.async_init)
 
+    def did_mount(self):
+        if self._shown:
+            # Shown again by the view cache, only the app bar belongs to the page
+            self.current_page.run_task(self._create_app_bar)
+        self._shown = True
+
     def __exit__(self, exc_type, exc_val, exc_tb):
         self.current_page.update()
 
@@ -54,6 +63,26 @@ class Settings(ft.Column):
                 border_radius=8,
             ),
 
+            ft.Container(ft.ListTile(
+                leading=None,
+                title=ft.Text("Sync Now"),
+                on_click=lambda e: self._sync_now(),
+                is_three_line=True,
+                bgcolor=ft.Colors.INVERSE_PRIMARY,
+            ),
+                border_radius=8,
+            ),
+
+            ft.Container(ft.ListTile(
+                leading=None,
+                title=ft.Text("Sync History"),
+                on_click=lambda e: self.current_page.run_task(self._show_sync_history),
+                is_three_line=True,
+                bgcolor=ft.Colors.INVERSE_PRIMARY,
+            ),
+                border_radius=8,
+            ),
+
             ft.Container(ft.ListTile(
                 leading=None,
                 title=ft.Text("Switch Thema Mode"),
@@ -103,14 +132,7 @@ class Settings(ft.Column):
         self.encrypt_credentials(**credentials)
 
     def encrypt_credentials(self, **credentials):
-        fernet = Fernet(self.ENCRYPTION_KEY_STR.encode())
-        token = fernet.encrypt(json.dumps(credentials).encode())
-
-        set_key(
-            dotenv_path=self.env_file_path,
-            key_to_set="ENCRYPTED_DB_CREDENTIALS",
-            value_to_set=token.decode(),
-        )
+        credential_store.save_credentials(**credentials)
 
     async def _load_modals (self):
 
@@ -129,7 +151,7 @@ class Settings(ft.Column):
                 )
             ]
         )
-        theme_color_value = await ft.SharedPreferences().get("theme_mode")
+        theme_color_value = await preferences(self.current_page).get("theme_mode")
         if theme_color_value is None:
             theme_color_value = 'system'
         self.switch_shema_modal = ft.AlertDialog(
@@ -191,14 +213,8 @@ class Settings(ft.Column):
 
 
 
-        self.ENCRYPTION_KEY_STR = get_or_generate_key(self.env_file_path)
-        load_dotenv(self.env_file_path, override=True)
-
-        if os.getenv("ENCRYPTED_DB_CREDENTIALS"):
-            self.db_credentials = load_decrypted_credentials(
-                key=self.ENCRYPTION_KEY_STR,
-                env_file_path=self.env_file_path,
-            )
+        self.ENCRYPTION_KEY_STR = credential_store.get_key()
+        self.db_credentials = credential_store.get_credentials()
 
 
 
@@ -319,8 +335,11 @@ class Settings(ft.Column):
         port:int = port
         driver = driver
 
-        if try_to_build_connection(driver, system, port, user, password):
+        if await ibmi_executor.run("try_to_build_connection", try_to_build_connection,
+                                   driver, system, port, user, password):
             await self._save_credentials_and_reload(driver, system,port, user, password)
+            # Drop connections opened with the previous credentials
+            connection_pool.close_all()
             await run_query_after_settings(self.current_page, self.content_manager)
             self.error_field.visible = False
             self.error_container.visible = False
@@ -337,29 +356,111 @@ class Settings(ft.Column):
 
 
 
+    def _sync_now(self):
+        """Asks the background worker to start a sync cycle right away."""
+        worker = (self.current_page.data or {}).get("worker")
+        if worker is None:
+            self.current_page.show_dialog(ft.SnackBar(
+                content=ft.Text("Background sync is not running.", color=ft.Colors.WHITE),
+                bgcolor=ft.Colors.RED_ACCENT_400))
+            return
+        worker.sync_now()
+        self.current_page.show_dialog(ft.SnackBar(
+            content=ft.Text("Sync started.", color=ft.Colors.WHITE),
+            bgcolor=ft.Colors.GREEN_ACCENT_400))
+
+    async def _show_sync_history(self):
+        """Shows the last sync runs from SYNC_RUNS with p50/p95 durations."""
+        try:
+            runs = await asyncio.to_thread(db_mgr.recent_sync_runs, 20)
+            percentiles = await asyncio.to_thread(db_mgr.sync_run_percentiles, 100)
+        except sqlite3.Error as ex:
+            logging.error(f"Could not load sync history: {ex}")
+            runs, percentiles = [], {"runs": 0}
+
+        def seconds(value):
+            return "-" if value is None else f"{value:.2f}s"
+
+        if percentiles["runs"]:
+            summary_rows = [
+                ft.DataRow(cells=[
+                    ft.DataCell(ft.Text(label)),
+                    ft.DataCell(ft.Text(seconds(percentiles[column][0]))),
+                    ft.DataCell(ft.Text(seconds(percentiles[column][1]))),
+                ])
+                for label, column in (
+                    ("Total", "DURATION"), ("Connect", "CONNECT_S"), ("Fetch", "FETCH_S"),
+                    ("Parse", "PARSE_S"), ("Write", "WRITE_S"), ("Notify", "NOTIFY_S"),
+                )
+            ]
+            summary = ft.Column([
+                ft.Text(f"Last {percentiles['runs']} runs", weight=ft.FontWeight.BOLD),
+                ft.DataTable(
+                    columns=[ft.DataColumn(label=ft.Text("Phase")),
+                             ft.DataColumn(label=ft.Text("p50"), numeric=True),
+                             ft.DataColumn(label=ft.Text("p95"), numeric=True)],
+                    rows=summary_rows,
+                ),
+            ])
+        else:
+            summary = ft.Text("No sync runs recorded yet.")
+
+        run_rows = [
+            ft.DataRow(cells=[
+                ft.DataCell(ft.Text(run["STARTED_AT"].replace("T", " "))),
+                ft.DataCell(ft.Text((run["MODE"] or "incremental").title())),
+                ft.DataCell(ft.Text(seconds(run["DURATION"]))),
+                ft.DataCell(ft.Text(f"+{run['ROWS_INSERTED']} ~{run['ROWS_UPDATED']} -{run['ROWS_DELETED']}")),
+                ft.DataCell(ft.Text(f"{(run['BYTES_RECEIVED'] or 0) / 1024:.0f} KB")),
+                ft.DataCell(ft.Text(run["ERROR_CLASS"] or "OK",
+                                    color=ft.Colors.ERROR if run["ERROR_CLASS"] else None)),
+            ])
+            for run in runs
+        ]
+
+        self.current_page.show_dialog(
+            ft.AlertDialog(
+                modal=True,
+                title=ft.Text("Sync History"),
+                content=ft.Column(
+                    scroll=ft.ScrollMode.ADAPTIVE,
+                    controls=[
+                        summary,
+                        ft.DataTable(
+                            columns=[ft.DataColumn(label=ft.Text("Started")),
+                                     ft.DataColumn(label=ft.Text("Mode")),
+                                     ft.DataColumn(label=ft.Text("Duration"), numeric=True),
+                                     ft.DataColumn(label=ft.Text("Rows")),
+                                     ft.DataColumn(label=ft.Text("Received"), numeric=True),
+                                     ft.DataColumn(label=ft.Text("Result"))],
+                            rows=run_rows,
+                        ),
+                    ],
+                ),
+                actions=[ft.TextButton("Close", on_click=lambda e: self.current_page.pop_dialog())],
+            )
+        )
+
     async def _handle_theme_mode(self, e):
         """Updates the application's theme mode and persistence."""
         self.switch_shema_modal.open = False
         selected_theme = e.control.value
 
         if selected_theme == "system":
-            await ft.SharedPreferences().set("theme_mode", selected_theme)
             self.current_page.theme_mode = ft.ThemeMode.SYSTEM
         elif selected_theme == "light":
-            await ft.SharedPreferences().set("theme_mode", selected_theme)
             self.current_page.theme_mode = ft.ThemeMode.LIGHT
         elif selected_theme == "dark":
-            await ft.SharedPreferences().set("theme_mode", selected_theme)
             self.current_page.theme_mode = ft.ThemeMode.DARK
 
-        await ft.SharedPreferences().set("theme_mode", selected_theme)
+        preferences(self.current_page).set("theme_mode", selected_theme)
 
         self.current_page.update()
 
     async def _clear_app_data(self, e):
         """Clears persistent data then closes application window"""
         # 1. Clear SharedPreferences
-        await ft.SharedPreferences().clear()
+        await preferences(self.current_page).clear()
         self.clear_app_data_modal.open = False
 
         # 2. Stop the worker gracefully (instead of os.kill)
@@ -376,18 +477,20 @@ class Settings(ft.Column):
                 os.remove(self.env_file_path)
             except Exception as ex:
                 logging.error(f"Could not remove env file: {ex}")
+            credential_store.invalidate()
 
         # 4. Handle Database
-        db_path = Path(__file__).parent / ".auth" / "libraries_metadata.db"
-        if db_path.exists():
+        if db_mgr.db_path.exists():
             try:
-                # Use a fresh connection and ensure it closes
-                with sqlite3.connect(db_path, timeout=10) as conn:
+                with db_mgr.writer() as conn:
                     cursor = conn.cursor()
                     cursor.execute("DELETE FROM LIBRARY_METADATA;")
                     cursor.execute("DELETE FROM USER_METADATA;")
-                    conn.commit()
-                # The 'with' block handles conn.close() automatically
+                    cursor.execute("DELETE FROM LIBRARY_DETAIL;")
+                    cursor.execute("DELETE FROM CRAWL_CHECKPOINT;")
+                    cursor.execute("DELETE FROM DETAIL_CACHE;")
+                # The window closes next, release the file
+                db_mgr.close()
             except sqlite3.ProgrammingError:
                 logging.warning("Database was already closed/busy.")
             except Exception as ex:
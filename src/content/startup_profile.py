@@ -0,0 +1,51 @@
+import logging
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger("StartupProfile")
+
+# Modules that should not be imported before the first screen is rendered
+HEAVY_MODULES = ("iLibrary", "pyodbc", "paramiko", "cryptography", "dotenv")
+
+
+def profile_requested() -> bool:
+    """True for `main.py --profile-startup` or ILIBRARY_PROFILE_STARTUP=1."""
+    return "--profile-startup" in sys.argv or os.environ.get("ILIBRARY_PROFILE_STARTUP") == "1"
+
+
+class StartupProfile:
+    """
+    Collects the duration of the startup phases (import, shell, schema,
+    first render, prefs, credentials) and prints them as a table together
+    with the heavy modules that were already imported. Phases are always
+    measured, report() only prints when profiling was requested.
+    """
+
+    def __init__(self, enabled: bool = None):
+        self.enabled = profile_requested() if enabled is None else enabled
+        self.phases = []
+
+    def add(self, name: str, seconds: float):
+        self.phases.append((name, seconds))
+
+    @contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def report(self):
+        total = sum(seconds for _, seconds in self.phases)
+        logger.info(f"Startup took {total * 1000:.1f} ms")
+        if not self.enabled:
+            return
+        loaded = [name for name in HEAVY_MODULES if name in sys.modules]
+        lines = ["Startup profile:"]
+        lines += [f"  {name:<14}{seconds * 1000:9.1f} ms" for name, seconds in self.phases]
+        lines.append(f"  {'total':<14}{total * 1000:9.1f} ms")
+        lines.append(f"  heavy modules loaded: {', '.join(loaded) or 'none'}")
+        print("\n".join(lines))
@@ -0,0 +1,235 @@
+import asyncio
+import logging
+import time
+from datetime import datetime
+
+from content.credentials import credential_store
+from content.ibmi_executor import ibmi_executor
+from content.db_manager import (
+    db_mgr, LIBRARY_METADATA_SCHEMA, USER_METADATA_SCHEMA, TIMESTAMP_COLUMNS, INCREMENTAL, FULL,
+)
+from content.ingest import apply_delta, iter_envelope_rows
+from content.timestamps import with_timestamp_columns
+
+logger = logging.getLogger("SyncEngine")
+
+# Entities synced every cycle. Each one is fetched concurrently and committed
+# as soon as its own payload arrives. To sync a new entity add an entry here
+# (and its schema to db_manager.METADATA_SCHEMAS):
+#   table_name    - local table, its first column is the key
+#   schema        - column definitions used when the table is (re)created
+#   key_column    - primary key of the table
+#   columns       - table columns the fetched rows are stored in
+#   source_fields - JSON fields of the iLibrary rows, in the order of columns
+#   fetch         - ibmi_executor coroutine returning the JSON envelope
+SYNC_ENTITIES = [
+    {
+        "table_name": "LIBRARY_METADATA",
+        "schema": LIBRARY_METADATA_SCHEMA,
+        "key_column": "OBJNAME",
+        "columns": ("OBJNAME", "OBJCREATED", "DESCRIPTION", "CHANGE_TIMESTAMP"),
+        "source_fields": ("OBJNAME", "OBJCREATED", "TEXT", "CHANGE_TIMESTAMP"),
+        "fetch": "get_all_libraries",
+    },
+    {
+        "table_name": "USER_METADATA",
+        "schema": USER_METADATA_SCHEMA,
+        "key_column": "AUTHORIZATION_NAME",
+        "columns": ("AUTHORIZATION_NAME", "CREATION_TIMESTAMP", "TEXT_DESCRIPTION"),
+        "source_fields": ("AUTHORIZATION_NAME", "CREATION_TIMESTAMP", "TEXT_DESCRIPTION"),
+        "fetch": "get_all_users",
+    },
+]
+
+
+PHASES = ("connect", "fetch", "parse", "write", "notify")
+_DONE = object()
+
+
+def _timed_rows(rows, metrics):
+    """Passes rows through and adds the time spent producing them to metrics["parse"]."""
+    iterator = iter(rows)
+    while True:
+        start = time.perf_counter()
+        row = next(iterator, _DONE)
+        metrics["parse"] += time.perf_counter() - start
+        if row is _DONE:
+            return
+        yield row
+
+
+class SyncEngine:
+    """
+    The one fetch-transform-store pipeline for SYNC_ENTITIES, used by the
+    background SyncWorker (incremental) and after the settings are saved (full).
+
+    Only one cycle runs at a time. Requests arriving while a cycle runs are
+    coalesced into a single follow-up cycle, which is FULL if any of them
+    asked for it; all of them get the result of that cycle.
+    """
+
+    def __init__(self, page=None):
+        """:param page: Flet page whose pubsub announces changed tables (optional)."""
+        self.page = page
+        self._lock = asyncio.Lock()
+        self._follow_up = None
+        self._follow_up_mode = None
+        # Strong references, the event loop only keeps weak ones to running tasks
+        self._tasks = set()
+
+    async def run(self, mode: str = INCREMENTAL):
+        """
+        Runs a sync cycle in mode, or joins the follow-up of the running one.
+
+        :return: per table counts of inserted/updated/deleted rows,
+                 None for tables whose sync failed
+        """
+        if self._lock.locked() or self._follow_up is not None:
+            if self._follow_up is None:
+                self._follow_up_mode = mode
+                # Its own task, so a cancelled caller does not cancel it for the others
+                self._follow_up = asyncio.ensure_future(self._run_follow_up())
+                self._tasks.add(self._follow_up)
+                self._follow_up.add_done_callback(self._tasks.discard)
+            elif mode == FULL:
+                self._follow_up_mode = FULL
+            logger.info(f"Sync requested while a cycle runs, queued as {self._follow_up_mode} follow-up.")
+            return await asyncio.shield(self._follow_up)
+
+        async with self._lock:
+            return await self._run_cycle(mode)
+
+    async def _run_follow_up(self):
+        async with self._lock:
+            # Requests from now on queue up behind this cycle
+            mode = self._follow_up_mode
+            self._follow_up = self._follow_up_mode = None
+            return await self._run_cycle(mode)
+
+    @property
+    def busy(self) -> bool:
+        return self._lock.locked()
+
+    # ------------------------------------------------------
+    # One cycle
+    # ------------------------------------------------------
+    async def _run_cycle(self, mode: str):
+        """
+        A single pass of fetching data from the server and updating the local DB.
+        All entities are fetched concurrently. The cycle is recorded in SYNC_RUNS.
+        """
+        results = {}
+        if not credential_store.has_encrypted_credentials():
+            logger.warning("No credentials found in .env. Skipping sync cycle.")
+            return results
+
+        creds = credential_store.get_credentials()
+        if not creds:
+            logger.error("Could not decrypt credentials.")
+            return results
+
+        started_at = datetime.now()
+        start = time.perf_counter()
+        metrics = [{**dict.fromkeys(PHASES, 0.0), "bytes": 0, "error": None} for _ in SYNC_ENTITIES]
+        counts = await asyncio.gather(*(
+            self._sync_entity(entity, creds, mode, entity_metrics)
+            for entity, entity_metrics in zip(SYNC_ENTITIES, metrics)
+        ))
+        duration = time.perf_counter() - start
+        results = {entity["table_name"]: result for entity, result in zip(SYNC_ENTITIES, counts)}
+        logger.info(
+            f"{mode.title()} sync cycle finished in {duration:.3f}s "
+            f"(credential cache hit rate {credential_store.hit_rate:.0%})"
+        )
+
+        run = {
+            "STARTED_AT": started_at.isoformat(timespec="seconds"),
+            "FINISHED_AT": datetime.now().isoformat(timespec="seconds"),
+            "DURATION": duration,
+            "BYTES_RECEIVED": sum(m["bytes"] for m in metrics),
+            "ERROR_CLASS": ", ".join(sorted({m["error"] for m in metrics if m["error"]})) or None,
+            "MODE": mode,
+        }
+        for phase in PHASES:
+            run[f"{phase.upper()}_S"] = sum(m[phase] for m in metrics)
+        for kind in ("inserted", "updated", "deleted"):
+            run[f"ROWS_{kind.upper()}"] = sum(c[kind] for c in counts if c)
+        await asyncio.to_thread(db_mgr.record_sync_run, run)
+        return results
+
+    async def _sync_entity(self, entity, creds, mode, metrics):
+        """
+        Fetches, stores and announces a single entity; returns its row counts.
+        Phase durations, bytes received and the error class are written to metrics.
+        """
+        table_name = entity["table_name"]
+        start = time.perf_counter()
+        try:
+            fetch = getattr(ibmi_executor, entity["fetch"])
+            payload = await fetch(creds, timings=metrics)
+            # iLibrary dumps with ensure_ascii, so characters equal bytes
+            metrics["bytes"] = len(payload)
+            fetched = time.perf_counter()
+
+            # Rows are parsed lazily while they are written, never as a full list
+            values = _timed_rows((
+                tuple(i.get(field) for field in entity["source_fields"])
+                for i in iter_envelope_rows(payload, entity["fetch"]) if isinstance(i, dict)
+            ), metrics)
+
+            # Commit right away on a worker thread so the other fetches are not held up
+            write = self._write_full if mode == FULL else self._write_incremental
+            counts = await asyncio.to_thread(write, entity, values)
+            metrics["write"] = time.perf_counter() - fetched - metrics["parse"]
+            logger.info(
+                f"{table_name} synced in {time.perf_counter() - start:.3f}s "
+                f"(fetch {fetched - start:.3f}s, parse {metrics['parse']:.3f}s, write {metrics['write']:.3f}s)"
+            )
+        except Exception as e:
+            metrics["error"] = type(e).__name__
+            logger.error(f"{table_name} sync error after {time.perf_counter() - start:.3f}s: {e}")
+            return None
+
+        # Notify the UI to refresh without a full page reload
+        if self.page and any(counts.values()):
+            notify_start = time.perf_counter()
+            # Topic per table, the list views subscribe to their own table only
+            self.page.pubsub.send_all_on_topic(f"refresh_{table_name.lower()}", {**counts, "mode": mode})
+            metrics["notify"] = time.perf_counter() - notify_start
+        return counts
+
+    @staticmethod
+    def _write_incremental(entity, values):
+        """
+        Writes only inserted/changed rows and tombstones rows missing from the
+        snapshot (see ingest.apply_delta), in a single transaction.
+        """
+        table_name = entity["table_name"]
+        columns = entity["columns"]
+        timestamp_column = TIMESTAMP_COLUMNS.get(table_name)
+        if timestamp_column:
+            # Parsed once here, the lists only read the stored display text
+            values = with_timestamp_columns(values, columns.index(timestamp_column))
+            columns = (*columns, f"{timestamp_column}_EPOCH", f"{timestamp_column}_DISPLAY")
+
+        with db_mgr.writer() as conn:
+            counts = apply_delta(conn, table_name, entity["key_column"], columns, values)
+
+        if any(counts.values()):
+            logger.info(
+                f"{table_name}: {counts['inserted']} inserted, {counts['updated']} updated, "
+                f"{counts['deleted']} deleted"
+            )
+        else:
+            logger.info(f"{table_name}: no changes")
+        return counts
+
+    @staticmethod
+    def _write_full(entity, values):
+        """Rebuilds the table from the snapshot, every row counts as inserted."""
+        row_count = db_mgr.refresh_table(entity["table_name"], entity["schema"], entity["columns"], values)
+        logger.info(f"{entity['table_name']}: rebuilt with {row_count} rows")
+        return {"inserted": row_count, "updated": 0, "deleted": 0}
+
+
+sync_engine = SyncEngine()
@@ -0,0 +1,116 @@
+import asyncio
+import logging
+import random
+
+from content.config import (
+    SYNC_BASE_INTERVAL,
+    SYNC_MIN_INTERVAL,
+    SYNC_MAX_INTERVAL,
+    SYNC_MAX_BACKOFF,
+    SYNC_JITTER,
+)
+
+logger = logging.getLogger("SyncScheduler")
+
+
+class SyncScheduler:
+    """
+    Decides how long the SyncWorker sleeps between cycles.
+
+    - no changes found      -> interval grows by idle_factor (up to max_interval)
+    - changes found         -> interval shrinks by change_factor (down to min_interval)
+    - connection failure    -> exponential backoff from base_interval (up to max_backoff)
+
+    Every delay gets +/- jitter so several clients don't hit the IBM i in lockstep.
+    """
+
+    def __init__(self,
+                 base_interval: float = SYNC_BASE_INTERVAL,
+                 min_interval: float = SYNC_MIN_INTERVAL,
+                 max_interval: float = SYNC_MAX_INTERVAL,
+                 max_backoff: float = SYNC_MAX_BACKOFF,
+                 jitter: float = SYNC_JITTER,
+                 idle_factor: float = 1.5,
+                 change_factor: float = 0.5,
+                 backoff_factor: float = 2.0):
+        self.base_interval = base_interval
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.idle_factor = idle_factor
+        self.change_factor = change_factor
+        self.backoff_factor = backoff_factor
+
+        self.interval = base_interval
+        self.failures = 0
+        self.stopped = False
+        # Loop of the first wait(); the event exists from the start, so a trigger
+        # during the first cycle is kept for the wait after it
+        self._loop = None
+        self._wake = asyncio.Event()
+
+    def next_delay(self, changes: int, failed: bool, duration: float = 0.0) -> float:
+        """
+        :param changes: number of rows inserted/updated/deleted in the last cycle
+        :param failed: True if the last cycle could not reach the server
+        :param duration: how long the last cycle took, the delay never drops below it
+        """
+        if failed:
+            self.failures += 1
+            delay = min(self.max_backoff, self.base_interval * self.backoff_factor ** self.failures)
+        else:
+            self.failures = 0
+            if changes:
+                self.interval = max(self.min_interval, self.interval * self.change_factor)
+            else:
+                self.interval = min(self.max_interval, self.interval * self.idle_factor)
+            delay = self.interval
+
+        delay = max(delay, duration)
+        return delay * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def _set_wake(self):
+        if self._loop is None:
+            # Nobody waits yet, the next wait() returns right away
+            self._wake.set()
+            return
+        if self._loop.is_closed():
+            return
+        try:
+            current_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            current_loop = None
+        # Flet may call shutdown handlers from a non-loop thread
+        if current_loop is self._loop:
+            self._wake.set()
+        else:
+            self._loop.call_soon_threadsafe(self._wake.set)
+
+    def trigger_now(self):
+        """Ends the current wait so the next cycle starts immediately."""
+        self._set_wake()
+
+    def stop(self):
+        self.stopped = True
+        self._set_wake()
+
+    async def wait(self, delay: float) -> bool:
+        """
+        Sleeps for delay seconds, or until trigger_now()/stop() is called.
+
+        A trigger that arrived since the last wait() ended (e.g. "Sync Now"
+        during a cycle) ends it right away; the event is cleared once consumed.
+
+        :return: True if woken early
+        """
+        self._loop = asyncio.get_running_loop()
+        if self.stopped:
+            return True
+        try:
+            await asyncio.wait_for(self._wake.wait(), timeout=delay)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            self._wake.clear()
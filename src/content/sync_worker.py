@@ -1,15 +1,15 @@
 import os
-import json
-import sqlite3
+import signal
+import time
 import asyncio
 import logging
 from pathlib import Path
-from dotenv import load_dotenv
 
-# Ensure these imports match your project structure
-from iLibrary import Library, User
-
-from content.functions import get_or_generate_key, load_decrypted_credentials
+from content.config import DETAIL_CRAWL, CHANGE_POLL_INTERVAL
+from content.db_manager import db_mgr
+from content.detail_crawler import DetailCrawler
+from content.sync_scheduler import SyncScheduler
+from content.sync_engine import sync_engine, INCREMENTAL, FULL
 
 # Logging configuration
 logging.basicConfig(
@@ -18,132 +18,161 @@ logging.basicConfig(
 )
 logger = logging.getLogger("SyncWorker")
 
+PID_FILE = Path(__file__).parent / ".auth" / "worker.pid"
+# Written by the UI process (WorkerProcess.sync_now) with the mode of the cycle it asks for
+SYNC_REQUEST_FILE = PID_FILE.with_name("sync.request")
+
 
 class SyncWorker:
     def __init__(self, page=None):
         """
+        Runs incremental sync cycles (see sync_engine.SyncEngine) on the
+        SyncScheduler's timing until running is set to False.
+
         :param page: The Flet page object (optional), used for PubSub notifications.
         """
         self.page = page
+        if page:
+            sync_engine.page = page
+        self.scheduler = SyncScheduler()
+        # Mode of the next cycle, FULL when sync_now(FULL) asked for it
+        self.next_mode = INCREMENTAL
+        # Optional low-priority crawl of library details between sync cycles
+        crawl = os.environ.get("ILIBRARY_DETAIL_CRAWL", "1" if DETAIL_CRAWL else "0") == "1"
+        self.crawler = DetailCrawler() if crawl else None
         self.base_dir = Path(__file__).parent
         self.env_path = self.base_dir  / ".env"
-        self.db_path = self.base_dir / ".auth" / "libraries_metadata.db"
-
-        # Create storage directory if it doesn't exist
-        self.db_path.parent.mkdir(parents=True, exist_ok=True)
-        with open("worker.pid", "w") as f:
-            f.write(str(os.getpid()))
+        self.db_path = db_mgr.db_path
 
+        db_mgr.ensure_schema()
+        PID_FILE.write_text(str(os.getpid()))
 
-    def _upsert_data(self, table_name, schema, upsert_sql, data_rows):
+    @staticmethod
+    def _remove_pid_file():
+        """Removes the pid file if it still belongs to this process."""
+        try:
+            if PID_FILE.read_text().strip() == str(os.getpid()):
+                PID_FILE.unlink()
+        except (FileNotFoundError, ValueError):
+            pass
+
+    @property
+    def running(self) -> bool:
+        return not self.scheduler.stopped
+
+    @running.setter
+    def running(self, value: bool):
+        # main.handle_cleanup and Settings set running = False on shutdown
+        if value:
+            self.scheduler.stopped = False
+        else:
+            self.scheduler.stop()
+
+    def sync_now(self, mode: str = INCREMENTAL):
         """
-        Performs a non-destructive update.
-        It will NOT drop the table or delete existing data.
+        Starts the next sync cycle immediately instead of waiting for the
+        scheduler. A FULL request is kept until that cycle ran.
         """
+        logger.info(f"Immediate {mode} sync requested.")
+        if mode == FULL:
+            self.next_mode = FULL
+        self.scheduler.trigger_now()
+
+    def take_sync_request(self):
+        """Runs the cycle the UI process asked for in SYNC_REQUEST_FILE, if there is one."""
+        taken = SYNC_REQUEST_FILE.with_suffix(".taken")
         try:
-
-            # timeout=30 prevents "database is locked" errors if the UI is reading
-            with sqlite3.connect(self.db_path, timeout=30) as conn:
-                cursor = conn.cursor()
-
-                # 1. Create table if it doesn't exist (ensures the table is always there)
-                # Add this TEMPORARILY to your _upsert_data to fix the built app's DB
-                #cursor.execute(f"DROP TABLE IF EXISTS {table_name}")
-                cursor.execute(f"CREATE TABLE IF NOT EXISTS {table_name} {schema}")
-                #print(f"CREATE TABLE IF NOT EXISTS {table_name} {schema}")
-                # 2. Insert new records or update existing ones (Upsert)
-                # This requires a PRIMARY KEY defined in the schema
-                cursor.executemany(upsert_sql, data_rows)
-
-                conn.commit()
-                logger.info(f"Successfully upserted {len(data_rows)} rows into {table_name}")
-
-                # 3. Notify the UI to refresh without a full page reload
-                if self.page:
-                    self.page.pubsub.send_all(f"refresh_{table_name.lower()}")
-
-        except sqlite3.Error as e:
-            logger.error(f"Database error during upsert in {table_name}: {e}")
+            # Renamed first, a request written meanwhile goes into a new file
+            SYNC_REQUEST_FILE.replace(taken)
+            mode = taken.read_text().strip()
+            taken.unlink()
+        except FileNotFoundError:
+            return
+        self.sync_now(FULL if mode == FULL else INCREMENTAL)
 
     async def run_sync_cycle(self):
-        """A single pass of fetching data from the server and updating the local DB."""
-        load_dotenv(self.env_path, override=True)
-        encryption_key = get_or_generate_key(self.env_path)
-
-        if not os.getenv("ENCRYPTED_DB_CREDENTIALS"):
-            logger.warning("No credentials found in .env. Skipping sync cycle.")
-            return
+        """
+        One sync cycle, incremental unless sync_now(FULL) asked for a full one,
+        coalesced with other sync requests (e.g. the full sync after the
+        settings were saved), see SyncEngine.run().
 
-        creds = load_decrypted_credentials(encryption_key, self.env_path)
-        if not creds:
-            logger.error("Could not decrypt credentials.")
-            return
+        :return: per table counts of inserted/updated/deleted rows,
+                 None for tables whose sync failed
+        """
+        mode, self.next_mode = self.next_mode, INCREMENTAL
+        return await sync_engine.run(mode)
 
-        # --- Sync Libraries (Non-Destructive) ---
+    async def main_loop(self):
+        """Loop for the background worker, runs until running is set to False."""
+        logger.info("Background Worker heartbeat started.")
         try:
-            with Library(creds["user"], creds["password"], creds["system"], creds["driver"]) as lib:
-                raw_data = json.loads(lib.getAllLibraries())
-                items = raw_data.get('data', [])
-
-                values = [(i.get('OBJNAME'), i.get('OBJCREATED'), i.get('TEXT')) for i in items if isinstance(i, dict)]
-
-                # Schema uses OBJNAME as PRIMARY KEY to enable upserting
-                self._upsert_data(
-                    table_name="LIBRARY_METADATA",
-                    schema="(OBJNAME TEXT PRIMARY KEY, OBJCREATED TEXT, DESCRIPTION TEXT)",
-                    upsert_sql="""
-                             INSERT INTO LIBRARY_METADATA (OBJNAME, OBJCREATED, DESCRIPTION)
-                                VALUES (?, ?, ?)
-                                ON CONFLICT(OBJNAME) 
-                                DO UPDATE SET 
-                                    OBJCREATED = EXCLUDED.OBJCREATED,
-                                    DESCRIPTION = EXCLUDED.DESCRIPTION;
-                                 """,
-                    data_rows=values
-                )
-        except Exception as e:
-            logger.error(f"Library sync error: {e}")
-
-        # --- Sync Users (Non-Destructive) ---
+            while self.running:
+                start = time.perf_counter()
+                results = await self.run_sync_cycle()
+                duration = time.perf_counter() - start
+                if not self.running:
+                    break
+
+                failed = any(counts is None for counts in results.values())
+                changes = sum(sum(counts.values()) for counts in results.values() if counts)
+                delay = self.scheduler.next_delay(changes=changes, failed=failed, duration=duration)
+                logger.info(f"Next sync in {delay:.1f}s ({changes} changes, failed={failed})")
+                if self.crawler and not failed:
+                    # Runs while the worker waits, new or changed libraries since the last pass are picked up
+                    self.crawler.start()
+                await self.scheduler.wait(delay)
+        finally:
+            if self.crawler:
+                self.crawler.stop()
+            self._remove_pid_file()
+        logger.info("Background Worker stopped.")
+
+
+async def _poll_sync_requests(worker: SyncWorker):
+    """Checks SYNC_REQUEST_FILE regularly where SIGUSR1 cannot announce it (Windows)."""
+    while worker.running:
+        await asyncio.sleep(CHANGE_POLL_INTERVAL)
+        worker.take_sync_request()
+
+
+async def run_standalone():
+    """
+    Runs the worker as its own process (see worker_process.WorkerProcess).
+    SIGTERM stops it after the current cycle, SIGUSR1 starts the cycle asked
+    for in SYNC_REQUEST_FILE right away; without SIGUSR1 the file is polled.
+    The UI picks up the commits through change_watcher.ChangeWatcher.
+    """
+    worker = SyncWorker()
+    loop = asyncio.get_running_loop()
+    handlers = [(getattr(signal, "SIGTERM", None), worker.scheduler.stop),
+                (getattr(signal, "SIGUSR1", None), worker.take_sync_request)]
+    signalled = False
+    for signum, handler in handlers:
+        if signum is None:
+            continue
         try:
-            with User(creds["user"], creds["password"], creds["system"], creds["driver"]) as user:
-                raw_data = json.loads(user.getAllUsers())
-                items = raw_data.get('data', [])
-
-                values = [
-                    (i.get('AUTHORIZATION_NAME'), i.get('CREATION_TIMESTAMP'), i.get('TEXT_DESCRIPTION'))
-                    for i in items if isinstance(i, dict)
-                ]
-
-                # Schema uses AUTHORIZATION_NAME as PRIMARY KEY
-                self._upsert_data(
-                    table_name="USER_METADATA",
-                    schema="(AUTHORIZATION_NAME TEXT PRIMARY KEY, CREATION_TIMESTAMP TEXT, TEXT_DESCRIPTION TEXT)",
-                    upsert_sql=f"""INSERT INTO USER_METADATA (AUTHORIZATION_NAME, CREATION_TIMESTAMP, TEXT_DESCRIPTION)
-                                   VALUES (?, ?, ?)
-                           ON CONFLICT(AUTHORIZATION_NAME) 
-                            DO UPDATE SET 
-                            CREATION_TIMESTAMP = EXCLUDED.CREATION_TIMESTAMP,
-                            TEXT_DESCRIPTION = EXCLUDED.TEXT_DESCRIPTION;""",
-                    data_rows=values
-                )
-
-        except Exception as e:
-            logger.error(f"User sync error: {e}")
+            loop.add_signal_handler(signum, handler)
+            signalled = signalled or handler == worker.take_sync_request
+        except NotImplementedError:
+            # Windows event loops have no signal handlers, terminate() kills the process there
+            pass
+    poller = None if signalled else asyncio.ensure_future(_poll_sync_requests(worker))
+    try:
+        await worker.main_loop()
+    finally:
+        if poller:
+            poller.cancel()
+        db_mgr.close()
 
-    async def main_loop(self):
-        """Infinite loop for the background worker."""
-        logger.info("Background Worker heartbeat started.")
-        while True:
-            await self.run_sync_cycle()
-            # Wait for 60 seconds before syncing again
-            await asyncio.sleep(60.0)
+
+def run_process():
+    """Entry point of the worker process (python -m content.sync_worker, see WorkerProcess)."""
+    try:
+        asyncio.run(run_standalone())
+    except KeyboardInterrupt:
+        logger.info("Worker stopped manually.")
 
 
 # Entry point for stand-alone execution
 if __name__ == "__main__":
-    worker = SyncWorker()
-    try:
-        asyncio.run(worker.main_loop())
-    except KeyboardInterrupt:
-        logger.info("Worker stopped manually.")
\ No newline at end of file
+    run_process()
@@ -0,0 +1,45 @@
+import calendar
+from datetime import datetime
+from functools import lru_cache
+
+# Timestamps as the iLibrary functions return them, and as the UI shows them
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+DISPLAY_FORMAT = "%A, %b %d, %Y"
+
+
+def _parse(value):
+    try:
+        return datetime.strptime(value, TIMESTAMP_FORMAT)
+    except (ValueError, TypeError):
+        return None
+
+
+def to_epoch(value) -> int | None:
+    """
+    Seconds since 1970 of an IBM i timestamp, None if it cannot be parsed.
+    The timestamp carries no time zone and is taken as UTC, which keeps the
+    value stable for sorting and range queries.
+    """
+    parsed = _parse(value)
+    return calendar.timegm(parsed.timetuple()) if parsed else None
+
+
+def format_timestamp(value) -> str | None:
+    """Display form of an IBM i timestamp ("Monday, Jan 01, 2024"), None if it cannot be parsed."""
+    return _format(value) if isinstance(value, str) else None
+
+
+@lru_cache(maxsize=4096)
+def _format(value: str) -> str | None:
+    parsed = _parse(value)
+    return parsed.strftime(DISPLAY_FORMAT) if parsed else None
+
+
+def with_timestamp_columns(rows, index: int):
+    """
+    Appends the epoch and the display string of row[index] to every row,
+    the values of the <column>_EPOCH and <column>_DISPLAY columns.
+    """
+    for row in rows:
+        value = row[index]
+        yield (*row, to_epoch(value), format_timestamp(value))
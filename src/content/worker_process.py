@@ -0,0 +1,130 @@
+import logging
+import os
+import signal
+import subprocess
+import sys
+import threading
+from pathlib import Path
+
+from content.sync_engine import INCREMENTAL, FULL
+from content.sync_worker import PID_FILE, SYNC_REQUEST_FILE
+
+logger = logging.getLogger("WorkerProcess")
+
+# Directory that contains main.py and the content package
+SRC_DIR = Path(__file__).parent.parent
+# Started as a module, so the worker process never imports Flet or the views
+WORKER_MODULE = "content.sync_worker"
+
+
+def worker_command() -> list:
+    """
+    Command line of the worker process, run in SRC_DIR. A frozen or `flet
+    build` app has no Python interpreter to start the module with
+    (sys.executable is the app itself), so process mode is refused there
+    with an OSError.
+    """
+    executable = Path(sys.executable or "")
+    if getattr(sys, "frozen", False):
+        raise OSError("process mode is not available in a frozen app")
+    if not executable.name.lower().startswith(("python", "pypy")):
+        raise OSError(f"{executable.name or 'sys.executable'} is not a Python interpreter")
+    return [str(executable), "-m", WORKER_MODULE]
+
+
+class WorkerProcess:
+    """
+    Runs the SyncWorker as its own process instead of on the Flet event loop.
+    Offers the same running / sync_now() interface as SyncWorker, so main.py and
+    Settings can treat both modes alike. The worker writes worker.pid itself;
+    a pid file left behind by a crashed session is cleaned up on start().
+    """
+
+    def __init__(self, stop_timeout: float = 5.0):
+        self.stop_timeout = stop_timeout
+        self.process = None
+
+    @property
+    def running(self) -> bool:
+        return self.process is not None and self.process.poll() is None
+
+    @running.setter
+    def running(self, value: bool):
+        if value and not self.running:
+            self.start()
+        elif not value:
+            # Called from the window close handler, which must not wait for the process
+            self.stop(wait=False)
+
+    @staticmethod
+    def _cleanup_stale_pid_file():
+        try:
+            pid = int(PID_FILE.read_text().strip())
+        except (FileNotFoundError, ValueError):
+            PID_FILE.unlink(missing_ok=True)
+            return
+
+        # os.kill(pid, 0) would terminate the process on Windows, only check on POSIX
+        if os.name != "nt" and pid != os.getpid():
+            try:
+                os.kill(pid, 0)
+                logger.warning(f"Stopping orphaned sync worker (pid {pid}).")
+                os.kill(pid, signal.SIGTERM)
+            except (ProcessLookupError, PermissionError):
+                pass
+        PID_FILE.unlink(missing_ok=True)
+
+    def start(self):
+        """Starts `python -m content.sync_worker`. Raises OSError if it cannot be spawned."""
+        command = worker_command()
+        self._cleanup_stale_pid_file()
+        self.process = subprocess.Popen(command, cwd=SRC_DIR)
+        logger.info(f"Sync worker process started (pid {self.process.pid}).")
+
+    def sync_now(self, mode: str = INCREMENTAL):
+        """
+        Asks the worker process for a sync cycle in mode right away: the mode
+        goes into SYNC_REQUEST_FILE, SIGUSR1 wakes the worker (where there is
+        no SIGUSR1 the worker polls the file).
+        """
+        if not self.running:
+            logger.warning("Sync worker process is not running.")
+            return
+        try:
+            # A pending FULL request is not downgraded by a later incremental one
+            if SYNC_REQUEST_FILE.read_text().strip() == FULL:
+                mode = FULL
+        except FileNotFoundError:
+            pass
+        pending = SYNC_REQUEST_FILE.with_suffix(".tmp")
+        pending.write_text(mode)
+        pending.replace(SYNC_REQUEST_FILE)
+        if hasattr(signal, "SIGUSR1"):
+            self.process.send_signal(signal.SIGUSR1)
+
+    def stop(self, wait: bool = True):
+        """
+        Stops the worker after its current cycle, kills it if it does not exit
+        in time. With wait=False that waiting happens on a thread.
+        """
+        process, self.process = self.process, None
+        if process is None:
+            return
+        if process.poll() is None:
+            process.terminate()
+        if wait:
+            self._reap(process)
+        else:
+            # Not a daemon, the interpreter still waits for it to kill a stuck worker on exit
+            threading.Thread(target=self._reap, args=(process,), name="worker-stop").start()
+
+    def _reap(self, process: subprocess.Popen):
+        try:
+            process.wait(timeout=self.stop_timeout)
+        except subprocess.TimeoutExpired:
+            logger.warning("Sync worker process did not stop in time, killing it.")
+            process.kill()
+            process.wait()
+        logger.info(f"Sync worker process exited with code {process.returncode}.")
+        # A killed worker cannot remove its own pid file
+        PID_FILE.unlink(missing_ok=True)
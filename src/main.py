@@ -1,16 +1,25 @@
+import time
+_IMPORT_START = time.perf_counter()
 import asyncio
 import os
 import types
 from pathlib import Path
-from dotenv import load_dotenv
 from datetime import datetime
 import flet as ft
-from content.sync_worker import SyncWorker
-from content.functions import get_or_generate_key
+from content.sync_worker import SyncWorker, PID_FILE
+from content.worker_process import WorkerProcess
+from content.change_watcher import ChangeWatcher
+from content.config import SYNC_WORKER_MODE
+from content.credentials import credential_store
+from content.ibmi_executor import ibmi_executor
+from content.db_manager import db_mgr
 from content.LibraryStuff.all_libraries import AllLibraries
-from content.UserStuff.all_users import AllUsers
-from content.settings import Settings
+from content.HelperStuff.view_cache import ViewCache
+from content.startup_profile import StartupProfile
+from content.preferences import preferences
 import logging
+# The first screen needs nothing else, the other views are imported when first shown
+_IMPORT_TIME = time.perf_counter() - _IMPORT_START
 
 # --- Helper: Unified Navigation Content Manager ---
 async def clear_and_add_control(page_content: ft.Container, control):
@@ -19,6 +28,16 @@ async def clear_and_add_control(page_content: ft.Container, control):
     page_content.update()
 
 
+async def wait_for_first_render(view):
+    """Waits until view shows its first content (first_render), or its initialization ended without."""
+    first_render = getattr(view, "first_render", None)
+    if first_render is None:
+        return
+    rendered = asyncio.ensure_future(first_render.wait())
+    await asyncio.wait({rendered, asyncio.wrap_future(view._init)}, return_when=asyncio.FIRST_COMPLETED)
+    rendered.cancel()
+
+
 def setup_logger():
     # 1. Define the directory: ~/Library/Logs/iLibraryApp
     log_dir = Path.home() / "Library" / "Logs" / "iLibraryApp"
@@ -43,16 +62,31 @@ def setup_logger():
 
 # --- Main Application Entry Point ---
 async def main(page: ft.Page):
+    # Phase timings, printed with --profile-startup
+    profile = StartupProfile()
+    profile.add("import", _IMPORT_TIME)
     setup_logger()
+    # Make sure the metadata tables carry the delta sync columns before any view reads them.
+    # Runs on a worker thread while the shell is built, the views wait for it
+    schema_ready = asyncio.create_task(asyncio.to_thread(db_mgr.ensure_schema))
 
+    # Set at the end of startup, the window may be closed before that
+    worker = None
+    watcher = None
 
     #Shutdown
     def handle_cleanup(e):
         print("Application closing. Signaling worker to stop...")
-        if os.path.exists('worker.pid'):
-            os.unlink('worker.pid')
-        # Tell the worker to stop its loop
-        worker.running = False
+        # Tell the worker to stop its loop (or the worker process to exit)
+        if worker:
+            worker.running = False
+        if watcher:
+            watcher.stop()
+        if isinstance(worker, SyncWorker):
+            PID_FILE.unlink(missing_ok=True)
+        ibmi_executor.shutdown()
+        views.clear()
+        db_mgr.close()
 
         # Attach the cleanup function to the window close event
 
@@ -61,13 +95,6 @@ async def main(page: ft.Page):
 
     page.theme = ft.Theme(use_material3=True, color_scheme_seed="#006E7C")
     #00ffe5
-    # Load Theme Mode from storage
-    theme_val = await ft.SharedPreferences().get("theme_mode")
-    page.theme_mode = (
-        ft.ThemeMode.LIGHT if theme_val == "light"
-        else ft.ThemeMode.DARK if theme_val == "dark"
-        else ft.ThemeMode.SYSTEM
-    )
 
     # Main Dynamic Content Area
     page_content = ft.Container(expand=True)
@@ -75,21 +102,63 @@ async def main(page: ft.Page):
     # Navigation Helper Wrapper
     async def route_to(control):
         await clear_and_add_control(page_content, control)
+        # A kept view continues where it was left, any other one starts at the top
+        await content_column.scroll_to(offset=views.offset(control) or 0, duration=0)
+
+    # The rail views are built once and kept (see ViewCache)
+    views = ViewCache()
+    views.register("libraries", lambda: AllLibraries(page, content_manager=route_to))
+
+    def build_users():
+        from content.UserStuff.all_users import AllUsers
+        return AllUsers(page, content_manager=route_to)
+
+    def build_settings():
+        from content.settings import Settings
+        return Settings(page, content_manager=route_to)
+
+    views.register("users", build_users)
+    views.register("settings", build_settings)
+    # The detail views go back to the kept list views through page.data (kept_view)
+    page.data = {**(page.data or {}), "views": views}
+
+    # The views scroll inside the main column, pass its scroll events on (paged lists)
+    async def handle_content_scroll(e: ft.OnScrollEvent):
+        view = page_content.content
+        views.remember_offset(view, e.pixels)
+        if hasattr(view, "handle_page_scroll"):
+            await view.handle_page_scroll(e)
+
+    content_column = ft.Column(
+        [page_content],
+        expand=True,
+        alignment=ft.MainAxisAlignment.START,
+        scroll=ft.ScrollMode.ADAPTIVE,
+        scroll_interval=100,
+        on_scroll=handle_content_scroll,
+    )
+
+    async def close_window():
+        # Preference writes are batched, send the last ones before the window goes
+        await preferences(page).flush()
+        await page.window.close()
 
     # Navigation Bar Handler
     async def navigation_bar_changed(e):
 
         idx = e.control.selected_index
+        # No view reads the database before its schema is up to date
+        await schema_ready
 
         if idx == 0:  # Libraries
             page.title = "Libraries"
-            await route_to(AllLibraries(page, content_manager=route_to))
+            await route_to(views.get("libraries"))
         elif idx == 1:  # Users
             page.title = "Users"
-            await route_to(AllUsers(page, content_manager=route_to))
+            await route_to(views.get("users"))
         elif idx == 2:  # Settings
             page.title = "Settings"
-            await route_to(Settings(page, content_manager=route_to))
+            await route_to(views.get("settings"))
         elif idx == 3:  # Exit
             dlg = ft.AlertDialog(
                 title=ft.Text("Close App"),
@@ -98,7 +167,7 @@ async def main(page: ft.Page):
                     ft.TextButton("No", on_click=lambda _: page.pop_dialog()),
                     ft.Button(
                         content="Yes",
-                        on_click=lambda _: page.run_task(page.window.close),
+                        on_click=lambda _: page.run_task(close_window),
                         style=ft.ButtonStyle(bgcolor=ft.Colors.ERROR, color=ft.Colors.ON_ERROR)
                     )
                 ]
@@ -125,18 +194,49 @@ async def main(page: ft.Page):
         on_change=navigation_bar_changed,
     )
 
-    # Initial Layout Construction
-    env_file_path = Path(__file__).parent / "content" / ".env"
-    ENCRYPTION_KEY_STR = get_or_generate_key(env_file_path)
-    load_dotenv(env_file_path, override=True)
-    credentials_str = os.getenv("ENCRYPTED_DB_CREDENTIALS")
-
-
     async def _go_to_settings_page_from_error():
         rail.selected_index = 2
         page.update()
-        await route_to(Settings(page, content_manager=route_to))
+        await route_to(views.get("settings"))
+
+    # Initial Layout Construction, the libraries come from the local database.
+    # SharedPreferences and .env are only read once they are on screen
+    with profile.phase("shell"):
+        page.add(
+            ft.Row(
+                [
+                    rail,
+                    ft.VerticalDivider(width=1),
+                    content_column,
+                ],
+                expand=True,
+            )
+        )
+
+    with profile.phase("schema"):
+        # Only the time the first view still had to wait
+        await schema_ready
+
+    with profile.phase("first render"):
+        # Load Default View (Libraries)
+        await navigation_bar_changed(types.SimpleNamespace(control=rail))
+        page.update()
+        await wait_for_first_render(page_content.content)
+
+    with profile.phase("prefs"):
+        # All preferences in one go, the views read them from memory from now on
+        await preferences(page).load()
+        # Load Theme Mode from storage
+        theme_val = await preferences(page).get("theme_mode")
+        page.theme_mode = (
+            ft.ThemeMode.LIGHT if theme_val == "light"
+            else ft.ThemeMode.DARK if theme_val == "dark"
+            else ft.ThemeMode.SYSTEM
+        )
+        page.update()
 
+    with profile.phase("credentials"):
+        credentials_str = credential_store.has_encrypted_credentials()
 
     if not credentials_str:
 
@@ -157,36 +257,29 @@ async def main(page: ft.Page):
 
         page.update()
         page.show_dialog(error_banner)
-    page.add(
-        ft.Row(
-            [
-                rail,
-                ft.VerticalDivider(width=1),
-                ft.Column(
-                    [page_content],
-                    expand=True,
-                    alignment=ft.MainAxisAlignment.START,
-                    scroll=ft.ScrollMode.ADAPTIVE
-                )
-            ],
-            expand=True,
-        )
-    )
+    profile.report()
 
     # Start Background Sync Task
     #page.run_task(run_sync, page)
 
-    # Load Default View (Libraries)
-
-    await navigation_bar_changed(types.SimpleNamespace(control=rail))
-
-
-    page.update()
-
     await asyncio.sleep(0.1)
-    worker = SyncWorker(page=page)
-
-    page.run_task(worker.main_loop)
+    if os.environ.get("ILIBRARY_SYNC_WORKER_MODE", SYNC_WORKER_MODE) == "process":
+        try:
+            worker = WorkerProcess()
+            worker.start()
+            # The worker process cannot reach page.pubsub, watch the database instead
+            watcher = ChangeWatcher(page)
+            page.run_task(watcher.run)
+        except OSError as ex:
+            # Also raised for frozen / flet build apps, see worker_process.worker_command
+            logging.error(f"Could not start the sync worker process, syncing in-process: {ex}")
+            worker = None
+
+    if worker is None:
+        worker = SyncWorker(page=page)
+        page.run_task(worker.main_loop)
+    # Settings reaches the worker through page.data ("Sync Now", clearing app data)
+    page.data = {**(page.data or {}), "worker": worker}
 
 if __name__ == "__main__":
     ft.run(main)
\ No newline at end of file
@@ -0,0 +1,6 @@
+import sys
+from pathlib import Path
+
+# The app imports its modules as content.*, run from src like main.py
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+sys.path.insert(0, str(SRC_DIR))
@@ -0,0 +1,98 @@
+import asyncio
+
+import flet as ft
+import pytest
+
+from content.change_watcher import ChangeWatcher
+from content.db_manager import DatabaseManager, LIBRARY_METADATA_SCHEMA, INCREMENTAL, FULL
+from content.HelperStuff.live_list import LiveList
+from content.HelperStuff.prefix_index import PrefixIndex
+from content.ingest import apply_delta
+
+COLUMNS = ("OBJNAME", "DESCRIPTION")
+
+
+class PubSub:
+    """page.pubsub with the topic handlers run as tasks, like Flet does."""
+
+    def __init__(self):
+        self.handlers = {}
+        self.sent = []
+
+    def subscribe_topic(self, topic, handler):
+        self.handlers.setdefault(topic, []).append(handler)
+
+    def unsubscribe_topic(self, topic):
+        self.handlers.pop(topic, None)
+
+    def send_all_on_topic(self, topic, message):
+        self.sent.append((topic, message))
+        for handler in self.handlers.get(topic, []):
+            asyncio.ensure_future(handler(topic, message))
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = DatabaseManager(tmp_path / "libraries_metadata.db")
+    db.ensure_schema()
+    with db.writer() as conn:
+        apply_delta(conn, "LIBRARY_METADATA", "OBJNAME", COLUMNS, [("A", "a"), ("B", "b"), ("C", "c")])
+    yield db
+    db.close()
+
+
+@pytest.fixture
+def worker_db(db):
+    # The sync worker process has its own connections to the same file
+    worker_db = DatabaseManager(db.db_path)
+    yield worker_db
+    worker_db.close()
+
+
+def watch(db, worker_sync):
+    """Loads a list and a prefix index, runs worker_sync while the watcher polls, returns both after it."""
+    page = type("Page", (), {"pubsub": PubSub()})()
+    live = LiveList(page, ft.Column(), db, "LIBRARY_METADATA", "OBJNAME", COLUMNS,
+                    build_tile=lambda name, description: ft.Text(name), on_update=lambda: None)
+    index = PrefixIndex(page, db, "LIBRARY_METADATA", "OBJNAME")
+    with db.reader() as conn:
+        live.load(conn.cursor())
+        index.load(conn.cursor())
+    live.subscribe()
+    index.subscribe()
+
+    async def main():
+        watcher = ChangeWatcher(page, db, interval=0.01)
+        running = asyncio.ensure_future(watcher.run())
+        await asyncio.sleep(0.05)
+        await asyncio.to_thread(worker_sync)
+        while not page.pubsub.sent:
+            await asyncio.sleep(0.01)
+        # Let the handlers finish
+        await asyncio.sleep(0.1)
+        watcher.stop()
+        await running
+
+    asyncio.run(main())
+    return page.pubsub.sent, live, index
+
+
+def test_full_refresh_in_the_worker_process_reloads(db, worker_db):
+    def full_refresh():
+        worker_db.refresh_table("LIBRARY_METADATA", LIBRARY_METADATA_SCHEMA, COLUMNS, [("A", "a"), ("C", "c")])
+
+    sent, live, index = watch(db, full_refresh)
+    assert sent == [("refresh_library_metadata", {"mode": FULL})]
+    assert live.keys == ["A", "C"]
+    assert index.lookup("B", 10) == [] and len(index) == 2
+
+
+def test_incremental_sync_in_the_worker_process_applies_changes(db, worker_db):
+    def incremental():
+        with worker_db.writer() as conn:
+            apply_delta(conn, "LIBRARY_METADATA", "OBJNAME", COLUMNS, [("A", "a"), ("C", "c"), ("D", "d")])
+
+    sent, live, index = watch(db, incremental)
+    assert sent == [("refresh_library_metadata", {"mode": INCREMENTAL})]
+    assert live.keys == ["A", "C", "D"]
+    assert index.lookup("D", 10) == [("D",)] and len(index) == 3
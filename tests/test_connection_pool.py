@@ -0,0 +1,79 @@
+import json
+
+import pytest
+
+from content.connection_pool import ConnectionPool
+
+CREDS = {"system": "SYS1", "user": "BOB", "password": "secret", "driver": "IBM i Access ODBC Driver"}
+
+
+class Connection:
+    """Stands in for an opened iLibrary Library object."""
+
+    def __init__(self, creds):
+        self.password = creds["password"]
+        self.closed = False
+
+    def getAllLibraries(self, fail=False):
+        return json.dumps({"success": not fail, "data": []})
+
+    def iclose(self):
+        self.closed = True
+
+
+@pytest.fixture
+def pool():
+    pool = ConnectionPool(min_size=1, max_size=2, idle_timeout=300.0, health_check_after=1000.0)
+    pool.opened = []
+
+    def open_connection(kind, creds):
+        connection = Connection(creds)
+        pool.opened.append(connection)
+        return connection
+
+    pool._open = open_connection
+    return pool
+
+
+def test_connection_is_reused(pool):
+    pool.call("library", CREDS, "getAllLibraries")
+    pool.call("library", CREDS, "getAllLibraries")
+    assert len(pool.opened) == 1 and pool.stats["reused"] == 1
+
+
+def test_changed_password_opens_a_new_connection(pool):
+    pool.call("library", CREDS, "getAllLibraries")
+    pool.call("library", {**CREDS, "password": "changed"}, "getAllLibraries")
+    assert [connection.password for connection in pool.opened] == ["secret", "changed"]
+
+
+def test_close_all_closes_connections_checked_out_before(pool):
+    with pool.connection("library", CREDS) as checked_out:
+        pool.call("library", CREDS, "getAllLibraries")
+        idle = pool.opened[1]
+        pool.close_all()
+        assert idle.closed and not checked_out.closed
+    # Not put back into the pool on checkin
+    assert checked_out.closed
+    pool.call("library", CREDS, "getAllLibraries")
+    assert len(pool.opened) == 3 and pool.stats["reused"] == 0
+
+
+def test_checkin_prunes_expired_connections(pool, monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr("content.connection_pool.time.monotonic", lambda: clock[0])
+    with pool.connection("library", CREDS) as busy:
+        with pool.connection("library", CREDS) as idle:
+            pass
+        clock[0] += 301.0
+    # Expired while busy was checked out, closed on its checkin without another checkout
+    assert idle.closed and not busy.closed
+    assert pool.stats["closed"] == 1
+
+
+def test_failed_call_discards_the_connection(pool):
+    with pytest.raises(TypeError):
+        pool.call("library", CREDS, "getAllLibraries", unknown=True)
+    assert pool.opened[0].closed
+    pool.call("library", CREDS, "getAllLibraries")
+    assert len(pool.opened) == 2
@@ -0,0 +1,76 @@
+import json
+import zlib
+
+import pytest
+
+from content.db_manager import DatabaseManager
+from content.detail_cache import DetailCache, LIBRARY_INFO, FILE_INFO, age_text
+
+CREDS = {"system": "PUB400", "user": "BOB"}
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = DatabaseManager(tmp_path / "libraries_metadata.db")
+    db.ensure_schema()
+    yield db
+    db.close()
+
+
+def cached_keys(db):
+    with db.reader() as conn:
+        return [row[0] for row in conn.execute("SELECT DETAIL_KEY FROM DETAIL_CACHE ORDER BY DETAIL_KEY")]
+
+
+def test_store_and_load(db):
+    cache = DetailCache(db)
+    value = [{"OBJNAME": "FILE1", "TEXT": "ä"}, {"OBJNAME": "FILE2", "TEXT": None}]
+    cache.store(FILE_INFO, CREDS, "LIB1|False", value, fetched_at=1000.0)
+    assert cache.load(FILE_INFO, CREDS, "LIB1|False") == {"value": value, "fetched_at": 1000.0}
+    assert cache.stats["hits"] == 1 and cache.stats["stores"] == 1
+
+
+def test_entries_are_kept_per_kind_and_system(db):
+    cache = DetailCache(db)
+    cache.store(LIBRARY_INFO, CREDS, "LIB1", {"size": 1})
+    assert cache.load(FILE_INFO, CREDS, "LIB1") is None
+    assert cache.load(LIBRARY_INFO, {"system": "OTHER", "user": "BOB"}, "LIB1") is None
+    assert cache.stats["misses"] == 2
+
+
+def test_store_replaces_the_entry(db):
+    cache = DetailCache(db)
+    cache.store(LIBRARY_INFO, CREDS, "LIB1", {"size": 1})
+    cache.store(LIBRARY_INFO, CREDS, "LIB1", {"size": 2})
+    assert cache.load(LIBRARY_INFO, CREDS, "LIB1")["value"] == {"size": 2}
+    assert cached_keys(db) == ["LIB1"]
+
+
+def test_least_recently_used_entries_are_evicted(db, monkeypatch):
+    clock = iter(range(1000, 2000))
+    monkeypatch.setattr("content.detail_cache.time.time", lambda: next(clock))
+    # The same value compresses to the same size, room for three entries
+    value = {"text": "x" * 200}
+    size = len(zlib.compress(json.dumps(value, separators=(",", ":")).encode()))
+    cache = DetailCache(db, max_bytes=3 * size)
+    for key in ("LIB1", "LIB2", "LIB3"):
+        cache.store(LIBRARY_INFO, CREDS, key, value)
+    # A read only recorded in memory still counts when the next store evicts
+    cache.load(LIBRARY_INFO, CREDS, "LIB1")
+    cache.store(LIBRARY_INFO, CREDS, "LIB4", value)
+    assert cached_keys(db) == ["LIB1", "LIB3", "LIB4"]
+    assert cache.stats["evicted"] == 1
+
+
+def test_is_stale(db, monkeypatch):
+    monkeypatch.setattr("content.detail_cache.time.time", lambda: 10_000.0)
+    cache = DetailCache(db, ttl=60)
+    assert not cache.is_stale({"fetched_at": 9_950.0})
+    assert cache.is_stale({"fetched_at": 9_900.0})
+
+
+def test_age_text(monkeypatch):
+    monkeypatch.setattr("content.detail_cache.time.time", lambda: 100_000.0)
+    assert age_text(99_990.0) == "Updated just now"
+    assert age_text(99_700.0, refreshing=True) == "Updated 5 min ago, refreshing..."
+    assert age_text(92_800.0, offline=True) == "Server unreachable, showing data from 2 h ago"
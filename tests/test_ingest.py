@@ -0,0 +1,104 @@
+import json
+import sqlite3
+
+import pytest
+
+from content.ingest import apply_delta, iter_envelope_rows
+
+COLUMNS = ("OBJNAME", "DESCRIPTION")
+
+
+def envelope(data, success=True, details=None):
+    # Same shape as iLibrary's create_success_envelope / create_error_envelope
+    return json.dumps({
+        "success": success,
+        "code": 200 if success else 500,
+        "metadata": {"count": len(data)},
+        "data": data,
+        "error": {"details": details} if details else None,
+    }, indent=4)
+
+
+@pytest.fixture
+def conn():
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE SYNC_GENERATION (TABLE_NAME TEXT PRIMARY KEY, GEN INTEGER NOT NULL)")
+    conn.execute(
+        "CREATE TABLE LIBRARY_METADATA (OBJNAME TEXT PRIMARY KEY, DESCRIPTION TEXT, ROW_HASH TEXT, "
+        "SYNC_GEN INTEGER NOT NULL DEFAULT 0, DELETED INTEGER NOT NULL DEFAULT 0)"
+    )
+    yield conn
+    conn.close()
+
+
+def rows(conn):
+    return conn.execute(
+        "SELECT OBJNAME, DESCRIPTION, SYNC_GEN, DELETED FROM LIBRARY_METADATA ORDER BY OBJNAME"
+    ).fetchall()
+
+
+def test_iter_envelope_rows_yields_data_rows():
+    data = [{"OBJNAME": "LIB1"}, {"OBJNAME": "LIB2", "TEXT": "a \"quoted\" [text]"}]
+    assert list(iter_envelope_rows(envelope(data), "getAllLibraries")) == data
+    assert list(iter_envelope_rows(envelope([]), "getAllLibraries")) == []
+
+
+def test_iter_envelope_rows_raises_for_error_envelopes():
+    with pytest.raises(RuntimeError, match="getAllLibraries failed: connection lost"):
+        list(iter_envelope_rows(envelope([], success=False, details="connection lost"), "getAllLibraries"))
+
+
+@pytest.mark.parametrize("payload", [
+    "",
+    "[]",
+    envelope([{"OBJNAME": "LIB1"}, {"OBJNAME": "LIB2"}])[:-40],
+    '{"data": [{"OBJNAME": "LIB1"} {"OBJNAME": "LIB2"}]}',
+    '{"data": [{"OBJNAME": }]}',
+])
+def test_iter_envelope_rows_raises_for_malformed_payloads(payload):
+    with pytest.raises(RuntimeError, match="getAllLibraries: malformed payload"):
+        list(iter_envelope_rows(payload, "getAllLibraries"))
+
+
+def test_apply_delta_inserts_updates_and_tombstones(conn):
+    counts = apply_delta(conn, "LIBRARY_METADATA", "OBJNAME", COLUMNS, [("LIB1", "a"), ("LIB2", "b"), ("LIB3", "c")])
+    assert counts == {"inserted": 3, "updated": 0, "deleted": 0}
+    assert conn.execute("SELECT GEN FROM SYNC_GENERATION").fetchone() == (1,)
+
+    counts = apply_delta(conn, "LIBRARY_METADATA", "OBJNAME", COLUMNS, [("LIB1", "a"), ("LIB2", "changed"), ("LIB4", "d")])
+    assert counts == {"inserted": 1, "updated": 1, "deleted": 1}
+    assert rows(conn) == [
+        ("LIB1", "a", 1, 0),
+        ("LIB2", "changed", 2, 0),
+        ("LIB3", "c", 2, 1),
+        ("LIB4", "d", 2, 0),
+    ]
+
+
+def test_apply_delta_without_changes_keeps_the_generation(conn):
+    apply_delta(conn, "LIBRARY_METADATA", "OBJNAME", COLUMNS, [("LIB1", "a")])
+    counts = apply_delta(conn, "LIBRARY_METADATA", "OBJNAME", COLUMNS, [("LIB1", "a")])
+    assert counts == {"inserted": 0, "updated": 0, "deleted": 0}
+    assert conn.execute("SELECT GEN FROM SYNC_GENERATION").fetchone() == (1,)
+
+
+def test_apply_delta_revives_tombstoned_rows(conn):
+    apply_delta(conn, "LIBRARY_METADATA", "OBJNAME", COLUMNS, [("LIB1", "a"), ("LIB2", "b")])
+    apply_delta(conn, "LIBRARY_METADATA", "OBJNAME", COLUMNS, [("LIB1", "a")])
+    counts = apply_delta(conn, "LIBRARY_METADATA", "OBJNAME", COLUMNS, [("LIB1", "a"), ("LIB2", "b")])
+    assert counts == {"inserted": 1, "updated": 0, "deleted": 0}
+    assert rows(conn)[1] == ("LIB2", "b", 3, 0)
+
+
+def test_apply_delta_keeps_rows_for_an_empty_snapshot(conn):
+    apply_delta(conn, "LIBRARY_METADATA", "OBJNAME", COLUMNS, [("LIB1", "a")])
+    counts = apply_delta(conn, "LIBRARY_METADATA", "OBJNAME", COLUMNS, [])
+    assert counts == {"inserted": 0, "updated": 0, "deleted": 0}
+    assert rows(conn) == [("LIB1", "a", 1, 0)]
+
+
+def test_apply_delta_batches(conn):
+    data = [(f"LIB{i:03d}", str(i)) for i in range(25)]
+    counts = apply_delta(conn, "LIBRARY_METADATA", "OBJNAME", COLUMNS, data, batch_size=4)
+    assert counts["inserted"] == 25
+    assert len(rows(conn)) == 25
@@ -0,0 +1,137 @@
+import asyncio
+
+import flet as ft
+import pytest
+
+from content.db_manager import DatabaseManager, LIBRARY_METADATA_SCHEMA
+from content.HelperStuff.live_list import LiveList
+from content.ingest import apply_delta
+
+COLUMNS = ("OBJNAME", "DESCRIPTION")
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = DatabaseManager(tmp_path / "libraries_metadata.db")
+    db.ensure_schema()
+    yield db
+    db.close()
+
+
+def sync(db, names, changed=()):
+    """An incremental sync whose snapshot holds names, the changed ones with a new description."""
+    rows = [(name, "new" if name in changed else "d") for name in names]
+    with db.writer() as conn:
+        apply_delta(conn, "LIBRARY_METADATA", "OBJNAME", COLUMNS, rows)
+
+
+def names(count):
+    return [f"LIB{i:03d}" for i in range(count)]
+
+
+def live_list(db, page_size=10, window_pages=2):
+    container = ft.Column(spacing=0)
+    live = LiveList(None, container, db, "LIBRARY_METADATA", "OBJNAME", COLUMNS,
+                    build_tile=lambda name, description: ft.Text(f"{name}:{description}"),
+                    on_update=lambda: None, page_size=page_size, window_pages=window_pages, tile_height=10)
+    with db.reader() as conn:
+        live.load(conn.cursor())
+    return live
+
+
+def tiles(live):
+    # The first control is the spacer standing in for the rows before the window
+    return [tile.value for tile in live.container.controls[1:]]
+
+
+def check_window(live):
+    assert [tile.split(":")[0] for tile in tiles(live)] == live.keys
+    assert live.keys == sorted(live.keys)
+    assert len(live.keys) <= live.max_rows
+    assert live.spacer.height == live.rows_before * live.row_extent
+
+
+def refresh(live):
+    asyncio.run(live._on_refresh(live.topic, None))
+
+
+def load_all_next(live):
+    async def scroll():
+        while await live.load_next():
+            pass
+    asyncio.run(scroll())
+
+
+def test_load_shows_the_first_page(db):
+    sync(db, names(25))
+    live = live_list(db)
+    assert live.keys == names(10)
+    assert not live.at_end and live.rows_before == 0
+    check_window(live)
+
+
+def test_refresh_inserts_updates_and_removes_tiles(db):
+    sync(db, names(5))
+    live = live_list(db)
+    sync(db, ["LIB000", "LIB001a", "LIB003", "LIB004"], changed=["LIB003"])
+    refresh(live)
+    assert live.keys == ["LIB000", "LIB001a", "LIB003", "LIB004"]
+    assert tiles(live)[2] == "LIB003:new"
+    check_window(live)
+
+
+def test_refresh_skips_rows_after_the_window(db):
+    sync(db, names(25))
+    live = live_list(db)
+    sync(db, names(25) + ["LIB999"])
+    refresh(live)
+    assert live.keys == names(10)
+    load_all_next(live)
+    assert live.keys[-1] == "LIB999" and live.at_end
+
+
+def test_changes_above_the_window_move_the_spacer(db):
+    sync(db, names(50))
+    live = live_list(db)
+    load_all_next(live)
+    assert live.rows_before == 30 and live.keys[0] == "LIB030"
+    # Two rows before the window removed, one added
+    sync(db, [name for name in names(50) if name not in ("LIB001", "LIB002")] + ["LIB000a"])
+    refresh(live)
+    assert live.rows_before == 29 and live.keys[0] == "LIB030"
+    check_window(live)
+
+
+def test_inserts_trim_the_window_from_the_bottom(db):
+    sync(db, names(15))
+    live = live_list(db)
+    load_all_next(live)
+    assert live.at_end and len(live.keys) == 15
+    sync(db, names(15) + [f"LIB005{i}" for i in range(10)])
+    refresh(live)
+    assert len(live.keys) == 15 and not live.at_end and live.rows_before == 0
+    check_window(live)
+    load_all_next(live)
+    assert live.at_end and live.keys[-1] == "LIB014"
+    assert live.rows_before + len(live.keys) == 25
+    check_window(live)
+
+
+def test_catch_up_applies_missed_syncs(db):
+    sync(db, names(5))
+    live = live_list(db)
+    assert asyncio.run(live.catch_up()) is False
+    sync(db, names(6))
+    assert asyncio.run(live.catch_up()) is True
+    assert live.keys == names(6)
+
+
+def test_catch_up_reloads_after_a_full_refresh(db):
+    sync(db, names(5))
+    live = live_list(db)
+    # A full refresh leaves no tombstones, the removed rows are simply gone
+    db.refresh_table("LIBRARY_METADATA", LIBRARY_METADATA_SCHEMA, COLUMNS,
+                     [(name, "d") for name in names(5) if name != "LIB002"])
+    assert asyncio.run(live.catch_up()) is True
+    assert "LIB002" not in live.keys and len(live.keys) == 4
+    check_window(live)
@@ -0,0 +1,56 @@
+import sqlite3
+
+import pytest
+
+from content.HelperStuff.prefix_index import PrefixIndex
+
+
+@pytest.fixture
+def index():
+    conn = sqlite3.connect(":memory:")
+    conn.execute(
+        "CREATE TABLE SYNC_GENERATION "
+        "(TABLE_NAME TEXT PRIMARY KEY, GEN INTEGER NOT NULL, FULL_GEN INTEGER NOT NULL DEFAULT 0)"
+    )
+    conn.execute("CREATE TABLE LIBRARY_METADATA (OBJNAME TEXT PRIMARY KEY, DELETED INTEGER NOT NULL DEFAULT 0)")
+    conn.executemany(
+        "INSERT INTO LIBRARY_METADATA (OBJNAME, DELETED) VALUES (?, ?)",
+        [("PAYROLL", 0), ("PAYDATA", 0), ("ORDERS", 0), ("qgpl", 0), ("PAYOLD", 1)],
+    )
+    conn.execute("INSERT INTO SYNC_GENERATION (TABLE_NAME, GEN) VALUES ('LIBRARY_METADATA', 7)")
+    index = PrefixIndex(page=None, db=None, table_name="LIBRARY_METADATA", key_column="OBJNAME")
+    index.load(conn.cursor())
+    conn.close()
+    return index
+
+
+def test_load_reads_live_keys(index):
+    assert len(index) == 4
+    assert index.generation == 7
+    assert index.loaded
+
+
+def test_lookup_by_prefix_in_key_order(index):
+    assert index.lookup("PAY", 10) == [("PAYDATA",), ("PAYROLL",)]
+    assert index.lookup("ORDERS", 10) == [("ORDERS",)]
+    assert index.lookup("X", 10) == []
+    assert index.lookup("  ", 10) == []
+
+
+def test_lookup_ignores_case_and_keeps_the_original_key(index):
+    assert index.lookup("pay", 10) == [("PAYDATA",), ("PAYROLL",)]
+    assert index.lookup("QG", 10) == [("qgpl",)]
+
+
+def test_lookup_honours_the_limit(index):
+    assert index.lookup("PAY", 1) == [("PAYDATA",)]
+
+
+def test_add_and_remove(index):
+    index.add("PAYABLE")
+    index.add("PAYABLE")
+    assert index.lookup("PAY", 10) == [("PAYABLE",), ("PAYDATA",), ("PAYROLL",)]
+    index.remove("PAYDATA")
+    index.remove("MISSING")
+    assert index.lookup("PAY", 10) == [("PAYABLE",), ("PAYROLL",)]
+    assert len(index) == 4
@@ -0,0 +1,75 @@
+import sqlite3
+
+import pytest
+
+from content import search_index
+from content.db_manager import DatabaseManager, LIBRARY_METADATA_SCHEMA
+from content.search_index import fts_available, search
+
+COLUMNS = ("OBJNAME", "DESCRIPTION")
+ROWS = [("PAYROLL", "Salaries"), ("PAYMENTS", "Invoices paid"), ("QGPL", "General purpose library")]
+
+
+def no_trigram(cursor, table_name, rebuild):
+    """Fails like a SQLite without the trigram tokenizer, after a statement went through."""
+    cursor.execute("CREATE TABLE FTS_LEFTOVER (X)")
+    cursor.execute(f"CREATE VIRTUAL TABLE {table_name}_X USING fts5(X, tokenize='no_such_tokenizer')")
+
+
+def database(tmp_path):
+    db = DatabaseManager(tmp_path / "libraries_metadata.db")
+    db.ensure_schema()
+    db.refresh_table("LIBRARY_METADATA", LIBRARY_METADATA_SCHEMA, COLUMNS, ROWS)
+    return db
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = database(tmp_path)
+    yield db
+    db.close()
+
+
+@pytest.fixture
+def db_without_fts(tmp_path, monkeypatch):
+    monkeypatch.setattr(search_index, "_create_fts", no_trigram)
+    db = database(tmp_path)
+    yield db
+    db.close()
+
+
+def test_search_uses_the_full_text_index(db):
+    with db.reader() as conn:
+        assert fts_available(conn, "LIBRARY_METADATA")
+        # Ranked by bm25, not by key
+        assert sorted(search(conn, "LIBRARY_METADATA", "pay")) == [("PAYMENTS",), ("PAYROLL",)]
+        assert search(conn, "LIBRARY_METADATA", "purpose") == [("QGPL",)]
+
+
+def test_schema_is_created_without_fts(db_without_fts):
+    with db_without_fts.reader() as conn:
+        tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        assert {"SYNC_GENERATION", "SYNC_RUNS", "LIBRARY_METADATA", "USER_METADATA"} <= tables
+        # Only the failed index was rolled back
+        assert "FTS_LEFTOVER" not in tables
+        assert not fts_available(conn, "LIBRARY_METADATA")
+        assert conn.execute("SELECT COUNT(*) FROM LIBRARY_METADATA").fetchone()[0] == 3
+
+
+def test_search_without_fts_falls_back_to_like(db_without_fts):
+    with db_without_fts.reader() as conn:
+        assert search(conn, "LIBRARY_METADATA", "pay") == [("PAYMENTS",), ("PAYROLL",)]
+        assert search(conn, "LIBRARY_METADATA", "purpose") == [("QGPL",)]
+        assert search(conn, "LIBRARY_METADATA", "100%") == []
+        assert search(conn, "LIBRARY_METADATA", "QG") == [("QGPL",)]
+
+
+def test_create_fts_keeps_the_transaction(tmp_path, monkeypatch):
+    monkeypatch.setattr(search_index, "_create_fts", no_trigram)
+    conn = sqlite3.connect(tmp_path / "test.db", isolation_level=None)
+    conn.execute("BEGIN")
+    conn.execute("CREATE TABLE KEPT (X)")
+    assert search_index.create_fts(conn.cursor(), "LIBRARY_METADATA") is False
+    conn.execute("COMMIT")
+    assert conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'").fetchall() == [("KEPT",)]
+    conn.close()
@@ -0,0 +1,86 @@
+import asyncio
+
+import pytest
+
+from content.sync_engine import SyncEngine, INCREMENTAL, FULL
+
+
+class FakeCycles:
+    """Stands in for SyncEngine._run_cycle: records the modes, each cycle runs until released."""
+
+    def __init__(self):
+        self.modes = []
+        self.release = None
+
+    async def __call__(self, mode):
+        self.modes.append(mode)
+        await self.release.wait()
+        self.release.clear()
+        return {"cycle": len(self.modes), "mode": mode}
+
+
+@pytest.fixture
+def engine(monkeypatch):
+    engine = SyncEngine()
+    cycles = FakeCycles()
+    monkeypatch.setattr(engine, "_run_cycle", cycles)
+    return engine, cycles
+
+
+def run(engine, cycles, requests):
+    """Starts the first request, then the others while it runs, and releases every cycle."""
+    async def main():
+        cycles.release = asyncio.Event()
+        first = asyncio.ensure_future(engine.run(requests[0]))
+        await asyncio.sleep(0)
+        others = [asyncio.ensure_future(engine.run(mode)) for mode in requests[1:]]
+        await asyncio.sleep(0)
+        while not all(task.done() for task in (first, *others)):
+            cycles.release.set()
+            await asyncio.sleep(0.001)
+        return first.result(), [task.result() for task in others]
+
+    return asyncio.run(main())
+
+
+def test_single_request_runs_one_cycle(engine):
+    engine, cycles = engine
+    first, _ = run(engine, cycles, [INCREMENTAL])
+    assert cycles.modes == [INCREMENTAL]
+    assert first == {"cycle": 1, "mode": INCREMENTAL}
+    assert not engine.busy
+
+
+def test_requests_during_a_cycle_share_one_follow_up(engine):
+    engine, cycles = engine
+    first, others = run(engine, cycles, [INCREMENTAL, INCREMENTAL, INCREMENTAL, INCREMENTAL])
+    assert cycles.modes == [INCREMENTAL, INCREMENTAL]
+    assert first["cycle"] == 1
+    assert others == [{"cycle": 2, "mode": INCREMENTAL}] * 3
+
+
+def test_full_request_promotes_the_follow_up(engine):
+    engine, cycles = engine
+    _, others = run(engine, cycles, [INCREMENTAL, INCREMENTAL, FULL, INCREMENTAL])
+    assert cycles.modes == [INCREMENTAL, FULL]
+    assert others == [{"cycle": 2, "mode": FULL}] * 3
+
+
+def test_cancelled_caller_does_not_cancel_the_follow_up(engine):
+    engine, cycles = engine
+
+    async def main():
+        cycles.release = asyncio.Event()
+        first = asyncio.ensure_future(engine.run(INCREMENTAL))
+        await asyncio.sleep(0)
+        cancelled = asyncio.ensure_future(engine.run(FULL))
+        waiting = asyncio.ensure_future(engine.run(INCREMENTAL))
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        while not (first.done() and waiting.done()):
+            cycles.release.set()
+            await asyncio.sleep(0.001)
+        return waiting.result()
+
+    assert asyncio.run(main()) == {"cycle": 2, "mode": FULL}
+    assert cycles.modes == [INCREMENTAL, FULL]
@@ -0,0 +1,72 @@
+import asyncio
+
+from content.sync_scheduler import SyncScheduler
+
+
+def scheduler(**kwargs):
+    # Without jitter the delays are exact
+    return SyncScheduler(base_interval=10, min_interval=5, max_interval=40, max_backoff=60, jitter=0, **kwargs)
+
+
+def test_idle_cycles_stretch_the_interval():
+    s = scheduler()
+    assert [s.next_delay(changes=0, failed=False) for _ in range(5)] == [15, 22.5, 33.75, 40, 40]
+
+
+def test_changes_shorten_the_interval():
+    s = scheduler()
+    assert [s.next_delay(changes=3, failed=False) for _ in range(3)] == [5, 5, 5]
+
+
+def test_failures_back_off_exponentially_and_reset():
+    s = scheduler()
+    assert [s.next_delay(changes=0, failed=True) for _ in range(4)] == [20, 40, 60, 60]
+    assert s.failures == 4
+    s.next_delay(changes=1, failed=False)
+    assert s.failures == 0
+
+
+def test_delay_is_never_shorter_than_the_cycle():
+    assert scheduler().next_delay(changes=5, failed=False, duration=12) == 12
+
+
+def test_jitter_stays_in_range():
+    s = SyncScheduler(base_interval=10, max_interval=10, jitter=0.2)
+    assert all(8 <= s.next_delay(changes=0, failed=False) <= 12 for _ in range(100))
+
+
+def test_wait_times_out():
+    assert asyncio.run(scheduler().wait(0.01)) is False
+
+
+def test_trigger_before_the_first_wait_is_kept():
+    s = scheduler()
+    s.trigger_now()
+
+    async def waits():
+        # The first wait returns at once, the trigger is consumed by it
+        return await s.wait(5), await s.wait(0.01)
+
+    assert asyncio.run(waits()) == (True, False)
+
+
+def test_trigger_ends_a_running_wait():
+    s = scheduler()
+
+    async def trigger_later():
+        waiting = asyncio.ensure_future(s.wait(5))
+        await asyncio.sleep(0.01)
+        s.trigger_now()
+        return await asyncio.wait_for(waiting, 1)
+
+    assert asyncio.run(trigger_later()) is True
+
+
+def test_stop_ends_every_wait():
+    s = scheduler()
+    s.stop()
+
+    async def waits():
+        return await s.wait(5), await s.wait(5)
+
+    assert asyncio.run(waits()) == (True, True)
@@ -0,0 +1,77 @@
+from content.HelperStuff.view_cache import ViewCache, kept_view
+
+
+class View:
+    def __init__(self, key):
+        self.key = key
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+def view_cache(capacity, keys=("libraries", "users", "settings")):
+    cache = ViewCache(capacity=capacity)
+    built = []
+
+    def builder(key):
+        def build():
+            view = View(key)
+            built.append(view)
+            return view
+        return build
+
+    for key in keys:
+        cache.register(key, builder(key))
+    return cache, built
+
+
+def test_kept_view_is_reused():
+    cache, built = view_cache(2)
+    first = cache.get("libraries")
+    assert cache.get("libraries") is first
+    assert len(built) == 1 and (cache.hits, cache.misses) == (1, 1)
+
+
+def test_least_recently_used_view_is_dropped_and_closed():
+    cache, built = view_cache(2)
+    libraries = cache.get("libraries")
+    users = cache.get("users")
+    cache.remember_offset(libraries, 120.0)
+    cache.remember_offset(users, 40.0)
+    # libraries was shown last, so users goes
+    cache.get("libraries")
+    cache.get("settings")
+    assert users.closed and not libraries.closed
+    assert cache.offset(users) is None
+    assert cache.offset(libraries) == 120.0
+
+    # Coming back builds a new view without the old offset
+    users_again = cache.get("users")
+    assert users_again is not users and cache.offset(users_again) == 0.0
+    assert len(built) == 4 and (cache.hits, cache.misses) == (1, 4)
+
+
+def test_default_capacity_keeps_every_rail_view():
+    cache, built = view_cache(ViewCache().capacity)
+    for _ in range(3):
+        for key in ("libraries", "users", "settings"):
+            cache.get(key)
+    assert len(built) == 3 and not any(view.closed for view in built)
+
+
+def test_clear_closes_every_view():
+    cache, built = view_cache(3)
+    cache.get("libraries")
+    cache.get("users")
+    cache.clear()
+    assert all(view.closed for view in built)
+    assert cache.get("libraries") is not built[0]
+
+
+def test_kept_view_without_a_cache_builds():
+    cache, _ = view_cache(2)
+    page = type("Page", (), {"data": {"views": cache}})()
+    assert kept_view(page, "users", lambda: "built") is cache.get("users")
+    page.data = None
+    assert kept_view(page, "users", lambda: "built") == "built"